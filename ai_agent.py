@@ -1,15 +1,61 @@
 import os
 import asyncio
-from typing import List, Dict, Any
-from langchain_groq import ChatGroq
-from langchain.schema import HumanMessage, SystemMessage
-from langchain_community.tools import ArxivQueryRun
-from langchain_community.utilities import ArxivAPIWrapper
-import arxiv 
-import json
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
+from contextlib import asynccontextmanager
 import re
 import aiohttp
+import xml.etree.ElementTree as ET
 from datetime import datetime
+from cache import TieredCache, fingerprint, normalize_topic
+from concurrency import SingleFlight, LatencyTracker, hedged
+from resilience import ProviderUnavailable, build_provider_guards
+from ranking import rank_papers
+from dedup import dedupe_papers
+from prompt_builder import PromptBuilder, estimate_tokens
+from corpus import PaperCorpus, paper_key
+from records import Paper, openalex_record, semantic_scholar_record
+from citation_graph import CitationExpander
+from fulltext import FullTextIngester
+from review_store import ReviewStore
+from scheduler import LLMScheduler, SchedulerBusy, current_plan, normalize_plan
+from metrics import (REGISTRY, LLM_SECONDS, LLM_TTFT_SECONDS, REVIEWS, SOURCE_ERRORS, SOURCE_RESULTS,
+                     SOURCE_SECONDS, STAGE_SECONDS, current_timings, record_timing, record_token_usage, timed)
+import time
+
+ARXIV_API_URL = "https://export.arxiv.org/api/query"
+OPENALEX_BASE_URL = "https://api.openalex.org"
+CROSSREF_BASE_URL = "https://api.crossref.org"
+SEMANTIC_SCHOLAR_BASE_URL = "https://api.semanticscholar.org/graph/v1"
+ATOM_NS = {
+    "atom": "http://www.w3.org/2005/Atom",
+    "arxiv": "http://arxiv.org/schemas/atom",
+}
+
+
+def create_http_session() -> aiohttp.ClientSession:
+    """Build a keep-alive client session sized from the HTTP_* environment variables"""
+    connector = aiohttp.TCPConnector(
+        limit=int(os.getenv("HTTP_POOL_LIMIT", "100")),
+        # Every provider lives on its own host, so this caps connections per source.
+        limit_per_host=int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "10")),
+        use_dns_cache=True,
+        ttl_dns_cache=int(os.getenv("HTTP_DNS_CACHE_TTL", "300")),
+        keepalive_timeout=float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30")),
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+# LangChain and the Groq client account for most of a cold start, so they
+# are imported on first use (or by LiteratureReviewAgent.warm_up)
+def system_message(content: str) -> Any:
+    from langchain_core.messages import SystemMessage
+    return SystemMessage(content=content)
+
+
+def human_message(content: str) -> Any:
+    from langchain_core.messages import HumanMessage
+    return HumanMessage(content=content)
+
 
 class LiteratureReviewAgent:
     def __init__(self):
@@ -25,11 +71,74 @@ class LiteratureReviewAgent:
         # GROQ_MODEL_NAME=llama-3.1-8b-instant
         model_name = os.getenv("GROQ_MODEL_NAME", "llama-3.1-8b-instant")
 
-        self.llm = ChatGroq(groq_api_key=groq_api_key, model_name=model_name)
-        
-        # Initialize ArXiv tool for academic paper search
-        self.arxiv_tool = ArxivQueryRun(api_wrapper=ArxivAPIWrapper())
-        
+        self.model_name = model_name
+        self.prompt_builder = PromptBuilder.from_env(model_name)
+        # Global cap on concurrent Groq calls, served by plan priority
+        self.llm_scheduler = LLMScheduler.from_env()
+        # Built on first use; see the llm property
+        self._groq_api_key = groq_api_key
+        self._llm = None
+        # Preload LangChain and the Groq client at start(): "background", "blocking" or "off"
+        self.warm_up_mode = os.getenv("AGENT_WARMUP", "background")
+        # Completions keyed by hash of (model, system prompt, prompt); persisted
+        # in SQLite so every uvicorn worker shares it
+        self.llm_cache = TieredCache.from_env(
+            "LLM_CACHE", namespace="llm", default_ttl=7 * 24 * 3600, default_db_path=".cache/llm_cache.db"
+        )
+
+        # Shared HTTP pool; opened by start() from the server lifespan
+        self.http_session: Optional[aiohttp.ClientSession] = None
+
+        # Provider endpoints, overridable so benchmarks (and staging) can point at local stand-ins
+        self.arxiv_api_url = os.getenv("ARXIV_API_URL", ARXIV_API_URL)
+        self.openalex_base_url = os.getenv("OPENALEX_BASE_URL", OPENALEX_BASE_URL).rstrip("/")
+        self.crossref_base_url = os.getenv("CROSSREF_BASE_URL", CROSSREF_BASE_URL).rstrip("/")
+        self.semantic_scholar_base_url = os.getenv("SEMANTIC_SCHOLAR_BASE_URL", SEMANTIC_SCHOLAR_BASE_URL).rstrip("/")
+        # Search providers keyed by the name used in cache keys and stats
+        self.searchers = {
+            "arxiv": self._search_arxiv,
+            "openalex": self._search_openalex,
+            "crossref": self._search_crossref,
+            "semantic_scholar": self._search_semantic_scholar,
+        }
+        # Per-source result cache: memory LRU plus optional SQLite tier (SEARCH_CACHE_DB)
+        self.search_cache = TieredCache.from_env("SEARCH_CACHE", namespace="search")
+        # Search latency budget: per-provider timeout, overall deadline (seconds)
+        # and optional hedged requests for providers with a slow tail
+        self.source_timeout = aiohttp.ClientTimeout(total=float(os.getenv("SEARCH_SOURCE_TIMEOUT", "20")))
+        self.search_deadline = float(os.getenv("SEARCH_DEADLINE", "15"))
+        self.hedged_sources = {
+            s.strip() for s in os.getenv("SEARCH_HEDGE_SOURCES", "").split(",") if s.strip()
+        }
+        self.hedge_delay = float(os.getenv("SEARCH_HEDGE_DELAY", "2"))
+        self.source_latency = LatencyTracker()
+        # Candidates fetched per requested source, before relevance ranking trims them
+        self.overfetch = float(os.getenv("SEARCH_OVERFETCH", "2"))
+        # Local FTS index of every paper seen; answers first when it has enough fresh results
+        self.corpus = PaperCorpus.from_env()
+        self.corpus_max_age = float(os.getenv("CORPUS_MAX_AGE", str(24 * 3600)))
+        self._background_tasks: set = set()
+        # Per-provider token bucket and circuit breaker, shared by every request in this worker
+        self.provider_guards = build_provider_guards(self.searchers)
+        # Optional citation-graph expansion of the top-ranked results (CITATION_*)
+        self.citation_expander = CitationExpander.from_env(
+            self.openalex_base_url, self.semantic_scholar_base_url, self.provider_guards, self.source_timeout
+        )
+        # Optional open-access full text for the top-ranked papers (FULLTEXT_*)
+        self.full_text = FullTextIngester.from_env()
+        # Map-reduce analysis: papers are condensed in token-budgeted batches
+        # (with bounded parallel Groq calls) when they don't fit one prompt
+        self.map_batch_tokens = int(os.getenv("ANALYSIS_BATCH_TOKENS", "4000"))
+        self.map_concurrency = int(os.getenv("ANALYSIS_MAP_CONCURRENCY", "4"))
+        # Identical concurrent reviews share one search and one LLM call
+        self.review_flight = SingleFlight()
+        self.search_flight = SingleFlight()
+        # Stored reviews for refresh mode: a refresh within the interval is served from storage,
+        # and the update prompt carries this much of the existing review for context
+        self.review_store = ReviewStore.from_env()
+        self.refresh_min_interval = float(os.getenv("REVIEW_REFRESH_MIN_INTERVAL", "3600"))
+        self.refresh_context_tokens = int(os.getenv("REVIEW_REFRESH_CONTEXT_TOKENS", "1500"))
+
         # System prompt for literature review generation
         self.system_prompt = """You are an expert academic researcher and literature review specialist. Your task is to:
 
@@ -49,202 +158,442 @@ When generating literature reviews:
 - If asked, include a final "References (APA)" section listing the works cited using APA 7 formatting
 
 Format in‑text citations as: (Author, Year) or Author (Year) depending on context."""
+        self._register_metrics()
 
-    # -------------------- Literature Searchers --------------------
-    async def _search_arxiv(self, topic: str, max_results: int) -> List[Dict[str, Any]]:
+    def _register_metrics(self) -> None:
+        """Scrape-time gauges for the scheduler and caches"""
+        REGISTRY.gauge(
+            "litreview_llm_queue_depth", "LLM calls waiting for a slot", ("plan",),
+            lambda: {(plan,): stats["waiting"] for plan, stats in self.llm_scheduler.stats()["plans"].items()}
+        )
+        REGISTRY.gauge(
+            "litreview_llm_active", "LLM calls holding a slot", (),
+            lambda: {(): self.llm_scheduler.stats()["active"]}
+        )
+        REGISTRY.gauge(
+            "litreview_cache_events", "Cache counters since start", ("cache", "event"),
+            lambda: {
+                (name, event): value
+                for name, cache in (("search", self.search_cache), ("llm", self.llm_cache))
+                for event, value in cache.stats().items() if isinstance(value, (int, float)) and not isinstance(value, bool)
+            }
+        )
+
+    @property
+    def llm(self) -> Any:
+        """The Groq chat model, created (and langchain_groq imported) on first access"""
+        if self._llm is None:
+            from langchain_groq import ChatGroq
+            self._llm = ChatGroq(groq_api_key=self._groq_api_key, model_name=self.model_name)
+        return self._llm
+
+    @llm.setter
+    def llm(self, value: Any) -> None:
+        self._llm = value
+
+    async def warm_up(self) -> None:
+        """Do the first-review imports now, in a thread, so no request pays for them"""
+        def load():
+            system_message("")
+            return self.llm
         try:
-            search_query = f"all:\"{topic}\""
-            search = arxiv.Search(
-                query=search_query,
-                max_results=max_results,
-                sort_by=arxiv.SortCriterion.SubmittedDate
-            )
+            await asyncio.to_thread(load)
+        except Exception as e:
+            print(f"Agent warm-up error: {e}")
+
+    # -------------------- HTTP Session --------------------
+    async def start(self) -> None:
+        """Open the pooled HTTP session shared by all searchers and warm up per AGENT_WARMUP"""
+        if self.http_session is None or self.http_session.closed:
+            self.http_session = create_http_session()
+        if self.warm_up_mode == "blocking":
+            await self.warm_up()
+        elif self.warm_up_mode == "background":
+            self._spawn(self.warm_up())
+
+    async def close(self) -> None:
+        """Close the pooled HTTP session"""
+        if self._background_tasks:
+            # Let pending corpus writes finish before shutdown
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        if self.http_session is not None and not self.http_session.closed:
+            await self.http_session.close()
+        self.http_session = None
+        self.full_text.close()
+
+    @asynccontextmanager
+    async def _session_scope(self) -> AsyncIterator[aiohttp.ClientSession]:
+        """Yield the shared session, or a temporary one when start() was not called"""
+        if self.http_session is not None and not self.http_session.closed:
+            yield self.http_session
+        else:
+            async with create_http_session() as session:
+                yield session
+
+    # -------------------- Literature Searchers --------------------
+    # Searchers raise on upstream errors; _iter_sources reports them per provider.
+    # Each accepts an optional `since` (YYYY-MM-DD) limiting results to papers published on or after it.
+    async def _search_arxiv(self, session: aiohttp.ClientSession, topic: str, max_results: int,
+                            since: Optional[str] = None) -> List[Paper]:
+        # Query the Atom API directly on the shared session; the `arxiv`
+        # package pages synchronously and would block the event loop.
+        query = f"all:\"{topic}\""
+        if since:
+            query += f" AND submittedDate:[{since.replace('-', '')}0000 TO {datetime.utcnow():%Y%m%d}2359]"
+        params = {
+            "search_query": query,
+            "max_results": max_results,
+            "sortBy": "submittedDate",
+            "sortOrder": "descending"
+        }
+        async with session.get(self.arxiv_api_url, params=params, timeout=self.source_timeout) as resp:
+            resp.raise_for_status()
+            feed = await resp.text()
+            return self._parse_arxiv_feed(feed)
+
+    def _parse_arxiv_feed(self, feed: str) -> List[Paper]:
+        """Convert an arXiv Atom feed into paper records"""
+        root = ET.fromstring(feed)
+        papers = []
+        for entry in root.findall("atom:entry", ATOM_NS):
+            entry_id = (entry.findtext("atom:id", "", ATOM_NS) or "").strip()
+            published = (entry.findtext("atom:published", "", ATOM_NS) or "").strip()
+            try:
+                published_dt = datetime.strptime(published[:10], "%Y-%m-%d")
+            except ValueError:
+                published_dt = None
+            pdf_url = None
+            for link in entry.findall("atom:link", ATOM_NS):
+                if link.get("title") == "pdf":
+                    pdf_url = link.get("href")
+                    break
+            papers.append(Paper(
+                title=" ".join((entry.findtext("atom:title", "", ATOM_NS) or "").split()),
+                authors=[
+                    (a.findtext("atom:name", "", ATOM_NS) or "").strip()
+                    for a in entry.findall("atom:author", ATOM_NS)
+                ],
+                abstract=" ".join((entry.findtext("atom:summary", "", ATOM_NS) or "").split()),
+                published_date=published_dt.strftime("%Y-%m-%d") if published_dt else None,
+                year=published_dt.year if published_dt else None,
+                arxiv_id=entry_id,
+                doi=(entry.findtext("arxiv:doi", "", ATOM_NS) or "").strip() or None,
+                pdf_url=pdf_url or entry_id,
+                categories=[c.get("term") for c in entry.findall("atom:category", ATOM_NS) if c.get("term")],
+                source="arXiv"
+            ))
+        return papers
+
+    async def _search_openalex(self, session: aiohttp.ClientSession, topic: str, max_results: int,
+                               since: Optional[str] = None) -> List[Paper]:
+        params = {
+            "search": topic,
+            "per_page": max_results,
+            "sort": "publication_year:desc"
+        }
+        if since:
+            params["filter"] = f"from_publication_date:{since}"
+        async with session.get(f"{self.openalex_base_url}/works", params=params, timeout=self.source_timeout) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+            return [openalex_record(it) for it in data.get("results", [])]
+
+    async def _search_crossref(self, session: aiohttp.ClientSession, topic: str, max_results: int,
+                               since: Optional[str] = None) -> List[Paper]:
+        params = {"query": topic, "rows": max_results, "sort": "issued", "order": "desc"}
+        if since:
+            params["filter"] = f"from-pub-date:{since}"
+        async with session.get(f"{self.crossref_base_url}/works", params=params, timeout=self.source_timeout) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+            items = data.get("message", {}).get("items", [])
             papers = []
-            for result in search.results():
-                papers.append({
-                    "title": result.title,
-                    "authors": [author.name for author in result.authors],
-                    "abstract": result.summary,
-                    "published_date": result.published.strftime("%Y-%m-%d"),
-                    "year": result.published.year,
-                    "arxiv_id": result.entry_id,
-                    "pdf_url": result.pdf_url,
-                    "categories": result.categories,
-                    "source": "arXiv"
-                })
+            for it in items:
+                title_list = it.get("title") or []
+                title = title_list[0] if title_list else None
+                authors = [f"{a.get('given','').strip()} {a.get('family','').strip()}".strip() for a in it.get("author", [])]
+                abstract = re.sub("<[^<]+?>", "", it.get("abstract", "")) if it.get("abstract") else ""
+                year = None
+                issued = it.get("issued", {}).get("'date-parts'", it.get("issued", {}).get("date-parts"))
+                if issued and isinstance(issued, list) and issued[0]:
+                    year = issued[0][0]
+                url = it.get("URL")
+                papers.append(Paper(
+                    title=title,
+                    authors=authors,
+                    abstract=abstract,
+                    published_date=f"{year}-01-01" if year else None,
+                    year=year,
+                    pdf_url=url,
+                    arxiv_id=url,
+                    doi=it.get("DOI"),
+                    source="Crossref"
+                ))
             return papers
-        except Exception as e:
-            print(f"arXiv search error: {e}")
-            return []
 
-    async def _search_openalex(self, session: aiohttp.ClientSession, topic: str, max_results: int) -> List[Dict[str, Any]]:
+    async def _search_semantic_scholar(self, session: aiohttp.ClientSession, topic: str, max_results: int,
+                                       since: Optional[str] = None) -> List[Paper]:
+        params = {
+            "query": topic,
+            "limit": max_results,
+            "fields": "title,abstract,authors,year,openAccessPdf,url,externalIds"
+        }
+        if since:
+            params["publicationDateOrYear"] = f"{since}:"
+        async with session.get(f"{self.semantic_scholar_base_url}/paper/search", params=params,
+                               timeout=self.source_timeout) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+            return [semantic_scholar_record(it) for it in data.get("data", [])]
+
+    async def _fetch_source(self, source: str, session: aiohttp.ClientSession,
+                            topic: str, max_results: int, since: Optional[str] = None) -> List[Paper]:
+        """Call one searcher, hedging the request if the provider is configured for it"""
+        searcher = self.searchers[source]
+        guard = self.provider_guards[source]
+
+        def attempt():
+            if since:
+                return guard.call(lambda: searcher(session, topic, max_results, since=since))
+            return guard.call(lambda: searcher(session, topic, max_results))
+
+        started = time.monotonic()
+        if source in self.hedged_sources:
+            # Hedge at the provider's recent p95, falling back to the configured delay
+            delay = self.source_latency.quantile(source, 0.95) or self.hedge_delay
+            papers = await hedged(attempt, delay)
+        else:
+            papers = await attempt()
+        self.source_latency.record(source, time.monotonic() - started)
+        return papers
+
+    async def _cached_search(self, source: str, session: aiohttp.ClientSession,
+                             topic: str, max_results: int, since: Optional[str] = None) -> List[Paper]:
+        """Run one searcher behind the (source, normalized topic, count[, since]) cache.
+
+        Concurrent misses on one key - the same query from different reviews,
+        e.g. a batch whose topics overlap - share a single upstream request.
+        """
+        key = [source, normalize_topic(topic), max_results] + ([since] if since else [])
+        cached = await self.search_cache.get(key)
+        if cached is not None:
+            return [Paper.from_dict(d) for d in cached]
+        return await self.search_flight.do(tuple(key), lambda: self._fetch_and_cache(key, session, topic, since))
+
+    async def _fetch_and_cache(self, key: List[Any], session: aiohttp.ClientSession, topic: str,
+                               since: Optional[str]) -> List[Paper]:
+        source, _, max_results = key[:3]
+        papers = await self._fetch_source(source, session, topic, max_results, since)
+        if papers:
+            await self.search_cache.set(key, [p.to_dict() for p in papers])
+        return papers
+
+    async def _iter_sources(self, session: aiohttp.ClientSession, topic: str, per_source: int,
+                            deadline: Optional[float] = None, since: Optional[str] = None
+                            ) -> AsyncIterator[Tuple[str, List[Paper], Dict[str, Any]]]:
+        """Yield (source, papers, status) for each provider as soon as it answers.
+
+        Providers still running when the deadline (seconds) expires are
+        cancelled and reported as "late" with no papers; providers whose
+        breaker is open or whose rate budget is spent are reported as "skipped".
+        """
+        started = time.monotonic()
+        deadline_at = started + (self.search_deadline if deadline is None else deadline)
+        tasks = {
+            asyncio.ensure_future(self._cached_search(source, session, topic, per_source, since)): source
+            for source in self.searchers
+        }
+        pending = set(tasks)
         try:
-            params = {
-                "search": topic,
-                "per_page": max_results,
-                "sort": "publication_year:desc"
-            }
-            async with session.get("https://api.openalex.org/works", params=params, timeout=20) as resp:
-                if resp.status != 200:
-                    return []
-                data = await resp.json()
-                items = data.get("results", [])
-                papers = []
-                for it in items:
-                    title = it.get("title")
-                    abstract = it.get("abstract") or (it.get("abstract_inverted_index") and " ".join(it.get("abstract_inverted_index").keys())) or ""
-                    authors = [a.get("author", {}).get("display_name") for a in it.get("authorships", []) if a.get("author")]
-                    primary_location = it.get("primary_location") or {}
-                    pdf_url = (primary_location.get("source") or {}).get("host_page_url") or primary_location.get("pdf_url")
-                    year = it.get("publication_year")
-                    date_str = f"{year}-01-01" if year else None
-                    url = it.get("id")
-                    papers.append({
-                        "title": title,
-                        "authors": authors,
-                        "abstract": abstract or "",
-                        "published_date": date_str,
-                        "year": year,
-                        "pdf_url": pdf_url or url,
-                        "arxiv_id": url,
-                        "categories": [],
-                        "source": "OpenAlex"
-                    })
-                return papers
-        except Exception as e:
-            print(f"OpenAlex search error: {e}")
-            return []
+            while pending:
+                remaining = deadline_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    source = tasks[task]
+                    elapsed = time.monotonic() - started
+                    status = {"elapsed_ms": round(elapsed * 1000)}
+                    if isinstance(task.exception(), ProviderUnavailable):
+                        status = {"status": "skipped", "count": 0, "error": str(task.exception()), **status}
+                        papers = []
+                    elif task.exception() is not None:
+                        print(f"{source} search error: {task.exception()}")
+                        status = {"status": "failed", "count": 0, "error": str(task.exception()), **status}
+                        papers = []
+                    else:
+                        papers = task.result()
+                        status = {"status": "ok" if papers else "empty", "count": len(papers), **status}
+                    self._record_source(source, status, elapsed)
+                    yield source, papers, status
+            for task in pending:
+                task.cancel()
+                elapsed = time.monotonic() - started
+                status = {"status": "late", "count": 0, "elapsed_ms": round(elapsed * 1000)}
+                self._record_source(tasks[task], status, elapsed)
+                yield tasks[task], [], status
+            pending = set()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _iter_candidates(self, session: aiohttp.ClientSession, topic: str, max_results: int,
+                               deadline: Optional[float] = None, since: Optional[str] = None
+                               ) -> AsyncIterator[Tuple[str, List[Paper], Dict[str, Any]]]:
+        """Like _iter_sources, but answer from the local corpus first.
+
+        Yields ("local", papers, status) first. When the corpus has at least
+        max_results matches and the topic was fetched within CORPUS_MAX_AGE,
+        the remote providers are skipped; otherwise they are queried as usual
+        and their results are added to the corpus in the background. Searches
+        limited by `since` go straight to the providers (the corpus has no
+        publication-date index) and don't count as a fetch of the topic.
+        """
+        if self.corpus is not None and self.corpus.enabled and not since:
+            started = time.monotonic()
+            local, fetched_at = await asyncio.gather(
+                asyncio.to_thread(self.corpus.search, topic, int(max_results * self.overfetch)),
+                asyncio.to_thread(self.corpus.last_fetch, topic),
+            )
+            elapsed = time.monotonic() - started
+            fresh = fetched_at is not None and time.time() - fetched_at < self.corpus_max_age
+            complete = fresh and len(local) >= max_results
+            status = {"status": "ok" if local else "empty", "count": len(local),
+                      "elapsed_ms": round(elapsed * 1000), "fresh": fresh, "complete": complete}
+            self._record_source("local", status, elapsed)
+            yield "local", local, status
+            if complete:
+                return
+
+        remote = []
+        any_ok = False
+        async for source, papers, status in self._iter_sources(session, topic, self._per_source(max_results),
+                                                               deadline, since):
+            remote.extend(papers)
+            any_ok = any_ok or status["status"] in ("ok", "empty")
+            yield source, papers, status
+        if self.corpus is not None and self.corpus.enabled and any_ok:
+            if since:
+                self._spawn(asyncio.to_thread(self.corpus.upsert, remote))
+            else:
+                self._spawn(self._ingest(topic, remote))
+
+    async def _ingest(self, topic: str, papers: List[Paper]) -> None:
+        await asyncio.to_thread(self.corpus.upsert, papers)
+        await asyncio.to_thread(self.corpus.record_fetch, topic, len(papers))
+
+    def _spawn(self, coro) -> None:
+        """Run coro in the background, holding a reference so it isn't garbage collected mid-flight"""
+        task = asyncio.ensure_future(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
 
-    async def _search_crossref(self, session: aiohttp.ClientSession, topic: str, max_results: int) -> List[Dict[str, Any]]:
+    def _record_source(self, source: str, status: Dict[str, Any], elapsed: float) -> None:
+        SOURCE_SECONDS.observe(elapsed, source=source, status=status["status"])
+        SOURCE_RESULTS.inc(status["count"], source=source)
+        if status["status"] in ("failed", "skipped", "late"):
+            SOURCE_ERRORS.inc(source=source, status=status["status"])
+        record_timing(f"source_{source}", elapsed)
+
+    def _per_source(self, max_results: int) -> int:
+        """Results to request from each provider, over-fetching so ranking has candidates to choose from"""
+        return min(100, max(5, int(max_results * self.overfetch / 3)))
+
+    def _merge_results(self, results: List[List[Paper]], max_results: int,
+                       topic: str, objectives: str = "") -> List[Paper]:
+        """Combine per-source results into one deduplicated list, most relevant first"""
+        combined: List[Paper] = []
+        for r in results:
+            combined.extend(r)
+        with timed("dedup"):
+            combined = dedupe_papers(combined)
+        with timed("rank"):
+            combined = rank_papers(combined, topic, objectives)
+        return combined[:max_results]
+
+    async def _expand_citations(self, session: aiohttp.ClientSession, results: List[List[Paper]],
+                                max_results: int, topic: str, objectives: str = ""
+                                ) -> Tuple[List[Paper], Dict[str, Any]]:
+        """Citation neighbours of the current top-ranked results, with the expansion status"""
+        started = time.monotonic()
+        seeds = self._merge_results(results, max_results, topic, objectives)
         try:
-            params = {"query": topic, "rows": max_results, "sort": "issued", "order": "desc"}
-            async with session.get("https://api.crossref.org/works", params=params, timeout=20) as resp:
-                if resp.status != 200:
-                    return []
-                data = await resp.json()
-                items = data.get("message", {}).get("items", [])
-                papers = []
-                for it in items:
-                    title_list = it.get("title") or []
-                    title = title_list[0] if title_list else None
-                    authors = [f"{a.get('given','').strip()} {a.get('family','').strip()}".strip() for a in it.get("author", [])]
-                    abstract = re.sub("<[^<]+?>", "", it.get("abstract", "")) if it.get("abstract") else ""
-                    year = None
-                    issued = it.get("issued", {}).get("'date-parts'", it.get("issued", {}).get("date-parts"))
-                    if issued and isinstance(issued, list) and issued[0]:
-                        year = issued[0][0]
-                    url = it.get("URL")
-                    papers.append({
-                        "title": title,
-                        "authors": authors,
-                        "abstract": abstract,
-                        "published_date": f"{year}-01-01" if year else None,
-                        "year": year,
-                        "pdf_url": url,
-                        "arxiv_id": url,
-                        "categories": [],
-                        "source": "Crossref"
-                    })
-                return papers
+            with timed("citation_expansion"):
+                papers, status = await self.citation_expander.expand(session, seeds, topic, objectives)
         except Exception as e:
-            print(f"Crossref search error: {e}")
-            return []
+            print(f"Citation expansion error: {e}")
+            return [], {"status": "failed", "count": 0, "error": str(e),
+                        "elapsed_ms": round((time.monotonic() - started) * 1000)}
+        if papers and self.corpus is not None and self.corpus.enabled:
+            self._spawn(asyncio.to_thread(self.corpus.upsert, papers))
+        return papers, status
 
-    async def _search_semantic_scholar(self, session: aiohttp.ClientSession, topic: str, max_results: int) -> List[Dict[str, Any]]:
+    async def _ingest_full_text(self, papers: List[Paper]) -> Dict[str, Any]:
+        """Attach full-text sections to the top-ranked papers, with the ingestion status"""
+        started = time.monotonic()
         try:
-            params = {
-                "query": topic,
-                "limit": max_results,
-                "fields": "title,abstract,authors,year,openAccessPdf,url"
-            }
-            async with session.get("https://api.semanticscholar.org/graph/v1/paper/search", params=params, timeout=20) as resp:
-                if resp.status != 200:
-                    return []
-                data = await resp.json()
-                items = data.get("data", [])
-                papers = []
-                for it in items:
-                    title = it.get("title")
-                    authors = [a.get("name") for a in it.get("authors", [])]
-                    abstract = it.get("abstract") or ""
-                    year = it.get("year")
-                    pdf = (it.get("openAccessPdf") or {}).get("url")
-                    url = it.get("url")
-                    papers.append({
-                        "title": title,
-                        "authors": authors,
-                        "abstract": abstract,
-                        "published_date": f"{year}-01-01" if year else None,
-                        "year": year,
-                        "pdf_url": pdf or url,
-                        "arxiv_id": url,
-                        "categories": [],
-                        "source": "Semantic Scholar"
-                    })
-                return papers
+            with timed("full_text"):
+                async with self._session_scope() as session:
+                    return await self.full_text.enrich(session, papers)
         except Exception as e:
-            print(f"Semantic Scholar search error: {e}")
-            return []
-
-    def _dedupe_by_title(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        seen = set()
-        deduped = []
-        for p in items:
-            title_key = (p.get("title") or "").strip().lower()
-            if not title_key or title_key in seen:
-                continue
-            seen.add(title_key)
-            deduped.append(p)
-        return deduped
+            print(f"Full-text ingestion error: {e}")
+            return {"status": "failed", "count": 0, "error": str(e),
+                    "elapsed_ms": round((time.monotonic() - started) * 1000)}
 
-    async def search_literature(self, topic: str, max_results: int = 20) -> List[Dict]:
-        """Search multiple platforms for relevant academic literature"""
+    async def search_literature_with_status(self, topic: str, max_results: int = 20,
+                                            deadline: Optional[float] = None, objectives: str = "",
+                                            expand_citations: bool = False, since: Optional[str] = None,
+                                            exclude: Optional[set] = None, full_text: bool = False
+                                            ) -> Tuple[List[Paper], Dict[str, Dict[str, Any]]]:
+        """Search all platforms within the deadline; return ranked papers plus per-source status.
+
+        With expand_citations, references and citations of the top results
+        join the candidate pool before the final dedup and ranking; `since`
+        (YYYY-MM-DD) limits the providers to papers published from that date,
+        and papers whose paper_key is in `exclude` are dropped before ranking.
+        With full_text, the top results get their open-access PDF sections.
+        """
         try:
-            per_source = max(5, max_results // 3)
-            async with aiohttp.ClientSession() as session:
-                tasks = [
-                    self._search_arxiv(topic, per_source),
-                    self._search_openalex(session, topic, per_source),
-                    self._search_crossref(session, topic, per_source),
-                    self._search_semantic_scholar(session, topic, per_source)
-                ]
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            combined: List[Dict[str, Any]] = []
-            for r in results:
-                if isinstance(r, list):
-                    combined.extend(r)
-            combined = self._dedupe_by_title(combined)
-            combined.sort(key=lambda x: (x.get("year") or 0), reverse=True)
-            return combined[:max_results]
+            results = []
+            source_status: Dict[str, Dict[str, Any]] = {}
+            with timed("search"):
+                async with self._session_scope() as session:
+                    async for source, papers, status in self._iter_candidates(session, topic, max_results,
+                                                                              deadline, since):
+                        results.append(papers)
+                        source_status[source] = status
+                    if expand_citations:
+                        papers, source_status["citations"] = await self._expand_citations(
+                            session, results, max_results, topic, objectives
+                        )
+                        results.append(papers)
+            if exclude:
+                results = [[p for p in papers if paper_key(p) not in exclude] for papers in results]
+            papers = self._merge_results(results, max_results, topic, objectives)
+            if full_text and papers:
+                source_status["full_text"] = await self._ingest_full_text(papers)
+            return papers, source_status
         except Exception as e:
             print(f"Error searching literature: {e}")
-            return []
-
-    # -------------------- Analysis & Generation --------------------
-    async def analyze_papers(self, papers: List[Dict], topic: str, objectives: str = "") -> str:
-        """Analyze papers and generate a detailed, multi-paragraph literature review using AI"""
-        try:
-            papers_text = ""
-            for i, paper in enumerate(papers[:10], 1):
-                papers_text += f"""
-Paper {i} ({paper.get('source','Unknown')}):
-Title: {paper.get('title')}
-Authors: {', '.join(paper.get('authors', []))}
-Abstract: {paper.get('abstract')}
-Published: {paper.get('published_date')}
-Categories: {', '.join(paper.get('categories', []))}
-URL: {paper.get('pdf_url')}
+            return [], {}
 
-"""
+    async def search_literature(self, topic: str, max_results: int = 20,
+                                deadline: Optional[float] = None, objectives: str = "") -> List[Paper]:
+        """Search multiple platforms for relevant academic literature"""
+        papers, _ = await self.search_literature_with_status(topic, max_results, deadline, objectives)
+        return papers
 
-            objectives_block = f"\nResearch Objectives to address:\n{objectives}\n" if objectives else ""
-            analysis_prompt = f"""
+    # -------------------- Analysis & Generation --------------------
+    def _review_prompt(self, topic: str, objectives: str, material_intro: str, material: str) -> str:
+        objectives_block = f"\nResearch Objectives to address:\n{objectives}\n" if objectives else ""
+        return f"""
 Topic: {topic}
 {objectives_block}
-Based on the following academic papers collected from multiple platforms (arXiv, OpenAlex, Crossref, Semantic Scholar), generate a comprehensive and detailed literature review that explicitly addresses the objectives where provided.
+{material_intro}
 
-{papers_text}
+{material}
 
 Please structure the literature review with the following sections, and for EACH section write around three substantial paragraphs of analysis and synthesis (not bullet points):
 1. Introduction and Background
@@ -255,87 +604,267 @@ Please structure the literature review with the following sections, and for EACH
 
 Use an academic tone with appropriate in-text citations (Author, Year). Ensure each paragraph is well-developed, with clear topic sentences, supporting evidence, and explanatory commentary."""
 
-            messages = [
-                SystemMessage(content=self.system_prompt),
-                HumanMessage(content=analysis_prompt)
-            ]
+    def _build_analysis_messages(self, entries: List[str], topic: str, objectives: str = "") -> List[Any]:
+        """Assemble the system and user messages for a single-pass literature review prompt"""
+        papers_text = "".join(entries)
+        analysis_prompt = self._review_prompt(
+            topic, objectives,
+            "Based on the following academic papers collected from multiple platforms (arXiv, OpenAlex, Crossref, "
+            "Semantic Scholar), generate a comprehensive and detailed literature review that explicitly addresses "
+            "the objectives where provided.",
+            papers_text
+        )
+        return [
+            system_message(self.system_prompt),
+            human_message(analysis_prompt)
+        ]
+
+    # -------------------- LLM Calls --------------------
+    def _llm_cache_key(self, messages: List[Any]) -> str:
+        system = "".join(m.content for m in messages if m.type == "system")
+        prompt = "".join(m.content for m in messages if m.type != "system")
+        return fingerprint(self.model_name, system, prompt)
+
+    async def _invoke_llm(self, messages: List[Any], bypass_cache: bool = False, kind: str = "review") -> str:
+        """Complete messages through the response cache; bypass_cache forces a fresh call (and refreshes the entry)"""
+        key = self._llm_cache_key(messages)
+        if not bypass_cache:
+            cached = await self.llm_cache.get(key)
+            if cached is not None:
+                return cached
+        async with self.llm_scheduler.slot():
+            started = time.perf_counter()
             response = await self.llm.ainvoke(messages)
-            return response.content
+            LLM_SECONDS.observe(time.perf_counter() - started, kind=kind)
+        record_token_usage(response)
+        await self.llm_cache.set(key, response.content)
+        return response.content
+
+    async def _stream_llm(self, messages: List[Any], bypass_cache: bool = False) -> AsyncIterator[str]:
+        """Stream completion text; a cache hit is yielded as one chunk"""
+        key = self._llm_cache_key(messages)
+        if not bypass_cache:
+            cached = await self.llm_cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        chunks = []
+        async with self.llm_scheduler.slot():
+            started = time.perf_counter()
+            async for chunk in self.llm.astream(messages):
+                record_token_usage(chunk)
+                if chunk.content:
+                    if not chunks:
+                        ttft = time.perf_counter() - started
+                        LLM_TTFT_SECONDS.observe(ttft)
+                        record_timing("llm_ttft", ttft)
+                    chunks.append(chunk.content)
+                    yield chunk.content
+            LLM_SECONDS.observe(time.perf_counter() - started, kind="stream")
+        await self.llm_cache.set(key, "".join(chunks))
+
+    # -------------------- Map-Reduce Analysis --------------------
+    def _batch_entries(self, entries: List[str]) -> List[List[str]]:
+        """Split rendered papers, in rank order, into batches that fit the map token budget"""
+        batches: List[List[str]] = []
+        current: List[str] = []
+        used = 0
+        for entry in entries:
+            tokens = estimate_tokens(entry)
+            if current and used + tokens > self.map_batch_tokens:
+                batches.append(current)
+                current, used = [], 0
+            current.append(entry)
+            used += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _summarize_batch(self, batch: List[str], topic: str, objectives: str,
+                               semaphore: asyncio.Semaphore, bypass_cache: bool = False) -> str:
+        """Map step: condense one batch of papers into a cited partial synthesis"""
+        papers_text = "".join(batch)
+        objectives_block = f"\nResearch Objectives:\n{objectives}\n" if objectives else ""
+        prompt = f"""
+Topic: {topic}
+{objectives_block}
+The papers below are one batch of the sources for a literature review on this topic.
+Write dense notes (at most 400 words) that capture, for this batch only:
+- the main themes and how the papers relate to each other
+- methods and data used
+- key findings, including any that bear on the objectives
+- limitations and open questions
+
+Cite every claim with (Author, Year) so the citations can be carried into the final review.
+
+{papers_text}"""
+        messages = [
+            system_message("You are a research assistant condensing academic papers into precise, well-cited notes "
+                           "for a literature review."),
+            human_message(prompt)
+        ]
+        async with semaphore:
+            return await self._invoke_llm(messages, bypass_cache, kind="map")
+
+    async def _prepare_review_messages(self, papers: List[Paper], topic: str, objectives: str = "",
+                                       bypass_cache: bool = False) -> Tuple[List[Any], Dict[str, Any]]:
+        """Messages for the final review call plus prompt-size stats.
+
+        Papers are rendered to fit the model's prompt budget; when they still
+        don't fit one prompt they are condensed with a map step first.
+        """
+        with timed("prompt_build"):
+            entries, prompt_stats = self.prompt_builder.render(papers, topic, objectives)
+        if prompt_stats["material_tokens"] <= self.prompt_builder.budget:
+            messages = self._build_analysis_messages(entries, topic, objectives)
+            prompt_stats.update(mode="single", batches=1, prompt_tokens=self._messages_tokens(messages))
+            return messages, prompt_stats
+
+        batches = self._batch_entries(entries)
+
+        semaphore = asyncio.Semaphore(self.map_concurrency)
+        with timed("llm_map"):
+            partials = await asyncio.gather(
+                *[self._summarize_batch(batch, topic, objectives, semaphore, bypass_cache) for batch in batches],
+                return_exceptions=True
+            )
+        notes = []
+        for i, partial in enumerate(partials, 1):
+            if isinstance(partial, SchedulerBusy):
+                # A review missing whole batches is worse than a fast retry
+                raise partial
+            if isinstance(partial, Exception):
+                print(f"Error summarizing paper batch {i}: {partial}")
+                continue
+            notes.append(f"Notes on batch {i} of {len(batches)}:\n{partial}\n")
+        if not notes:
+            raise partials[0]
+
+        reduce_prompt = self._review_prompt(
+            topic, objectives,
+            f"The following notes each synthesize one batch of the {len(papers)} academic papers collected from "
+            "multiple platforms (arXiv, OpenAlex, Crossref, Semantic Scholar). Combine them into a single "
+            "comprehensive and detailed literature review that explicitly addresses the objectives where provided, "
+            "drawing connections across batches and keeping the citations from the notes.",
+            "\n".join(notes)
+        )
+        messages = [
+            system_message(self.system_prompt),
+            human_message(reduce_prompt)
+        ]
+        prompt_stats.update(mode="map_reduce", batches=len(batches), prompt_tokens=self._messages_tokens(messages))
+        return messages, prompt_stats
+
+    def _messages_tokens(self, messages: List[Any]) -> int:
+        return sum(estimate_tokens(m.content) for m in messages)
+
+    async def _analyze(self, papers: List[Paper], topic: str, objectives: str = "",
+                       bypass_cache: bool = False) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Review text and prompt stats; on failure the text carries the error and stats are None"""
+        try:
+            messages, prompt_stats = await self._prepare_review_messages(papers, topic, objectives, bypass_cache)
+            with timed("llm"):
+                review = await self._invoke_llm(messages, bypass_cache)
+            return review, prompt_stats
+        except SchedulerBusy:
+            raise
         except Exception as e:
             print(f"Error analyzing papers: {e}")
-            return f"Error generating literature review: {str(e)}"
+            return f"Error generating literature review: {str(e)}", None
+
+    async def analyze_papers(self, papers: List[Paper], topic: str, objectives: str = "",
+                             bypass_cache: bool = False) -> str:
+        """Analyze papers and generate a detailed, multi-paragraph literature review using AI"""
+        review, _ = await self._analyze(papers, topic, objectives, bypass_cache)
+        return review
+
+    def _format_sources(self, papers: List[Paper]) -> List[Dict[str, Any]]:
+        """Shape paper records for the API response"""
+        return [paper.source_entry() for paper in papers]
+
+    def _build_references(self, papers: List[Paper]) -> List[str]:
+        """APA 7 style reference list; each record formats (and keeps) its own line"""
+        return [paper.apa_reference() for paper in papers]
+
+    def _no_results_message(self, topic: str) -> str:
+        return f"No relevant literature found for the topic: {topic}. Please try a different search term or broader topic."
 
-    async def generate_review(self, topic: str, field: str = "general", 
-                            max_sources: int = 20, review_length: str = "comprehensive", objectives: str = "") -> Dict[str, Any]:
-        """Generate comprehensive literature review"""
+    async def generate_review(self, topic: str, field: str = "general",
+                              max_sources: int = 20, review_length: str = "comprehensive", objectives: str = "",
+                              search_deadline: Optional[float] = None, bypass_cache: bool = False,
+                              plan: str = "free", expand_citations: bool = False,
+                              full_text: bool = False) -> Dict[str, Any]:
+        """Generate comprehensive literature review, coalescing identical concurrent requests.
+
+        Raises SchedulerBusy when the LLM scheduler sheds the request.
+        """
+        plan = normalize_plan(plan)
+        # Plan is part of the key so a paying request never waits in a free request's queue slot
+        key = (normalize_topic(topic), (objectives or "").strip(), max_sources, field, review_length,
+               search_deadline, bypass_cache, plan, expand_citations, full_text)
+        result = await self.review_flight.do(
+            key,
+            lambda: self._generate_review(topic, field, max_sources, review_length, objectives,
+                                          search_deadline, bypass_cache, plan, expand_citations, full_text)
+        )
+        # Every caller gets its own top-level dict
+        return dict(result)
+
+    async def _generate_review(self, topic: str, field: str, max_sources: int, review_length: str,
+                               objectives: str, search_deadline: Optional[float],
+                               bypass_cache: bool = False, plan: str = "free",
+                               expand_citations: bool = False, full_text: bool = False) -> Dict[str, Any]:
+        # Runs in its own task (single-flight), so these only tag this review
+        current_plan.set(plan)
+        timings: Dict[str, float] = {}
+        current_timings.set(timings)
         try:
-            papers = await self.search_literature(topic, max_results=max_sources)
-            if not papers:
-                return {
-                    "review": f"No relevant literature found for the topic: {topic}. Please try a different search term or broader topic.",
-                    "sources": [],
-                    "topic": topic,
-                    "field": field,
-                    "total_sources": 0
-                }
-
-            review = await self.analyze_papers(papers, topic, objectives)
-
-            formatted_sources = []
-            for paper in papers:
-                abstract = paper.get("abstract") or ""
-                formatted_sources.append({
-                    "title": paper.get("title"),
-                    "authors": paper.get("authors", []),
-                    "year": str(paper.get("year")) if paper.get("year") else None,
-                    "abstract": abstract[:200] + "..." if len(abstract) > 200 else abstract,
-                    "url": paper.get("pdf_url"),
-                    "arxiv_id": paper.get("arxiv_id"),
-                    "source": paper.get("source")
-                })
-
-            # Build a simple APA 7 style reference list from available metadata
-            apa_lines: List[str] = []
-            for s in formatted_sources:
-                authors = s.get("authors") or []
-                year = s.get("year") or "n.d."
-                title = (s.get("title") or "Untitled").strip().rstrip('.')
-                url = s.get("url") or ""
-
-                # Format authors: "Surname, Initial." joined by ", " and " & " for last
-                def format_author(name: str) -> str:
-                    parts = name.split()
-                    if not parts:
-                        return name
-                    surname = parts[-1]
-                    initials = ''.join([p[0].upper() + '.' for p in parts[:-1] if p])
-                    return f"{surname}, {initials}" if initials else surname
-
-                if authors:
-                    formatted_authors = [format_author(a) for a in authors]
-                    if len(formatted_authors) == 1:
-                        author_str = formatted_authors[0]
-                    elif len(formatted_authors) == 2:
-                        author_str = f"{formatted_authors[0]} & {formatted_authors[1]}"
-                    else:
-                        author_str = ", ".join(formatted_authors[:-1]) + f", & {formatted_authors[-1]}"
-                else:
-                    author_str = "Author"
+            with timed("total"):
+                papers, source_status = await self.search_literature_with_status(
+                    topic, max_results=max_sources, deadline=search_deadline, objectives=objectives,
+                    expand_citations=expand_citations, full_text=full_text
+                )
+                if not papers:
+                    REVIEWS.inc(mode="json", outcome="no_results")
+                    return {
+                        "review": self._no_results_message(topic),
+                        "sources": [],
+                        "topic": topic,
+                        "field": field,
+                        "total_sources": 0,
+                        "source_status": source_status,
+                        "timings": timings
+                    }
 
-                apa_line = f"{author_str} ({year}). {title}. {url}".strip()
-                apa_lines.append(apa_line)
+                body, prompt_stats = await self._analyze(papers, topic, objectives, bypass_cache)
 
-            if apa_lines:
-                review = f"{review}\n\nReferences (APA)\n" + "\n".join([f"- {line}" for line in apa_lines])
+                with timed("references"):
+                    review, formatted_sources = self._with_references(body, papers)
 
+            review_id = None
+            if prompt_stats is not None:
+                review_id = await self._store_review(
+                    {"topic": topic, "field": field, "max_sources": max_sources, "review_length": review_length,
+                     "objectives": objectives, "expand_citations": expand_citations, "full_text": full_text},
+                    body, papers
+                )
+            REVIEWS.inc(mode="json", outcome="ok" if prompt_stats is not None else "error")
             return {
+                "review_id": review_id,
                 "review": review,
                 "sources": formatted_sources,
                 "topic": topic,
                 "field": field,
-                "total_sources": len(papers)
+                "total_sources": len(papers),
+                "source_status": source_status,
+                "prompt_stats": prompt_stats,
+                "timings": timings
             }
+        except SchedulerBusy:
+            REVIEWS.inc(mode="json", outcome="busy")
+            raise
         except Exception as e:
+            REVIEWS.inc(mode="json", outcome="error")
             print(f"Error in generate_review: {e}")
             return {
                 "review": f"An error occurred while generating the literature review: {str(e)}",
@@ -343,7 +872,213 @@ Use an academic tone with appropriate in-text citations (Author, Year). Ensure e
                 "error": str(e)
             }
 
-    async def get_review_summary(self, topic: str) -> str:
+    def _with_references(self, body: str, papers: List[Paper]) -> Tuple[str, List[Dict[str, Any]]]:
+        """Review text with the APA reference list appended, and the formatted sources"""
+        formatted_sources = self._format_sources(papers)
+        apa_lines = self._build_references(papers)
+        if apa_lines:
+            body = f"{body}\n\nReferences (APA)\n" + "\n".join([f"- {line}" for line in apa_lines])
+        return body, formatted_sources
+
+    async def _store_review(self, params: Dict[str, Any], body: str, papers: List[Paper]) -> Optional[str]:
+        """Save a finished review for later refreshes; returns its ID, or None when storage is off or fails"""
+        if self.review_store is None:
+            return None
+        try:
+            return await asyncio.to_thread(self.review_store.create, params, body, papers)
+        except Exception as e:
+            print(f"Error storing review: {e}")
+            return None
+
+    def _update_prompt(self, topic: str, objectives: str, existing: str, material: str) -> str:
+        objectives_block = f"\nResearch Objectives to address:\n{objectives}\n" if objectives else ""
+        return f"""
+Topic: {topic}
+{objectives_block}
+Below is an excerpt of an existing literature review on this topic, followed by papers published since it was written.
+
+Existing review (excerpt):
+{existing}
+
+New papers:
+{material}
+
+Write an update section for the review covering ONLY the new papers, in two or three substantial paragraphs
+(not bullet points): what they contribute, which findings of the existing review they confirm, extend or
+challenge, and how they change the research gaps. Do not repeat or summarize the existing review.
+Use an academic tone with in-text citations (Author, Year)."""
+
+    async def refresh_review(self, review_id: str, search_deadline: Optional[float] = None,
+                             bypass_cache: bool = False, plan: str = "free") -> Optional[Dict[str, Any]]:
+        """Bring a stored review up to date with papers published since it was last searched.
+
+        Returns None for an unknown review ID; raises SchedulerBusy when the
+        LLM scheduler sheds the update. Concurrent refreshes of one review share a run.
+        """
+        plan = normalize_plan(plan)
+        result = await self.review_flight.do(
+            ("refresh", review_id, search_deadline, bypass_cache, plan),
+            lambda: self._refresh_review(review_id, search_deadline, bypass_cache, plan)
+        )
+        return dict(result) if result is not None else None
+
+    async def _refresh_review(self, review_id: str, search_deadline: Optional[float],
+                              bypass_cache: bool, plan: str) -> Optional[Dict[str, Any]]:
+        current_plan.set(plan)
+        timings: Dict[str, float] = {}
+        current_timings.set(timings)
+        stored = await asyncio.to_thread(self.review_store.get, review_id) if self.review_store else None
+        if stored is None:
+            return None
+        params = stored["params"]
+        topic, objectives = params["topic"], params.get("objectives") or ""
+
+        def result(body: str, papers: List[Paper], refresh: Dict[str, Any],
+                   source_status: Optional[Dict[str, Any]] = None, prompt_stats: Optional[Dict[str, Any]] = None):
+            review, formatted_sources = self._with_references(body, papers)
+            return {
+                "review_id": review_id,
+                "review": review,
+                "sources": formatted_sources,
+                "topic": topic,
+                "field": params.get("field", "general"),
+                "total_sources": len(papers),
+                "source_status": source_status or {},
+                "prompt_stats": prompt_stats,
+                "refresh": refresh,
+                "timings": timings
+            }
+
+        try:
+            with timed("total"):
+                searched_at = time.time()
+                refresh = {"since": datetime.utcfromtimestamp(stored["searched_at"]).strftime("%Y-%m-%d"),
+                           "new_sources": 0, "revision": stored["revision"]}
+                if searched_at - stored["searched_at"] < self.refresh_min_interval:
+                    REVIEWS.inc(mode="refresh", outcome="unchanged")
+                    return result(stored["body"], stored["papers"], {"status": "unchanged", "searched": False, **refresh})
+
+                # The since date is inclusive, so papers from the last run's day come back and are diffed away
+                known = {paper_key(p) for p in stored["papers"]}
+                new_papers, source_status = await self.search_literature_with_status(
+                    topic, max_results=params.get("max_sources", 20), deadline=search_deadline,
+                    objectives=objectives, expand_citations=params.get("expand_citations", False),
+                    since=refresh["since"], exclude=known, full_text=params.get("full_text", False)
+                )
+                if not new_papers:
+                    # Only a search that reached some provider moves the window forward
+                    if any(s.get("status") in ("ok", "empty") for s in source_status.values()):
+                        await asyncio.to_thread(self.review_store.touch, review_id, searched_at)
+                    REVIEWS.inc(mode="refresh", outcome="unchanged")
+                    return result(stored["body"], stored["papers"], {"status": "unchanged", "searched": True, **refresh},
+                                  source_status)
+
+                update, prompt_stats = await self._analyze_update(stored["body"], new_papers, topic,
+                                                                  objectives, bypass_cache)
+                body = f"{stored['body']}\n\nUpdate ({datetime.utcfromtimestamp(searched_at):%Y-%m-%d}): " \
+                       f"{len(new_papers)} new sources\n{update}"
+                papers = stored["papers"] + new_papers
+                await asyncio.to_thread(self.review_store.update, review_id, body, papers, searched_at)
+            REVIEWS.inc(mode="refresh", outcome="ok")
+            refresh.update(status="updated", searched=True, new_sources=len(new_papers),
+                           revision=stored["revision"] + 1)
+            return result(body, papers, refresh, source_status, prompt_stats)
+        except SchedulerBusy:
+            REVIEWS.inc(mode="refresh", outcome="busy")
+            raise
+        except Exception as e:
+            REVIEWS.inc(mode="refresh", outcome="error")
+            print(f"Error in refresh_review: {e}")
+            return {
+                "review_id": review_id,
+                "review": f"An error occurred while refreshing the literature review: {str(e)}",
+                "sources": [],
+                "error": str(e)
+            }
+
+    async def _analyze_update(self, existing: str, papers: List[Paper], topic: str, objectives: str,
+                              bypass_cache: bool) -> Tuple[str, Dict[str, Any]]:
+        """Update section on new papers only, with the prompt stats; raises on LLM failure"""
+        with timed("prompt_build"):
+            entries, prompt_stats = self.prompt_builder.render(papers, topic, objectives)
+            excerpt = existing
+            if estimate_tokens(excerpt) > self.refresh_context_tokens:
+                # The opening sections carry the framing the update is written against
+                excerpt = existing[:self.refresh_context_tokens * 4].rsplit(" ", 1)[0] + " …"
+            messages = [
+                system_message(self.system_prompt),
+                human_message(self._update_prompt(topic, objectives, excerpt, "".join(entries)))
+            ]
+        prompt_stats.update(mode="update", prompt_tokens=self._messages_tokens(messages))
+        with timed("llm"):
+            update = await self._invoke_llm(messages, bypass_cache, kind="update")
+        return update, prompt_stats
+
+    async def stream_review(self, topic: str, field: str = "general", max_sources: int = 20,
+                            review_length: str = "comprehensive", objectives: str = "",
+                            search_deadline: Optional[float] = None,
+                            bypass_cache: bool = False,
+                            plan: str = "free",
+                            expand_citations: bool = False,
+                            full_text: bool = False) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Generate a review as (event, data) pairs: sources per provider, LLM tokens, then references"""
+        current_plan.set(normalize_plan(plan))
+        timings: Dict[str, float] = {}
+        current_timings.set(timings)
+        started = time.perf_counter()
+        yield "start", {"topic": topic, "field": field, "providers": list(self.searchers)}
+        try:
+            results = []
+            with timed("search"):
+                async with self._session_scope() as session:
+                    async for source, papers, status in self._iter_candidates(session, topic, max_sources, search_deadline):
+                        results.append(papers)
+                        yield "sources", {"provider": source, "status": status, "papers": self._format_sources(papers)}
+                    if expand_citations:
+                        papers, status = await self._expand_citations(session, results, max_sources, topic, objectives)
+                        results.append(papers)
+                        yield "sources", {"provider": "citations", "status": status, "papers": self._format_sources(papers)}
+            papers = self._merge_results(results, max_sources, topic, objectives)
+            if not papers:
+                REVIEWS.inc(mode="stream", outcome="no_results")
+                yield "token", {"text": self._no_results_message(topic)}
+                yield "done", {"total_sources": 0, "timings": timings}
+                return
+            if full_text:
+                yield "full_text", await self._ingest_full_text(papers)
+
+            messages, prompt_stats = await self._prepare_review_messages(papers, topic, objectives, bypass_cache)
+            yield "prompt", prompt_stats
+            chunks = []
+            with timed("llm"):
+                async for text in self._stream_llm(messages, bypass_cache):
+                    chunks.append(text)
+                    yield "token", {"text": text}
+
+            with timed("references"):
+                formatted_sources = self._format_sources(papers)
+                references = self._build_references(papers)
+            yield "references", {"sources": formatted_sources, "references": references}
+            review_id = await self._store_review(
+                {"topic": topic, "field": field, "max_sources": max_sources, "review_length": review_length,
+                 "objectives": objectives, "expand_citations": expand_citations, "full_text": full_text},
+                "".join(chunks), papers
+            )
+            # Measured by hand: a `with` block can't span the yields above
+            total = time.perf_counter() - started
+            STAGE_SECONDS.observe(total, stage="total")
+            record_timing("total", total)
+            REVIEWS.inc(mode="stream", outcome="ok")
+            yield "done", {"total_sources": len(papers), "review_id": review_id, "timings": timings}
+        except SchedulerBusy as e:
+            REVIEWS.inc(mode="stream", outcome="busy")
+            yield "error", {"error": str(e), "busy": True, "retry_after": e.retry_after}
+        except Exception as e:
+            REVIEWS.inc(mode="stream", outcome="error")
+            print(f"Error in stream_review: {e}")
+            yield "error", {"error": str(e)}
+
+    async def get_review_summary(self, topic: str, bypass_cache: bool = False) -> str:
         """Get a brief summary of available literature for a topic"""
         try:
             papers = await self.search_literature(topic, max_results=5)
@@ -354,15 +1089,14 @@ Topic: {topic}
 
 Based on the following recent papers, provide a brief 2-3 sentence summary of current research trends:
 
-{chr(10).join([f"- {p.get('title')} ({p.get('year')})" for p in papers])}
+{chr(10).join([f"- {p.title} ({p.year})" for p in papers])}
 
 Summary:
 """
             messages = [
-                SystemMessage(content="You are a research assistant. Provide concise summaries of academic literature."),
-                HumanMessage(content=summary_prompt)
+                system_message("You are a research assistant. Provide concise summaries of academic literature."),
+                human_message(summary_prompt)
             ]
-            response = await self.llm.ainvoke(messages)
-            return response.content
+            return await self._invoke_llm(messages, bypass_cache, kind="summary")
         except Exception as e:
             return f"Error generating summary: {str(e)}"
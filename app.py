@@ -1,25 +1,43 @@
-import uvicorn
 import dotenv
 import fastapi
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 import os
 from dotenv import load_dotenv
 from ai_agent import LiteratureReviewAgent
+from jobs import JobQueue, JobQueueFull
+from assets import StaticAssets
+from compression import CompressionMiddleware
+from payments import PaymentClient, PaymentError, PlanTokens, plan_price
+from scheduler import SchedulerBusy
+import metrics
 import asyncio
-import json
+import orjson
 from fastapi.middleware.cors import CORSMiddleware
-import requests
-import uuid
 from datetime import datetime
+from contextlib import asynccontextmanager
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="LitReview AI", description="AI-Powered Literature Review Generator")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the asset build, open the agent's and the payment client's HTTP sessions and start the review job workers"""
+    await asyncio.to_thread(static_assets.load)
+    agent = get_agent()
+    await agent.start()
+    await payment_client.start()
+    await review_jobs.start()
+    try:
+        yield
+    finally:
+        await review_jobs.stop()
+        await payment_client.close()
+        await agent.close()
+
+app = FastAPI(title="LitReview AI", description="AI-Powered Literature Review Generator", lifespan=lifespan)
 
 # CORS for local dev (VSCode Live Server, etc.)
 origins = [
@@ -38,14 +56,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="."), name="static")
+# zstd/gzip for JSON bodies (reviews can be large) and the NDJSON batch stream
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")))
+
+# Hashed, precompressed front-end assets and pre-rendered pages (see assets.py)
+static_assets = StaticAssets.from_env()
+
+# The AI agent is built on first use (normally by the lifespan handler) rather than at import,
+# so importing this module stays cheap and opens none of the agent's caches or stores
+_ai_agent: LiteratureReviewAgent | None = None
+
 
-# Templates
-templates = Jinja2Templates(directory=".")
+def get_agent() -> LiteratureReviewAgent:
+    """This worker's agent, created on first use"""
+    global _ai_agent
+    if _ai_agent is None:
+        _ai_agent = LiteratureReviewAgent()
+    return _ai_agent
 
-# Initialize AI Agent
-ai_agent = LiteratureReviewAgent()
+
+# Its own session and pool, so the payment path never competes with the searchers
+payment_client = PaymentClient.from_env()
+# Signs the plan granted by a payment; reviews take their priority from it, not from the client
+plan_tokens = PlanTokens.from_env()
 
 class ResearchTopic(BaseModel):
     topic: str
@@ -53,11 +86,90 @@ class ResearchTopic(BaseModel):
     field: str = "general"
     max_sources: int = 20
     review_length: str = "comprehensive"
+    # Seconds to wait for search providers; late ones are skipped (server default if unset)
+    search_deadline: float | None = None
+    # Skip the LLM response cache and force a fresh generation
+    bypass_cache: bool = False
+    # Plan token returned by /api/process-payment; its plan sets the request's priority for LLM capacity
+    plan_token: str | None = None
+    # Pricing plan (free, pro, enterprise), filled in by the server from plan_token; a client value is ignored
+    plan: str = "free"
+    # Also pull in references and citations of the top results (citation-graph expansion)
+    expand_citations: bool = False
+    # Also read the open-access PDFs of the top results (methods, results...) instead of abstracts alone
+    full_text: bool = False
+    # Add a per-stage timing breakdown (milliseconds) to the response
+    include_timings: bool = False
+
+
+def verified_plan(research_topic: ResearchTopic) -> ResearchTopic:
+    """Set the request's plan from its signed plan token; no token, or an invalid one, means free"""
+    research_topic.plan = plan_tokens.verify(research_topic.plan_token)
+    return research_topic
+
+
+# Longest a batch item or background job keeps retrying a busy LLM scheduler before it fails
+LLM_BUSY_MAX_WAIT = float(os.getenv("LLM_BUSY_MAX_WAIT", "300"))
+
+
+async def generate_review_when_ready(research_topic: ResearchTopic) -> dict:
+    """One review through the agent, waiting out LLM load shedding for up to LLM_BUSY_MAX_WAIT seconds"""
+    deadline = asyncio.get_running_loop().time() + LLM_BUSY_MAX_WAIT
+    while True:
+        try:
+            return await get_agent().generate_review(
+                topic=research_topic.topic,
+                field=research_topic.field,
+                max_sources=research_topic.max_sources,
+                review_length=research_topic.review_length,
+                objectives=research_topic.objectives or "",
+                search_deadline=research_topic.search_deadline,
+                bypass_cache=research_topic.bypass_cache,
+                plan=research_topic.plan,
+                expand_citations=research_topic.expand_citations,
+                full_text=research_topic.full_text
+            )
+        except SchedulerBusy as e:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                return {"review": None, "sources": [], "error": f"Service busy: {e}"}
+            await asyncio.sleep(min(e.retry_after, remaining))
+
+
+async def run_review_job(params: dict) -> dict:
+    """Job runner: one queued review through the agent"""
+    result = await generate_review_when_ready(ResearchTopic(**params))
+    if result.get("error"):
+        raise RuntimeError(result["error"])
+    return result
+
+review_jobs = JobQueue.from_env(run_review_job)
+metrics.REGISTRY.gauge(
+    "litreview_jobs", "Background review jobs in this worker", ("state",),
+    lambda: {(state,): review_jobs.stats()[state] for state in ("queued", "running")}
+)
+
+
+class BatchReviewRequest(BaseModel):
+    items: list[ResearchTopic]
+
+
+class RefreshRequest(BaseModel):
+    search_deadline: float | None = None
+    bypass_cache: bool = False
+    plan_token: str | None = None
+    include_timings: bool = False
 
 class LiteratureReviewResponse(BaseModel):
     success: bool
+    review_id: str | None = None
     review: str = None
     sources: list = None
+    source_status: dict | None = None
+    prompt_stats: dict | None = None
+    timings: dict | None = None
+    # Refresh outcome: status (updated/unchanged), since, new_sources, revision
+    refresh: dict | None = None
     error: str = None
 
 class PaymentData(BaseModel):
@@ -71,80 +183,279 @@ class PaymentData(BaseModel):
     plan: str
     price: str
     billing: str
+    # Alternative to the Idempotency-Key header
+    idempotency_key: str | None = None
 
 class PaymentResponse(BaseModel):
     success: bool
     transaction_id: str = None
     plan: str = None
+    # Send back as plan_token with review requests to get the plan's priority
+    plan_token: str | None = None
     amount: str = None
     message: str = None
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     """Serve the main landing page"""
-    return templates.TemplateResponse("index.html", {"request": request})
+    return static_assets.page_response(request, "index.html")
 
 @app.get("/generator", response_class=HTMLResponse)
 async def read_generator(request: Request):
     """Serve the generator page"""
-    return templates.TemplateResponse("generator.html", {"request": request})
+    return static_assets.page_response(request, "generator.html")
 
 @app.get("/pricing", response_class=HTMLResponse)
 async def read_pricing(request: Request):
     """Serve the pricing page"""
-    return templates.TemplateResponse("pricing.html", {"request": request})
+    return static_assets.page_response(request, "pricing.html")
+
+
+@app.get("/{page}.html", response_class=HTMLResponse, include_in_schema=False)
+async def read_page(request: Request, page: str):
+    """Serve a pre-rendered page under the name the pages link to each other by"""
+    return static_assets.page_response(request, f"{page}.html")
+
+
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def read_static(request: Request, path: str):
+    """Serve a built asset; hashed names are immutable, plain names revalidate by ETag"""
+    return static_assets.asset_response(request, path)
 
 @app.post("/api/generate-review", response_model=LiteratureReviewResponse)
 async def generate_literature_review(research_topic: ResearchTopic):
     """Generate literature review using AI agent"""
+    verified_plan(research_topic)
     try:
-        result = await ai_agent.generate_review(
+        result = await get_agent().generate_review(
             topic=research_topic.topic,
             field=research_topic.field,
             max_sources=research_topic.max_sources,
             review_length=research_topic.review_length,
-            objectives=research_topic.objectives or ""
+            objectives=research_topic.objectives or "",
+            search_deadline=research_topic.search_deadline,
+            bypass_cache=research_topic.bypass_cache,
+            plan=research_topic.plan,
+            expand_citations=research_topic.expand_citations,
+            full_text=research_topic.full_text
         )
         
-        return LiteratureReviewResponse(
+        return ORJSONResponse(_review_payload(
             success=True,
+            review_id=result.get("review_id"),
             review=result["review"],
-            sources=result["sources"]
-        )
+            sources=result["sources"],
+            source_status=result.get("source_status"),
+            prompt_stats=result.get("prompt_stats"),
+            timings=result.get("timings") if research_topic.include_timings else None
+        ))
         
+    except SchedulerBusy as e:
+        return JSONResponse(
+            status_code=503,
+            content={"success": False, "error": f"Service busy: {e}", "retry_after": e.retry_after},
+            headers={"Retry-After": str(int(e.retry_after + 0.999))}
+        )
     except Exception as e:
-        return LiteratureReviewResponse(
-            success=False,
-            error=str(e)
+        return ORJSONResponse(_review_payload(success=False, error=str(e)))
+
+
+@app.post("/api/generate-review/stream")
+async def stream_literature_review(research_topic: ResearchTopic):
+    """Stream a literature review as Server-Sent Events.
+
+    Events: ``start``, one ``sources`` per provider as it answers (and one for
+    ``citations`` when expanding the citation graph), ``full_text`` with the
+    ingestion status when full text was requested, ``prompt``
+    with the prompt-size stats, ``token`` chunks from the LLM, ``references``
+    with the final source list, then ``done`` with the stored ``review_id``
+    (or ``error``; ``busy`` and ``retry_after`` are set when the LLM
+    scheduler shed the request).
+    """
+    verified_plan(research_topic)
+
+    async def event_stream():
+        async for event, data in get_agent().stream_review(
+            topic=research_topic.topic,
+            field=research_topic.field,
+            max_sources=research_topic.max_sources,
+            review_length=research_topic.review_length,
+            objectives=research_topic.objectives or "",
+            search_deadline=research_topic.search_deadline,
+            bypass_cache=research_topic.bypass_cache,
+            plan=research_topic.plan,
+            expand_citations=research_topic.expand_citations,
+            full_text=research_topic.full_text
+        ):
+            yield b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Batch reviews: items per request, and items of one batch in flight at once
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "200"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+
+def _review_payload(**fields) -> dict:
+    """LiteratureReviewResponse as a plain dict, serialized once by orjson instead of through the model"""
+    return {name: fields.get(name) for name in LiteratureReviewResponse.model_fields}
+
+
+def _review_response(result: dict, include_timings: bool) -> dict:
+    if result.get("error"):
+        return _review_payload(success=False, review_id=result.get("review_id"), error=result["error"])
+    return _review_payload(
+        success=True,
+        review_id=result.get("review_id"),
+        review=result["review"],
+        sources=result["sources"],
+        source_status=result.get("source_status"),
+        prompt_stats=result.get("prompt_stats"),
+        refresh=result.get("refresh"),
+        timings=result.get("timings") if include_timings else None
+    )
+
+
+@app.post("/api/generate-review/batch")
+async def batch_literature_reviews(batch: BatchReviewRequest):
+    """Generate reviews for many topics, streamed back as NDJSON in completion order.
+
+    Each line is one item's review response plus its ``index`` in the request
+    and its ``topic``; a failed item gets ``success: false`` and the rest of
+    the batch carries on. The last line is a summary with ``done: true``.
+    Items share the worker's connection pool, identical upstream queries
+    across items are made once, and LLM calls queue in the global scheduler.
+    """
+    if len(batch.items) > BATCH_MAX_ITEMS:
+        return JSONResponse(
+            status_code=413,
+            content={"success": False, "error": f"Batch has {len(batch.items)} items; the limit is {BATCH_MAX_ITEMS}"}
         )
 
+    for item in batch.items:
+        verified_plan(item)
+
+    async def ndjson_stream():
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def run(index: int, item: ResearchTopic):
+            async with semaphore:
+                try:
+                    result = await generate_review_when_ready(item)
+                except Exception as e:
+                    result = {"error": str(e)}
+            return index, item, result
+
+        tasks = [asyncio.ensure_future(run(i, item)) for i, item in enumerate(batch.items)]
+        succeeded = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, item, result = await next_done
+                response = _review_response(result, item.include_timings)
+                succeeded += response["success"]
+                line = {"index": index, "topic": item.topic,
+                        **{name: value for name, value in response.items() if value is not None}}
+                yield orjson.dumps(line) + b"\n"
+            yield orjson.dumps({"done": True, "total": len(tasks), "succeeded": succeeded,
+                                "failed": len(tasks) - succeeded}) + b"\n"
+        finally:
+            # Client went away: stop the items still queued or running
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+
+
+@app.post("/api/reviews/{review_id}/refresh", response_model=LiteratureReviewResponse)
+async def refresh_literature_review(review_id: str, refresh_request: RefreshRequest):
+    """Update a stored review with papers published since it was last searched.
+
+    Only new papers are sent to the LLM, which writes an update section; when
+    nothing new turned up (or the review was refreshed within
+    REVIEW_REFRESH_MIN_INTERVAL) the stored review is returned as is.
+    """
+    try:
+        result = await get_agent().refresh_review(
+            review_id,
+            search_deadline=refresh_request.search_deadline,
+            bypass_cache=refresh_request.bypass_cache,
+            plan=plan_tokens.verify(refresh_request.plan_token)
+        )
+    except SchedulerBusy as e:
+        return JSONResponse(
+            status_code=503,
+            content={"success": False, "error": f"Service busy: {e}", "retry_after": e.retry_after},
+            headers={"Retry-After": str(int(e.retry_after + 0.999))}
+        )
+    if result is None:
+        raise HTTPException(status_code=404, detail="Review not found")
+    return ORJSONResponse(_review_response(result, refresh_request.include_timings))
+
+
+@app.post("/api/jobs", status_code=202)
+async def submit_review_job(research_topic: ResearchTopic):
+    """Queue a literature review and return its job ID immediately; poll /api/jobs/{job_id} for the result"""
+    try:
+        # The job keeps the verified plan, not the token (which could expire while it waits)
+        job_id = await review_jobs.submit(verified_plan(research_topic).model_dump(exclude={"plan_token"}))
+    except JobQueueFull as e:
+        return JSONResponse(
+            status_code=429,
+            content={"success": False, "error": f"Review queue is full: {e}"},
+            headers={"Retry-After": "30"}
+        )
+    return {"success": True, "job_id": job_id, "status": "queued", "status_url": f"/api/jobs/{job_id}"}
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_review_job(job_id: str):
+    """Status of a queued review job, with the review once it has succeeded"""
+    job = await review_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/api/jobs")
+async def job_stats():
+    """Queue depth, running jobs and outcome counters for this worker"""
+    return review_jobs.stats()
+
+
+@app.get("/api/full-text/stats")
+async def full_text_stats():
+    """Downloads, parses and cache hits of this worker's full-text ingester"""
+    return get_agent().full_text.stats()
+
+
+@app.get("/api/payments/stats")
+async def payment_stats():
+    """Charge, replay and decline counters for this worker's payment client"""
+    return payment_client.stats()
+
 @app.post("/api/process-payment", response_model=PaymentResponse)
-async def process_payment(payment_data: PaymentData):
-    """Process payment through Intasend"""
+async def process_payment(payment_data: PaymentData, request: Request, response: Response):
+    """Process payment through Intasend.
+
+    Send an Idempotency-Key header (or idempotency_key field) and reuse it on
+    retries: a repeated key returns the original outcome, with an
+    Idempotent-Replayed: true header, instead of charging again.
+    """
+    idempotency_key = request.headers.get("Idempotency-Key") or payment_data.idempotency_key
     try:
-        # Intasend API configuration
-        intasend_api_key = os.getenv("INTASEND_API_KEY")
-        intasend_publishable_key = os.getenv("INTASEND_PUBLISHABLE_KEY")
-        
-        if not intasend_api_key:
-            # For development/testing, simulate successful payment
-            transaction_id = f"TXN_{uuid.uuid4().hex[:8].upper()}"
-            
-            return PaymentResponse(
-                success=True,
-                transaction_id=transaction_id,
-                plan=payment_data.plan,
-                amount=payment_data.price,
-                message="Payment processed successfully (test mode)"
-            )
-        
         # Parse expiry date
         month, year = payment_data.expiryDate.split('/')
         expiry_year = f"20{year}"
+        # The amount comes from the server's price table, never from the client
+        amount = plan_price(payment_data.plan, payment_data.billing, payment_data.price)
         
         # Prepare Intasend payment data
         intasend_data = {
-            "amount": float(payment_data.price),
+            "amount": amount,
             "currency": "USD",
             "payment_method": {
                 "type": "card",
@@ -167,48 +478,77 @@ async def process_payment(payment_data: PaymentData):
                 "service": "Nzeru AI Literature Review"
             }
         }
-        
-        # Make request to Intasend API
-        headers = {
-            "Authorization": f"Bearer {intasend_api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        response = requests.post(
-            "https://api.intasend.com/v1/charges/",
-            json=intasend_data,
-            headers=headers
-        )
-        
-        if response.status_code == 201:
-            result = response.json()
-            return PaymentResponse(
-                success=True,
-                transaction_id=result.get("id"),
-                plan=payment_data.plan,
-                amount=payment_data.price,
-                message="Payment processed successfully"
-            )
-        else:
-            error_data = response.json()
-            raise HTTPException(
-                status_code=400,
-                detail=f"Payment failed: {error_data.get('detail', 'Unknown error')}"
-            )
-            
-    except HTTPException:
-        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid payment details: {str(e)}")
+    except PaymentError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    try:
+        result = await payment_client.charge(intasend_data, idempotency_key)
+    except PaymentError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Payment processing error: {str(e)}"
         )
 
+    if result["replayed"]:
+        response.headers["Idempotent-Replayed"] = "true"
+    if result["test_mode"]:
+        message = "Payment simulated (test mode); no plan was granted"
+    elif result.get("confirmed"):
+        message = "Payment processed successfully"
+    else:
+        raise HTTPException(status_code=502, detail="Payment gateway did not confirm the charge")
+    # Only a charge the gateway confirmed grants the plan and its priority
+    granted = payment_data.plan if result.get("confirmed") else "free"
+    return PaymentResponse(
+        success=True,
+        transaction_id=result["transaction_id"],
+        plan=granted,
+        plan_token=plan_tokens.issue(granted) if result.get("confirmed") else None,
+        amount=f"{amount:g}",
+        message=message
+    )
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "LitReview AI"}
 
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text exposition of stage latencies, provider counters, token usage and queue gauges"""
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/api/providers")
+async def provider_status():
+    """Circuit breaker state and rate-limiter counters for each search provider"""
+    return {name: guard.stats() for name, guard in get_agent().provider_guards.items()}
+
+
+@app.get("/api/scheduler")
+async def scheduler_stats():
+    """LLM slots in use, queue depth and wait times per plan"""
+    return get_agent().llm_scheduler.stats()
+
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit/miss/eviction counters for the search, LLM and citation-edge caches, and the local paper corpus"""
+    agent = get_agent()
+    return {
+        "search": agent.search_cache.stats(),
+        "llm": agent.llm_cache.stats(),
+        "citations": agent.citation_expander.stats(),
+        # Upstream queries shared between concurrent reviews
+        "search_coalescing": agent.search_flight.stats(),
+        "corpus": agent.corpus.stats() if agent.corpus is not None else None
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,267 @@
+"""Static asset pipeline: content-hashed, precompressed copies of the front-end files.
+
+`python assets.py` builds them into ASSET_BUILD_DIR (the Docker image does
+this at build time); with ASSET_AUTOBUILD on, the app rebuilds at startup
+whenever a source file changed.
+"""
+import os
+import re
+import sys
+import json
+import hashlib
+import mimetypes
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+
+from compression import ENCODINGS, compress, negotiate
+
+# Pages are rendered separately (below), so .html is not an asset extension
+COMPRESSIBLE = {".js", ".css", ".svg", ".ico", ".webmanifest"}
+ASSET_EXTENSIONS = COMPRESSIBLE | {".png", ".jpg", ".jpeg", ".gif", ".webp", ".mp4", ".woff", ".woff2"}
+SKIP_DIRS = {".git", ".cache", "benchmarks", "__pycache__", "node_modules", "venv", ".venv"}
+# Pages rendered once per build and served from memory
+PAGES = ("index.html", "generator.html", "pricing.html", "contact.html", "login.html")
+SUFFIXES = {"zstd": ".zst", "gzip": ".gz"}
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+ASSET_REF_RE = re.compile(r"""(\b(?:href|src)=["'])([^"'#?:]+)(?=["'#?])""")
+
+mimetypes.add_type("application/manifest+json", ".webmanifest")
+mimetypes.add_type("text/javascript", ".js")
+
+
+# ---- Build ----
+def _source_files(source_dir: str, build_dir: str) -> List[Tuple[str, str]]:
+    """(logical path, file path) of every servable asset under source_dir"""
+    found = []
+    skip = os.path.realpath(build_dir)
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith(".")
+                         and os.path.realpath(os.path.join(root, d)) != skip)
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in ASSET_EXTENSIONS:
+                path = os.path.join(root, name)
+                found.append((os.path.relpath(path, source_dir).replace(os.sep, "/"), path))
+    return found
+
+
+def _fingerprint(source_dir: str, build_dir: str) -> Dict[str, List[int]]:
+    """Size and mtime of every input, to tell whether a build is stale"""
+    inputs = _source_files(source_dir, build_dir) + [(page, os.path.join(source_dir, page)) for page in PAGES]
+    fingerprint = {}
+    for logical, path in inputs:
+        if os.path.exists(path):
+            st = os.stat(path)
+            fingerprint[logical] = [st.st_size, st.st_mtime_ns]
+    return fingerprint
+
+
+def _write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _write_variants(path: str, data: bytes, compressible: bool) -> List[str]:
+    """Write data plus the precompressed variants worth keeping; returns their encodings"""
+    _write(path, data)
+    encodings = []
+    if compressible:
+        for encoding in ENCODINGS:
+            packed = compress(data, encoding, level=19 if encoding == "zstd" else 9)
+            # Tiny files can grow; keep a variant only when it saves something real
+            if len(packed) < len(data) * 0.9:
+                _write(path + SUFFIXES[encoding], packed)
+                encodings.append(encoding)
+    return encodings
+
+
+def rewrite_references(html: str, urls: Dict[str, str]) -> str:
+    """Point relative href/src attributes at the hashed URLs of known assets"""
+    def replace(match: re.Match) -> str:
+        logical = match.group(2).strip()
+        while logical.startswith("./"):
+            logical = logical[2:]
+        return match.group(1) + urls.get(logical.lstrip("/"), match.group(2))
+    return ASSET_REF_RE.sub(replace, html)
+
+
+def build_assets(source_dir: str, build_dir: str) -> Dict[str, Any]:
+    """Write hashed, precompressed assets and rendered pages under build_dir; returns the manifest"""
+    assets: Dict[str, Dict[str, Any]] = {}
+    for logical, path in _source_files(source_dir, build_dir):
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        stem, ext = os.path.splitext(logical)
+        hashed = f"{stem}.{digest}{ext}"
+        encodings = _write_variants(os.path.join(build_dir, "files", hashed), data, ext.lower() in COMPRESSIBLE)
+        assets[logical] = {"path": hashed, "etag": digest, "size": len(data),
+                           "type": mimetypes.guess_type(logical)[0] or "application/octet-stream",
+                           "encodings": encodings}
+
+    urls = {logical: f"/static/{entry['path']}" for logical, entry in assets.items()}
+    pages: Dict[str, Dict[str, Any]] = {}
+    for page in PAGES:
+        path = os.path.join(source_dir, page)
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            data = rewrite_references(f.read(), urls).encode("utf-8")
+        encodings = _write_variants(os.path.join(build_dir, "pages", page), data, compressible=True)
+        pages[page] = {"etag": hashlib.sha256(data).hexdigest()[:12], "size": len(data), "encodings": encodings}
+
+    manifest = {"sources": _fingerprint(source_dir, build_dir), "assets": assets, "pages": pages}
+    _write(os.path.join(build_dir, "manifest.json"), json.dumps(manifest, indent=1).encode("utf-8"))
+    _prune(os.path.join(build_dir, "files"), {entry["path"] for entry in assets.values()})
+    return manifest
+
+
+def _prune(files_dir: str, keep: set) -> None:
+    """Delete hashed files (and their variants) left over from earlier builds"""
+    for root, _, files in os.walk(files_dir):
+        for name in files:
+            if ".tmp" in name:
+                # Another worker's build in progress
+                continue
+            path = os.path.join(root, name)
+            logical = os.path.relpath(path, files_dir).replace(os.sep, "/")
+            for suffix in SUFFIXES.values():
+                if logical.endswith(suffix):
+                    logical = logical[:-len(suffix)]
+            if logical not in keep:
+                os.remove(path)
+
+
+# ---- Serving ----
+def _not_modified(if_none_match: Optional[str], digest: str) -> bool:
+    """Whether If-None-Match names any representation (identity or encoded) of digest"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        if tag == "*" or tag == digest or tag.startswith(digest + "-"):
+            return True
+    return False
+
+
+class StaticAssets:
+    """Serves the built assets and pages with ETags, negotiated precompressed variants and cache headers.
+
+    Hashed URLs (/static/css/styles.<hash>.css) never change content, so they
+    are cached for a year as immutable; the plain names (/static/css/styles.css)
+    still work for old links but must revalidate. Only whitelisted front-end
+    files are reachable - never the Python sources, .env or the caches.
+    """
+
+    def __init__(self, source_dir: str, build_dir: str, autobuild: bool = True):
+        self.source_dir = source_dir
+        self.build_dir = build_dir
+        self.autobuild = autobuild
+        self.manifest: Dict[str, Any] = {"assets": {}, "pages": {}}
+        # URL path -> (manifest entry, immutable)
+        self._routes: Dict[str, Tuple[Dict[str, Any], bool]] = {}
+        # page -> encoding (None for identity) -> body
+        self._pages: Dict[str, Dict[Optional[str], bytes]] = {}
+
+    @classmethod
+    def from_env(cls, source_dir: str = ".") -> "StaticAssets":
+        return cls(
+            source_dir=source_dir,
+            build_dir=os.getenv("ASSET_BUILD_DIR", ".cache/assets"),
+            autobuild=os.getenv("ASSET_AUTOBUILD", "1").lower() not in ("0", "false", "no"),
+        )
+
+    def load(self) -> None:
+        """Load the manifest, rebuilding first when autobuild is on and it is missing or stale"""
+        manifest = None
+        path = os.path.join(self.build_dir, "manifest.json")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        stale = manifest is None or manifest.get("sources") != _fingerprint(self.source_dir, self.build_dir)
+        if self.autobuild and stale:
+            manifest = build_assets(self.source_dir, self.build_dir)
+        if manifest is None:
+            print(f"No asset build in {self.build_dir}; run `python assets.py`")
+            return
+
+        routes = {}
+        for logical, entry in manifest["assets"].items():
+            routes[logical] = (entry, False)
+            routes[entry["path"]] = (entry, True)
+        pages = {}
+        for page, entry in manifest["pages"].items():
+            base = os.path.join(self.build_dir, "pages", page)
+            bodies = {}
+            for encoding in [None] + entry["encodings"]:
+                with open(base + (SUFFIXES[encoding] if encoding else ""), "rb") as f:
+                    bodies[encoding] = f.read()
+            pages[page] = bodies
+        self.manifest, self._routes, self._pages = manifest, routes, pages
+
+    def url(self, logical: str) -> str:
+        """Hashed URL for a source-relative path (the plain /static URL if it is unknown)"""
+        entry = self.manifest["assets"].get(logical)
+        return f"/static/{entry['path'] if entry else logical}"
+
+    def stats(self) -> Dict[str, Any]:
+        assets = self.manifest["assets"].values()
+        return {"assets": len(self.manifest["assets"]), "pages": len(self._pages),
+                "bytes": sum(entry["size"] for entry in assets),
+                "precompressed": sum(1 for entry in assets if entry["encodings"])}
+
+    def _headers(self, digest: str, encoding: Optional[str], cache_control: str,
+                 negotiable: bool) -> Dict[str, str]:
+        headers = {"etag": f'"{digest}-{encoding}"' if encoding else f'"{digest}"', "cache-control": cache_control}
+        if negotiable:
+            headers["vary"] = "Accept-Encoding"
+        if encoding:
+            headers["content-encoding"] = encoding
+        return headers
+
+    def asset_response(self, request: Request, path: str) -> Response:
+        route = self._routes.get(path)
+        if route is None:
+            return Response("Not Found", status_code=404, media_type="text/plain")
+        entry, immutable = route
+        cache_control = IMMUTABLE if immutable else REVALIDATE
+        if _not_modified(request.headers.get("if-none-match"), entry["etag"]):
+            headers = self._headers(entry["etag"], None, cache_control, bool(entry["encodings"]))
+            return Response(status_code=304, headers=headers)
+        encoding = negotiate(request.headers.get("accept-encoding"), entry["encodings"])
+        file_path = os.path.join(self.build_dir, "files", entry["path"]) + (SUFFIXES[encoding] if encoding else "")
+        return FileResponse(file_path, media_type=entry["type"],
+                            headers=self._headers(entry["etag"], encoding, cache_control, bool(entry["encodings"])))
+
+    def page_response(self, request: Request, page: str) -> Response:
+        bodies = self._pages.get(page)
+        if bodies is None:
+            return Response("Not Found", status_code=404, media_type="text/plain")
+        entry = self.manifest["pages"][page]
+        if _not_modified(request.headers.get("if-none-match"), entry["etag"]):
+            return Response(status_code=304, headers=self._headers(entry["etag"], None, REVALIDATE, True))
+        encoding = negotiate(request.headers.get("accept-encoding"), entry["encodings"])
+        return Response(bodies[encoding], media_type="text/html",
+                        headers=self._headers(entry["etag"], encoding, REVALIDATE, True))
+
+
+def main() -> int:
+    build_dir = os.getenv("ASSET_BUILD_DIR", ".cache/assets")
+    manifest = build_assets(".", build_dir)
+    raw = sum(entry["size"] for entry in manifest["assets"].values())
+    print(f"Built {len(manifest['assets'])} assets ({raw} bytes) and {len(manifest['pages'])} pages into {build_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
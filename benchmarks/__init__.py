@@ -0,0 +1 @@
+"""Offline benchmarks: fake search providers, a fake Groq client and a load driver."""
@@ -0,0 +1,64 @@
+"""Stand-in for ChatGroq that answers with deterministic text at a fixed token rate."""
+import asyncio
+import hashlib
+from typing import Any, AsyncIterator, List
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+FILLER = (
+    "Recent work (Smith, 2023) extends earlier findings (Zhang, 2021) with larger datasets, "
+    "while comparative studies (Mensah, 2022) report mixed results across settings. "
+).split(" ")
+
+
+class FakeChatGroq:
+    """Drop-in for the agent's `llm`: ainvoke and astream with a time-to-first-token and a token rate.
+
+    Token counts are estimated at four characters per token for the prompt,
+    and reported in the same metadata fields ChatGroq fills in.
+    """
+
+    def __init__(self, tokens_per_second: float = 250, ttft: float = 0.4, response_tokens: int = 600,
+                 model_name: str = "fake-groq"):
+        self.tokens_per_second = tokens_per_second
+        self.ttft = ttft
+        self.response_tokens = response_tokens
+        self.model_name = model_name
+        self.calls = 0
+
+    def _tokens(self, messages: List[Any]) -> List[str]:
+        # Vary the text with the prompt so the response cache sees distinct answers
+        digest = hashlib.sha256("".join(m.content for m in messages).encode("utf-8")).hexdigest()[:8]
+        words = [f"[{digest}]"] + [FILLER[i % len(FILLER)] for i in range(self.response_tokens - 1)]
+        return [w + " " for w in words]
+
+    def _usage(self, messages: List[Any]) -> dict:
+        prompt = sum(len(m.content) for m in messages) // 4 + 1
+        return {"prompt_tokens": prompt, "completion_tokens": self.response_tokens,
+                "total_tokens": prompt + self.response_tokens}
+
+    async def ainvoke(self, messages: List[Any], **kwargs: Any) -> AIMessage:
+        self.calls += 1
+        tokens = self._tokens(messages)
+        await asyncio.sleep(self.ttft + len(tokens) / self.tokens_per_second)
+        usage = self._usage(messages)
+        return AIMessage(
+            content="".join(tokens),
+            response_metadata={"token_usage": usage, "model_name": self.model_name},
+        )
+
+    async def astream(self, messages: List[Any], **kwargs: Any) -> AsyncIterator[AIMessageChunk]:
+        self.calls += 1
+        tokens = self._tokens(messages)
+        await asyncio.sleep(self.ttft)
+        # Emit in small groups so the sleep granularity stays realistic at high rates
+        group = max(1, int(self.tokens_per_second // 50))
+        for start in range(0, len(tokens), group):
+            yield AIMessageChunk(content="".join(tokens[start:start + group]))
+            await asyncio.sleep(group / self.tokens_per_second)
+        usage = self._usage(messages)
+        yield AIMessageChunk(content="", usage_metadata={
+            "input_tokens": usage["prompt_tokens"],
+            "output_tokens": usage["completion_tokens"],
+            "total_tokens": usage["total_tokens"],
+        })
@@ -0,0 +1,125 @@
+"""Local stand-in for the Intasend charges API, for load-testing /api/process-payment.
+
+Answers POST /v1/charges/ after a configurable latency, declines a share of
+charges (and always the card 4000000000000002), fails a share with 5xx, and
+honours Idempotency-Key the way the real gateway does:
+
+    python -m benchmarks.fake_payments --port 8610 --latency 800:200 --errors 0.05:503
+
+Point the app at it with the printed INTASEND_API_URL and any INTASEND_API_KEY.
+"""
+import random
+import asyncio
+import argparse
+import uuid
+from typing import Any, Dict, Tuple
+
+from aiohttp import web
+
+DECLINED_CARD = "4000000000000002"
+
+
+class FakeGateway:
+    """aiohttp application serving the charges endpoint"""
+
+    def __init__(self, latency_ms: float = 600, jitter_ms: float = 200, error_rate: float = 0,
+                 error_status: int = 503, decline_rate: float = 0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.decline_rate = decline_rate
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "charges": 0, "declined": 0, "errors": 0, "replayed": 0, "unauthorized": 0}
+        # Idempotency key -> (status, body) of the first completed answer, and upstream requests per key
+        self._outcomes: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.requests_per_key: Dict[str, int] = {}
+        self.app = web.Application()
+        self.app.router.add_post("/v1/charges/", self._charge)
+        self.app.router.add_get("/stats", lambda request: web.json_response(self.stats))
+
+    @staticmethod
+    def base_url(host: str, port: int) -> str:
+        return f"http://{host}:{port}/v1"
+
+    async def _charge(self, request: web.Request) -> web.Response:
+        self.stats["requests"] += 1
+        if not request.headers.get("Authorization", "").startswith("Bearer "):
+            self.stats["unauthorized"] += 1
+            return web.json_response({"detail": "Authentication credentials were not provided"}, status=401)
+        body = await request.json()
+        key = request.headers.get("Idempotency-Key")
+        if not key:
+            status, payload = await self._process(body)
+            return web.json_response(payload, status=status)
+
+        self.requests_per_key[key] = self.requests_per_key.get(key, 0) + 1
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            if key in self._outcomes:
+                self.stats["replayed"] += 1
+                status, payload = self._outcomes[key]
+                return web.json_response(payload, status=status)
+            status, payload = await self._process(body)
+            # Like the real gateway, server errors are not remembered
+            if status < 500:
+                self._outcomes[key] = (status, payload)
+        return web.json_response(payload, status=status)
+
+    async def _process(self, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        await asyncio.sleep(max(0.0, self.rng.gauss(self.latency_ms, self.jitter_ms)) / 1000)
+        if self.rng.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return self.error_status, {"detail": "simulated gateway error"}
+        card = ((body.get("payment_method") or {}).get("card") or {}).get("number")
+        if card == DECLINED_CARD or self.rng.random() < self.decline_rate:
+            self.stats["declined"] += 1
+            return 400, {"detail": "Card declined"}
+        self.stats["charges"] += 1
+        return 201, {"id": f"CHG_{uuid.uuid4().hex[:12].upper()}", "amount": body.get("amount"), "state": "COMPLETE"}
+
+    def duplicate_keys(self) -> Dict[str, int]:
+        """Idempotency keys that reached the gateway more than once"""
+        return {key: count for key, count in self.requests_per_key.items() if count > 1}
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8610) -> web.AppRunner:
+        runner = web.AppRunner(self.app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+
+def parse_pair(spec: str, default: Tuple[float, float]) -> Tuple[float, float]:
+    """"a:b" -> (a, b); an empty spec gives default"""
+    if not spec:
+        return default
+    first, _, second = spec.partition(":")
+    return float(first), float(second or default[1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a fake Intasend charges API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8610)
+    parser.add_argument("--latency", default="", help="mean_ms:jitter_ms (default 600:200)")
+    parser.add_argument("--errors", default="", help="rate:status, e.g. 0.05:503")
+    parser.add_argument("--declines", type=float, default=0, help="share of charges to decline")
+    args = parser.parse_args()
+
+    latency, jitter = parse_pair(args.latency, (600, 200))
+    error_rate, error_status = parse_pair(args.errors, (0, 503))
+    gateway = FakeGateway(latency, jitter, error_rate, int(error_status), args.declines)
+
+    async def serve() -> None:
+        await gateway.start(args.host, args.port)
+        print(f"INTASEND_API_URL={FakeGateway.base_url(args.host, args.port)}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
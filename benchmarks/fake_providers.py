@@ -0,0 +1,400 @@
+"""Local stand-ins for the arXiv, OpenAlex, Crossref and Semantic Scholar search APIs.
+
+Serves recorded payloads (see record_payloads.py) or deterministic synthetic
+ones, with per-provider latency and error profiles:
+
+    python -m benchmarks.fake_providers --port 8600 \\
+        --latency arxiv=800:200,crossref=300:100 --errors semantic_scholar=0.1:429
+
+Point the app at it with the printed *_BASE_URL / ARXIV_API_URL variables.
+"""
+import os
+import json
+import random
+import asyncio
+import argparse
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from aiohttp import web
+
+PROVIDERS = ("arxiv", "openalex", "crossref", "semantic_scholar")
+
+# (mean latency ms, jitter ms): roughly what each API answers in from a nearby region
+DEFAULT_LATENCY = {
+    "arxiv": (900, 300),
+    "openalex": (350, 100),
+    "crossref": (500, 200),
+    "semantic_scholar": (400, 150),
+}
+
+VOCABULARY = """
+learning neural network model models data training inference transformer attention language vision graph
+robust efficient scalable federated privacy causal reinforcement policy agent benchmark dataset evaluation
+clinical medical imaging diagnosis climate energy forecasting time series optimization sparse retrieval
+generation generative diffusion contrastive representation embedding semantic uncertainty calibration
+explainable interpretable fairness bias adversarial robustness compression quantization distillation
+""".split()
+
+FIRST_NAMES = ["Ana", "Wei", "Kofi", "Maria", "John", "Aisha", "Liam", "Yuki", "Chipo", "Ravi", "Elena", "Tendai"]
+LAST_NAMES = ["Smith", "Zhang", "Mensah", "Garcia", "Banda", "Okafor", "Kim", "Nakamura", "Phiri", "Patel", "Rossi", "Moyo"]
+
+
+class ProviderProfile:
+    """Latency and error behaviour of one fake provider"""
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0, error_status: int = 503):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+    def delay(self, rng: random.Random) -> float:
+        return max(0.0, rng.gauss(self.latency_ms, self.jitter_ms)) / 1000
+
+
+def parse_profiles(latency: str = "", errors: str = "", use_defaults: bool = True) -> Dict[str, ProviderProfile]:
+    """Build profiles from "name=mean:jitter,..." latency and "name=rate:status,..." error specs"""
+    profiles = {
+        name: ProviderProfile(*(DEFAULT_LATENCY[name] if use_defaults else (0, 0)))
+        for name in PROVIDERS
+    }
+    for item in filter(None, latency.split(",")):
+        name, _, spec = item.partition("=")
+        mean, _, jitter = spec.partition(":")
+        profiles[name.strip()].latency_ms = float(mean)
+        profiles[name.strip()].jitter_ms = float(jitter or 0)
+    for item in filter(None, errors.split(",")):
+        name, _, spec = item.partition("=")
+        rate, _, status = spec.partition(":")
+        profiles[name.strip()].error_rate = float(rate)
+        profiles[name.strip()].error_status = int(status or 503)
+    return profiles
+
+
+# -------------------- Synthetic Corpus --------------------
+def _seed(*parts: Any) -> int:
+    return int(hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:16], 16)
+
+
+def _work(rng: random.Random, topic_words: List[str], key: Any, doi: str) -> Dict[str, Any]:
+    title_words = rng.sample(VOCABULARY, 5) + rng.sample(topic_words, min(2, len(topic_words)))
+    rng.shuffle(title_words)
+    sentences = []
+    for _ in range(rng.randint(5, 10)):
+        words = rng.sample(VOCABULARY, 12) + rng.sample(topic_words, min(1, len(topic_words)))
+        rng.shuffle(words)
+        sentences.append(" ".join(words).capitalize() + ".")
+    year = rng.randint(2012, 2025)
+    return {
+        "key": key,
+        "title": " ".join(title_words).capitalize(),
+        "abstract": " ".join(sentences),
+        "authors": [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(rng.randint(1, 6))],
+        "year": year,
+        "doi": doi,
+        "arxiv_id": f"{year % 100:02d}{rng.randint(1, 12):02d}.{rng.randint(10000, 99999)}",
+    }
+
+
+def synthetic_works(topic: str, count: int) -> List[Dict[str, Any]]:
+    """A deterministic pool of works for a topic; providers return overlapping slices of it"""
+    rng = random.Random(_seed("works", topic))
+    topic_words = [w for w in topic.lower().split() if w.isalpha()] or ["research"]
+    return [_work(rng, topic_words, i, f"10.5555/bench.{_seed(topic) % 100000}.{i}") for i in range(count)]
+
+
+def graph_neighbours(doi: str, relation: str, count: int = 12) -> List[Dict[str, Any]]:
+    """Deterministic references ("ref") or citing works ("cite") of the work with this DOI.
+
+    Neighbours share the vocabulary of the work's own title, and both
+    providers derive them from the DOI, so their edges overlap like the real APIs'.
+    """
+    return [graph_work(doi, relation, j) for j in range(count)]
+
+
+def graph_work(doi: str, relation: str, j: int) -> Dict[str, Any]:
+    words = [w for w in synthetic_title(doi).lower().split() if w.isalpha()]
+    return _work(random.Random(_seed(relation, doi, j)), words, j, graph_doi(doi, relation, j))
+
+
+def graph_doi(doi: str, relation: str, j: int) -> str:
+    return f"10.5555/graph.{_seed(relation, doi, j) % 10**10}"
+
+
+def synthetic_title(doi: str) -> str:
+    return " ".join(random.Random(_seed("title", doi)).sample(VOCABULARY, 6))
+
+
+def openalex_id(doi: str) -> str:
+    return f"https://openalex.org/W{_seed(doi) % 10**10}"
+
+
+def _slice(topic: str, provider: str, count: int) -> List[Dict[str, Any]]:
+    # Each provider sees a shifted window over the same pool, so about half
+    # of one provider's results are duplicates of another's
+    pool = synthetic_works(topic, count * 3)
+    offset = PROVIDERS.index(provider) * max(1, count // 2)
+    return pool[offset:offset + count]
+
+
+def arxiv_feed(works: List[Dict[str, Any]]) -> str:
+    entries = []
+    for w in works:
+        authors = "".join(f"<author><name>{escape(a)}</name></author>" for a in w["authors"])
+        entries.append(
+            f"<entry><id>http://arxiv.org/abs/{w['arxiv_id']}v1</id>"
+            f"<published>{w['year']}-03-01T00:00:00Z</published>"
+            f"<title>{escape(w['title'])}</title><summary>{escape(w['abstract'])}</summary>{authors}"
+            f"<arxiv:doi>{w['doi']}</arxiv:doi>"
+            f"<link title=\"pdf\" href=\"http://arxiv.org/pdf/{w['arxiv_id']}v1\"/>"
+            f"<category term=\"cs.LG\"/></entry>"
+        )
+    return ('<?xml version="1.0" encoding="UTF-8"?><feed xmlns="http://www.w3.org/2005/Atom" '
+            'xmlns:arxiv="http://arxiv.org/schemas/atom">' + "".join(entries) + "</feed>")
+
+
+def _inverted_index(text: str) -> Dict[str, List[int]]:
+    index: Dict[str, List[int]] = {}
+    for position, word in enumerate(text.split()):
+        index.setdefault(word, []).append(position)
+    return index
+
+
+def openalex_payload(works: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"results": [{
+        "id": openalex_id(w["doi"]),
+        "title": w["title"],
+        "abstract_inverted_index": _inverted_index(w["abstract"]),
+        "authorships": [{"author": {"display_name": a}} for a in w["authors"]],
+        "publication_year": w["year"],
+        "doi": f"https://doi.org/{w['doi']}",
+        "primary_location": {"pdf_url": None, "source": {"host_page_url": f"https://doi.org/{w['doi']}"}},
+        "referenced_works": [openalex_id(graph_doi(w["doi"], "ref", j)) for j in range(12)],
+    } for w in works]}
+
+
+def crossref_payload(works: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"message": {"items": [{
+        "title": [w["title"]],
+        "author": [{"given": a.split()[0], "family": a.split()[-1]} for a in w["authors"]],
+        "abstract": f"<jats:p>{escape(w['abstract'])}</jats:p>",
+        "issued": {"date-parts": [[w["year"], 1, 1]]},
+        "URL": f"https://doi.org/{w['doi']}",
+        "DOI": w["doi"],
+    } for w in works]}}
+
+
+def semantic_scholar_payload(works: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"data": [{
+        "title": w["title"],
+        "authors": [{"name": a} for a in w["authors"]],
+        "abstract": w["abstract"],
+        "year": w["year"],
+        "openAccessPdf": None,
+        "url": f"https://www.semanticscholar.org/paper/{_seed(w['doi']) % 10**12}",
+        "externalIds": {"DOI": w["doi"], "ArXiv": w["arxiv_id"]},
+    } for w in works]}
+
+
+# -------------------- Server --------------------
+class FakeProviders:
+    """aiohttp application serving all four providers under one port"""
+
+    def __init__(self, profiles: Optional[Dict[str, ProviderProfile]] = None,
+                 payload_dir: Optional[str] = None, seed: int = 0):
+        self.profiles = profiles or parse_profiles()
+        self.payload_dir = payload_dir
+        self.rng = random.Random(seed)
+        self.stats = {name: {"requests": 0, "errors": 0} for name in PROVIDERS}
+        self._recorded: Dict[str, Any] = {}
+        # Short OpenAlex ID -> work, for every synthetic work served (ID filter lookups)
+        self._openalex_works: Dict[str, Dict[str, Any]] = {}
+        self._references: Dict[str, Tuple[str, int]] = {}
+        self.app = web.Application()
+        self.app.router.add_get("/arxiv/api/query", self._arxiv)
+        self.app.router.add_get("/openalex/works", self._openalex)
+        self.app.router.add_get("/crossref/works", self._crossref)
+        self.app.router.add_get("/s2/graph/v1/paper/search", self._semantic_scholar)
+        self.app.router.add_post("/s2/graph/v1/paper/batch", self._semantic_scholar_batch)
+        self.app.router.add_get("/stats", lambda request: web.json_response(self.stats))
+
+    @staticmethod
+    def base_urls(host: str, port: int) -> Dict[str, str]:
+        """Environment variables that point the app at this server"""
+        root = f"http://{host}:{port}"
+        return {
+            "ARXIV_API_URL": f"{root}/arxiv/api/query",
+            "OPENALEX_BASE_URL": f"{root}/openalex",
+            "CROSSREF_BASE_URL": f"{root}/crossref",
+            "SEMANTIC_SCHOLAR_BASE_URL": f"{root}/s2/graph/v1",
+        }
+
+    def _load_recorded(self, provider: str) -> Optional[Any]:
+        """Recorded payload for a provider (<provider>.json, or arxiv.xml), if a payload dir was given"""
+        if not self.payload_dir:
+            return None
+        if provider not in self._recorded:
+            payload = None
+            for name in (f"{provider}.json", f"{provider}.xml"):
+                path = os.path.join(self.payload_dir, name)
+                if os.path.exists(path):
+                    with open(path, encoding="utf-8") as f:
+                        payload = json.load(f) if name.endswith(".json") else f.read()
+                    break
+            self._recorded[provider] = payload
+        return self._recorded[provider]
+
+    async def _simulate(self, provider: str) -> Optional[web.Response]:
+        """Sleep for the provider's latency and maybe fail; returns an error response or None"""
+        profile = self.profiles[provider]
+        self.stats[provider]["requests"] += 1
+        await asyncio.sleep(profile.delay(self.rng))
+        if self.rng.random() < profile.error_rate:
+            self.stats[provider]["errors"] += 1
+            headers = {"Retry-After": "2"} if profile.error_status == 429 else None
+            return web.Response(status=profile.error_status, text="simulated error", headers=headers)
+        return None
+
+    async def _arxiv(self, request: web.Request) -> web.Response:
+        error = await self._simulate("arxiv")
+        if error:
+            return error
+        recorded = self._load_recorded("arxiv")
+        if recorded is None:
+            # Drop any submittedDate range clause
+            topic = request.query.get("search_query", "").split(" AND ")[0].replace("all:", "").strip('"')
+            recorded = arxiv_feed(_slice(topic, "arxiv", int(request.query.get("max_results", 10))))
+        return web.Response(text=recorded, content_type="application/atom+xml")
+
+    async def _openalex(self, request: web.Request) -> web.Response:
+        error = await self._simulate("openalex")
+        if error:
+            return error
+        count = int(request.query.get("per_page", 10))
+        if "filter" in request.query:
+            return web.json_response({"results": self._openalex_filter(request.query["filter"])[:count]})
+        payload = self._load_recorded("openalex")
+        if payload is None:
+            payload = openalex_payload(_slice(request.query.get("search", ""), "openalex", count))
+        self._remember(payload["results"])
+        return web.json_response({"results": payload["results"][:count]})
+
+    def _remember(self, results: List[Dict[str, Any]]) -> None:
+        """Make served works, and the works they reference, resolvable by ID filters"""
+        for item in results:
+            if not item.get("id"):
+                continue
+            self._openalex_works[item["id"].rsplit("/", 1)[-1]] = item
+            if item.get("doi"):
+                doi = item["doi"].replace("https://doi.org/", "")
+                # References are built on first lookup; only their IDs are noted here
+                for j in range(12):
+                    self._references[openalex_id(graph_doi(doi, "ref", j)).rsplit("/", 1)[-1]] = (doi, j)
+
+    def _openalex_filter(self, filter_: str) -> List[Dict[str, Any]]:
+        """Synthetic answers to openalex:, doi: and cites: filters over the works served so far"""
+        field, _, values = filter_.partition(":")
+        values = values.split("|")
+        if field == "doi":
+            results = []
+            for doi in (v.replace("https://doi.org/", "") for v in values):
+                work_id = openalex_id(doi).rsplit("/", 1)[-1]
+                if work_id not in self._openalex_works:
+                    work = _work(random.Random(_seed("work", doi)), synthetic_title(doi).split(), 0, doi)
+                    self._openalex_works[work_id] = openalex_payload([work])["results"][0]
+                results.append(self._openalex_works[work_id])
+        elif field == "openalex":
+            results = []
+            for work_id in values:
+                if work_id not in self._openalex_works and work_id in self._references:
+                    doi, j = self._references[work_id]
+                    self._openalex_works[work_id] = openalex_payload([graph_work(doi, "ref", j)])["results"][0]
+                if work_id in self._openalex_works:
+                    results.append(self._openalex_works[work_id])
+        elif field == "cites":
+            results = []
+            for work_id in values:
+                cited = self._openalex_works.get(work_id)
+                if not cited or not cited.get("doi"):
+                    continue
+                citing = openalex_payload(graph_neighbours(cited["doi"].replace("https://doi.org/", ""), "cite"))
+                for item in citing["results"]:
+                    item["referenced_works"].append(cited["id"])
+                    results.append(item)
+        else:
+            return []
+        self._remember(results)
+        return results
+
+    async def _crossref(self, request: web.Request) -> web.Response:
+        error = await self._simulate("crossref")
+        if error:
+            return error
+        count = int(request.query.get("rows", 10))
+        payload = self._load_recorded("crossref")
+        if payload is None:
+            payload = crossref_payload(_slice(request.query.get("query", ""), "crossref", count))
+        return web.json_response({"message": {"items": payload["message"]["items"][:count]}})
+
+    async def _semantic_scholar(self, request: web.Request) -> web.Response:
+        error = await self._simulate("semantic_scholar")
+        if error:
+            return error
+        count = int(request.query.get("limit", 10))
+        payload = self._load_recorded("semantic_scholar")
+        if payload is None:
+            payload = semantic_scholar_payload(_slice(request.query.get("query", ""), "semantic_scholar", count))
+        return web.json_response({"data": payload["data"][:count]})
+
+    async def _semantic_scholar_batch(self, request: web.Request) -> web.Response:
+        error = await self._simulate("semantic_scholar")
+        if error:
+            return error
+        body = await request.json()
+        results = []
+        for paper_id in body.get("ids", []):
+            if not paper_id.startswith("DOI:"):
+                results.append(None)
+                continue
+            doi = paper_id[4:]
+            results.append({
+                "references": semantic_scholar_payload(graph_neighbours(doi, "ref"))["data"],
+                "citations": semantic_scholar_payload(graph_neighbours(doi, "cite"))["data"],
+            })
+        return web.json_response(results)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8600) -> web.AppRunner:
+        runner = web.AppRunner(self.app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve fake search providers for benchmarking")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--latency", default="", help="name=mean_ms:jitter_ms,... (defaults approximate the real APIs)")
+    parser.add_argument("--errors", default="", help="name=rate:status,... e.g. crossref=0.05:503")
+    parser.add_argument("--no-latency", action="store_true", help="start from zero latency instead of the defaults")
+    parser.add_argument("--payload-dir", default=None, help="directory of recorded payloads from record_payloads.py")
+    args = parser.parse_args()
+
+    providers = FakeProviders(parse_profiles(args.latency, args.errors, not args.no_latency), args.payload_dir)
+
+    async def serve() -> None:
+        await providers.start(args.host, args.port)
+        for name, value in FakeProviders.base_urls(args.host, args.port).items():
+            print(f"{name}={value}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
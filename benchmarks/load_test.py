@@ -0,0 +1,258 @@
+"""Offline load test: the real app against fake providers and a fake Groq.
+
+Runs N concurrent users against /api/generate-review (or the streaming
+endpoint) and reports throughput, latency percentiles, server event-loop lag
+and a per-stage breakdown. With --baseline it exits non-zero when p95,
+throughput or loop lag regress beyond --tolerance:
+
+    python -m benchmarks.load_test --users 20 --requests 200 --save bench.json
+    python -m benchmarks.load_test --users 20 --requests 200 --baseline bench.json
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.fake_providers import FakeProviders, parse_profiles  # noqa: E402
+from benchmarks.fake_llm import FakeChatGroq  # noqa: E402
+
+
+def quantile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    def ms(value):
+        return round(value * 1000, 1) if value is not None else None
+    return {"p50_ms": ms(quantile(values, 0.5)), "p95_ms": ms(quantile(values, 0.95)),
+            "p99_ms": ms(quantile(values, 0.99)), "max_ms": ms(max(values) if values else None)}
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic timer fires on the server's event loop"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+
+class BackgroundLoop:
+    """An event loop on a daemon thread, for servers that must not share the driver's loop"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def run(self, coro, timeout: Optional[float] = None):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def stop(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+
+def configure_environment(args: argparse.Namespace, provider_urls: Dict[str, str]) -> None:
+    """Point the app at the fakes, with in-memory caches and no provider throttling.
+
+    Every other piece of on-disk state goes to a fresh temporary directory, so
+    a run neither reads nor pollutes the checkout's .cache.
+    """
+    state_dir = tempfile.mkdtemp(prefix="litreview-bench-")
+    os.environ.update(provider_urls)
+    os.environ.update({
+        "GROQ_API_KEY": os.getenv("GROQ_API_KEY") or "benchmark",
+        "SEARCH_CACHE_DB": "",
+        "LLM_CACHE_DB": "",
+        # Benchmark topics differ only by a number, which the corpus index ignores
+        "CORPUS_DB": "",
+        "JOB_DB": os.path.join(state_dir, "jobs.db"),
+        "REVIEW_DB": os.path.join(state_dir, "reviews.db"),
+        "CITATION_CACHE_DB": os.path.join(state_dir, "citations.db"),
+        "FULLTEXT_INDEX_DB": os.path.join(state_dir, "fulltext.db"),
+        "FULLTEXT_CACHE_DIR": os.path.join(state_dir, "fulltext"),
+        "PAYMENT_IDEMPOTENCY_DB": os.path.join(state_dir, "payments.db"),
+        "ASSET_BUILD_DIR": os.path.join(state_dir, "assets"),
+        "PROVIDER_RATE_LIMITS": "arxiv=1000:1000,openalex=1000:1000,crossref=1000:1000,semantic_scholar=1000:1000",
+        "LLM_MAX_CONCURRENCY": str(args.llm_concurrency),
+    })
+
+
+def start_app(args: argparse.Namespace, lag: LoopLagMonitor) -> BackgroundLoop:
+    import uvicorn
+    import app as app_module
+
+    app_module.get_agent().llm = FakeChatGroq(args.llm_tps, args.llm_ttft, args.llm_tokens)
+    server = uvicorn.Server(uvicorn.Config(app_module.app, host="127.0.0.1", port=args.port,
+                                           log_level="warning", lifespan="on"))
+    background = BackgroundLoop()
+
+    async def serve() -> None:
+        monitor = asyncio.ensure_future(lag.run())
+        try:
+            await server.serve()
+        finally:
+            monitor.cancel()
+
+    asyncio.run_coroutine_threadsafe(serve(), background.loop)
+    deadline = time.monotonic() + 15
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("app did not start")
+        time.sleep(0.05)
+    background.server = server
+    return background
+
+
+async def drive(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run args.requests reviews across args.users concurrent clients"""
+    url = f"http://127.0.0.1:{args.port}/api/generate-review" + ("/stream" if args.stream else "")
+    latencies: List[float] = []
+    ttfb: List[float] = []
+    stages: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    counter = iter(range(args.requests))
+
+    async def user(session: aiohttp.ClientSession) -> None:
+        for i in counter:
+            # Distinct topics defeat the caches unless --topics limits the pool
+            topic = f"{args.topic} {i % args.topics if args.topics else i}"
+            body = {"topic": topic, "max_sources": args.max_sources, "include_timings": True}
+            started = time.perf_counter()
+            try:
+                async with session.post(url, json=body) as resp:
+                    if args.stream:
+                        first = None
+                        async for _ in resp.content.iter_any():
+                            if first is None:
+                                first = time.perf_counter() - started
+                        ttfb.append(first or 0.0)
+                        ok = resp.status == 200
+                    else:
+                        data = await resp.json()
+                        ok = resp.status == 200 and data.get("success")
+                        for stage, value in (data.get("timings") or {}).items():
+                            stages.setdefault(stage, []).append(value / 1000)
+                if not ok:
+                    errors[str(resp.status)] = errors.get(str(resp.status), 0) + 1
+                    continue
+            except Exception as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    timeout = aiohttp.ClientTimeout(total=600)
+    async with aiohttp.ClientSession(timeout=timeout, connector=aiohttp.TCPConnector(limit=0)) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*[user(session) for _ in range(args.users)])
+        elapsed = time.perf_counter() - started
+
+    report: Dict[str, Any] = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("baseline", "save")},
+        "requests": args.requests,
+        "succeeded": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency": summarize(latencies),
+        "stages": {stage: summarize(values) for stage, values in sorted(stages.items())},
+    }
+    if ttfb:
+        report["time_to_first_byte"] = summarize(ttfb)
+    return report
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of report against baseline, as human-readable lines"""
+    problems = []
+    p95, base_p95 = report["latency"]["p95_ms"], baseline["latency"]["p95_ms"]
+    if p95 is not None and base_p95 and p95 > base_p95 * (1 + tolerance):
+        problems.append(f"p95 latency {p95} ms vs baseline {base_p95} ms")
+    if report["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        problems.append(f"throughput {report['throughput_rps']} rps vs baseline {baseline['throughput_rps']} rps")
+    lag, base_lag = report["loop_lag"]["p99_ms"], baseline.get("loop_lag", {}).get("p99_ms")
+    # Small lags are noise; only flag growth past a few milliseconds
+    if lag is not None and base_lag is not None and lag > base_lag * (1 + tolerance) + 5:
+        problems.append(f"event-loop lag p99 {lag} ms vs baseline {base_lag} ms")
+    if report["succeeded"] < baseline["succeeded"]:
+        problems.append(f"{report['succeeded']} successful requests vs baseline {baseline['succeeded']}")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test the review API against local fakes")
+    parser.add_argument("--users", type=int, default=10, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=100, help="total reviews to request")
+    parser.add_argument("--topic", default="federated learning privacy")
+    parser.add_argument("--topics", type=int, default=0, help="cycle through this many topics (0 = all distinct)")
+    parser.add_argument("--max-sources", type=int, default=20)
+    parser.add_argument("--stream", action="store_true", help="use the SSE endpoint")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--provider-port", type=int, default=8766)
+    parser.add_argument("--latency", default="", help="fake provider latency, name=mean_ms:jitter_ms,...")
+    parser.add_argument("--errors", default="", help="fake provider errors, name=rate:status,...")
+    parser.add_argument("--no-latency", action="store_true", help="zero provider latency (profiles CPU paths)")
+    parser.add_argument("--payload-dir", default=None, help="recorded payloads to replay")
+    parser.add_argument("--llm-tps", type=float, default=250, help="fake LLM tokens per second")
+    parser.add_argument("--llm-ttft", type=float, default=0.4, help="fake LLM time to first token (s)")
+    parser.add_argument("--llm-tokens", type=int, default=600, help="fake LLM response length")
+    parser.add_argument("--llm-concurrency", type=int, default=16, help="LLM_MAX_CONCURRENCY for the run")
+    parser.add_argument("--save", default=None, help="write the report to this JSON file")
+    parser.add_argument("--baseline", default=None, help="compare against a saved report")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    providers = FakeProviders(parse_profiles(args.latency, args.errors, not args.no_latency), args.payload_dir)
+    provider_loop = BackgroundLoop()
+    provider_loop.run(providers.start("127.0.0.1", args.provider_port))
+    configure_environment(args, FakeProviders.base_urls("127.0.0.1", args.provider_port))
+
+    lag = LoopLagMonitor()
+    app_loop = start_app(args, lag)
+    try:
+        lag.samples.clear()
+        report = asyncio.run(drive(args))
+        report["loop_lag"] = summarize(lag.samples)
+        report["provider_requests"] = providers.stats
+    finally:
+        app_loop.server.should_exit = True
+        time.sleep(0.5)
+        app_loop.stop()
+        provider_loop.stop()
+
+    print(json.dumps(report, indent=2))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            problems = compare(report, json.load(f), args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION: {problem}", file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
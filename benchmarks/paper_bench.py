@@ -0,0 +1,200 @@
+"""Microbenchmark: 1,000-paper result sets as plain dicts vs slotted Paper records.
+
+The dict path is the one the app used before records.Paper: a dict per
+parsed paper, a copied dict per source in the response, APA lines rebuilt
+from the copies, and the response serialized through the Pydantic model.
+The record path builds Papers, takes source entries and memoized APA lines
+from them, and serializes the payload once with orjson:
+
+    python -m benchmarks.paper_bench --papers 1000 --rounds 20
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+import orjson
+from pydantic import BaseModel
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from records import Paper  # noqa: E402
+
+WORDS = ("learning", "neural", "graph", "retrieval", "model", "language", "robust", "survey",
+         "transformer", "attention", "causal", "inference", "sparse", "efficient", "federated")
+NAMES = ("Ada Lovelace", "Alan M Turing", "Grace Hopper", "Katherine Johnson", "Claude E Shannon",
+         "Barbara Liskov", "John von Neumann", "Edsger W Dijkstra")
+
+
+class LiteratureReviewResponse(BaseModel):
+    """The response model as it was used to serialize reviews"""
+    success: bool
+    review_id: str | None = None
+    review: str = None
+    sources: list = None
+    source_status: dict | None = None
+    prompt_stats: dict | None = None
+    timings: dict | None = None
+    refresh: dict | None = None
+    error: str = None
+
+
+def raw_items(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """Parsed provider fields for `count` papers"""
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        year = rng.randint(2000, 2025)
+        items.append({
+            "title": " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 12))).capitalize(),
+            "authors": rng.sample(NAMES, rng.randint(1, 6)),
+            "abstract": " ".join(rng.choice(WORDS) for _ in range(rng.randint(80, 200))),
+            "published_date": f"{year}-01-01",
+            "year": year,
+            "pdf_url": f"https://example.org/papers/{i}.pdf",
+            "arxiv_id": f"https://example.org/works/{i}",
+            "doi": f"10.5555/bench.{i}",
+            "categories": ["cs.LG"],
+            "source": "Crossref",
+        })
+    return items
+
+
+# ---- Dict path ----
+def dict_records(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [dict(item) for item in items]
+
+
+def _format_author(name: str) -> str:
+    parts = name.split()
+    if not parts:
+        return name
+    initials = ''.join([p[0].upper() + '.' for p in parts[:-1] if p])
+    return f"{parts[-1]}, {initials}" if initials else parts[-1]
+
+
+def dict_response(papers: List[Dict[str, Any]]) -> bytes:
+    sources = []
+    for paper in papers:
+        abstract = paper.get("abstract") or ""
+        sources.append({
+            "title": paper.get("title"),
+            "authors": paper.get("authors", []),
+            "year": str(paper.get("year")) if paper.get("year") else None,
+            "abstract": abstract[:200] + "..." if len(abstract) > 200 else abstract,
+            "url": paper.get("pdf_url"),
+            "arxiv_id": paper.get("arxiv_id"),
+            "source": paper.get("source")
+        })
+    lines = []
+    for s in sources:
+        authors = [_format_author(a) for a in s.get("authors") or []]
+        if not authors:
+            author_str = "Author"
+        elif len(authors) == 1:
+            author_str = authors[0]
+        elif len(authors) == 2:
+            author_str = f"{authors[0]} & {authors[1]}"
+        else:
+            author_str = ", ".join(authors[:-1]) + f", & {authors[-1]}"
+        title = (s.get("title") or "Untitled").strip().rstrip('.')
+        lines.append(f"{author_str} ({s.get('year') or 'n.d.'}). {title}. {s.get('url') or ''}".strip())
+    review = "Review body\n\nReferences (APA)\n" + "\n".join(f"- {line}" for line in lines)
+    response = LiteratureReviewResponse(success=True, review=review, sources=sources)
+    return response.model_dump_json().encode("utf-8")
+
+
+# ---- Record path ----
+def paper_records(items: List[Dict[str, Any]]) -> List[Paper]:
+    return [Paper(**item) for item in items]
+
+
+def paper_response(papers: List[Paper]) -> bytes:
+    sources = [paper.source_entry() for paper in papers]
+    review = "Review body\n\nReferences (APA)\n" + "\n".join(f"- {paper.apa_reference()}" for paper in papers)
+    return orjson.dumps({"success": True, "review_id": None, "review": review, "sources": sources,
+                         "source_status": None, "prompt_stats": None, "timings": None,
+                         "refresh": None, "error": None})
+
+
+def retained_bytes(build: Callable[[], Any]) -> int:
+    """Memory still held by build()'s result"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def cpu_ms(fn: Callable[[], Any], rounds: int) -> float:
+    """Median process time of fn over rounds, in ms"""
+    samples = []
+    for _ in range(rounds):
+        started = time.process_time()
+        fn()
+        samples.append(time.process_time() - started)
+    samples.sort()
+    return round(samples[len(samples) // 2] * 1000, 3)
+
+
+def run(count: int, rounds: int) -> Dict[str, Any]:
+    items = raw_items(count)
+    dicts, papers = dict_records(items), paper_records(items)
+    if json.loads(dict_response(dicts)) != json.loads(paper_response(papers)):
+        raise AssertionError("the two paths produced different responses")
+
+    def fresh_papers() -> List[Paper]:
+        # A fresh result set per round, so the APA memo doesn't carry over
+        return paper_records(items)
+
+    report = {
+        "papers": count,
+        "records_kib": {
+            "dict": round(retained_bytes(lambda: dict_records(items)) / 1024, 1),
+            "paper": round(retained_bytes(lambda: paper_records(items)) / 1024, 1),
+        },
+        "build_ms": {
+            "dict": cpu_ms(lambda: dict_records(items), rounds),
+            "paper": cpu_ms(lambda: paper_records(items), rounds),
+        },
+        "end_to_end_ms": {
+            "dict": cpu_ms(lambda: dict_response(dict_records(items)), rounds),
+            "paper": cpu_ms(lambda: paper_response(fresh_papers()), rounds),
+        },
+        # Refreshes and retries format the same stored records again
+        "repeat_response_ms": {
+            "dict": cpu_ms(lambda: dict_response(dicts), rounds),
+            "paper": cpu_ms(lambda: paper_response(papers), rounds),
+        },
+    }
+    for metric in ("records_kib", "build_ms", "end_to_end_ms", "repeat_response_ms"):
+        values = report[metric]
+        values["saved_pct"] = round(100 * (1 - values["paper"] / values["dict"]), 1) if values["dict"] else 0.0
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare dict and Paper result sets: memory and CPU")
+    parser.add_argument("--papers", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--save", default=None, help="write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = run(args.papers, args.rounds)
+    print(json.dumps(report, indent=2))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Load test for /api/process-payment against the fake Intasend gateway.
+
+Each checkout gets one idempotency key and is submitted --duplicates times at
+once (double clicks, client retries). Meanwhile /api/health is probed, to
+show that a slow gateway doesn't hold up the rest of the app. Exits
+non-zero if any checkout was charged more than once or its duplicates got
+different transaction IDs:
+
+    python -m benchmarks.payment_bench --checkouts 200 --users 20 --duplicates 3 --latency 1500:300
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import tempfile
+from typing import Any, Dict, List
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.fake_payments import FakeGateway, parse_pair  # noqa: E402
+from benchmarks.load_test import BackgroundLoop, LoopLagMonitor, start_app, summarize  # noqa: E402
+
+CARD = {"firstName": "Ada", "lastName": "Banda", "email": "ada@example.com", "phone": "+260970000000",
+        "cardNumber": "4242424242424242", "expiryDate": "12/30", "cvv": "123",
+        "plan": "pro", "price": "19", "billing": "monthly"}
+
+
+def configure_environment(gateway_url: str) -> None:
+    state_dir = tempfile.mkdtemp(prefix="litreview-payments-")
+    os.environ.update({
+        "GROQ_API_KEY": os.getenv("GROQ_API_KEY") or "benchmark",
+        "INTASEND_API_KEY": "benchmark",
+        "INTASEND_API_URL": gateway_url,
+        "PAYMENT_IDEMPOTENCY_DB": os.path.join(state_dir, "payments.db"),
+        "JOB_DB": os.path.join(state_dir, "jobs.db"),
+        "AGENT_WARMUP": "off",
+    })
+
+
+async def drive(args: argparse.Namespace) -> Dict[str, Any]:
+    url = f"http://127.0.0.1:{args.port}/api/process-payment"
+    health_url = f"http://127.0.0.1:{args.port}/api/health"
+    latencies: List[float] = []
+    health: List[float] = []
+    errors: Dict[str, int] = {}
+    outcomes = {"charged": 0, "inconsistent": 0}
+    counter = iter(range(args.checkouts))
+
+    async def submit(session: aiohttp.ClientSession, key: str) -> Any:
+        started = time.perf_counter()
+        async with session.post(url, json=CARD, headers={"Idempotency-Key": key}) as resp:
+            data = await resp.json()
+        latencies.append(time.perf_counter() - started)
+        if resp.status != 200:
+            errors[str(resp.status)] = errors.get(str(resp.status), 0) + 1
+            return None
+        return data["transaction_id"]
+
+    async def user(session: aiohttp.ClientSession) -> None:
+        for _ in counter:
+            key = uuid.uuid4().hex
+            results = await asyncio.gather(*[submit(session, key) for _ in range(args.duplicates)],
+                                           return_exceptions=True)
+            ids = {r for r in results if isinstance(r, str)}
+            outcomes["charged"] += bool(ids)
+            outcomes["inconsistent"] += len(ids) > 1
+
+    async def probe(session: aiohttp.ClientSession) -> None:
+        while True:
+            started = time.perf_counter()
+            async with session.get(health_url) as resp:
+                await resp.read()
+            health.append(time.perf_counter() - started)
+            await asyncio.sleep(0.02)
+
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120),
+                                     connector=aiohttp.TCPConnector(limit=0)) as session:
+        prober = asyncio.ensure_future(probe(session))
+        started = time.perf_counter()
+        await asyncio.gather(*[user(session) for _ in range(args.users)])
+        elapsed = time.perf_counter() - started
+        prober.cancel()
+
+    return {
+        "config": {k: v for k, v in vars(args).items() if k != "save"},
+        "checkouts": args.checkouts,
+        "charged_checkouts": outcomes["charged"],
+        "inconsistent_checkouts": outcomes["inconsistent"],
+        "errors": errors,
+        "elapsed_s": round(elapsed, 2),
+        "payment_latency": summarize(latencies),
+        "health_latency": summarize(health),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test the payment endpoint against a fake gateway")
+    parser.add_argument("--checkouts", type=int, default=100)
+    parser.add_argument("--users", type=int, default=10, help="concurrent checkouts")
+    parser.add_argument("--duplicates", type=int, default=3, help="simultaneous submissions per checkout")
+    parser.add_argument("--latency", default="", help="gateway mean_ms:jitter_ms (default 600:200)")
+    parser.add_argument("--errors", default="", help="gateway rate:status, e.g. 0.05:503")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--gateway-port", type=int, default=8767)
+    parser.add_argument("--save", default=None, help="write the report to this JSON file")
+    args = parser.parse_args()
+
+    latency, jitter = parse_pair(args.latency, (600, 200))
+    error_rate, error_status = parse_pair(args.errors, (0, 503))
+    gateway = FakeGateway(latency, jitter, error_rate, int(error_status))
+    gateway_loop = BackgroundLoop()
+    gateway_loop.run(gateway.start("127.0.0.1", args.gateway_port))
+    configure_environment(FakeGateway.base_url("127.0.0.1", args.gateway_port))
+
+    lag = LoopLagMonitor()
+    app_args = argparse.Namespace(port=args.port, llm_tps=250, llm_ttft=0.4, llm_tokens=600)
+    app_loop = start_app(app_args, lag)
+    try:
+        lag.samples.clear()
+        report = asyncio.run(drive(args))
+        report["loop_lag"] = summarize(lag.samples)
+        report["gateway"] = {**gateway.stats, "keys_sent_more_than_once": len(gateway.duplicate_keys())}
+    finally:
+        app_loop.server.should_exit = True
+        time.sleep(0.5)
+        app_loop.stop()
+        gateway_loop.stop()
+
+    # Every charged checkout must map to exactly one gateway charge
+    report["duplicate_charges"] = report["gateway"]["charges"] - report["charged_checkouts"]
+    print(json.dumps(report, indent=2))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if report["duplicate_charges"] or report["inconsistent_checkouts"]:
+        print("FAILED: a checkout was charged more than once", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""Record real provider responses for replay by fake_providers.py (needs network access).
+
+    python -m benchmarks.record_payloads "federated learning privacy" --count 50 --out benchmarks/payloads
+"""
+import os
+import json
+import asyncio
+import argparse
+
+import aiohttp
+
+REQUESTS = {
+    "arxiv": ("https://export.arxiv.org/api/query",
+              lambda topic, n: {"search_query": f"all:\"{topic}\"", "max_results": n}),
+    "openalex": ("https://api.openalex.org/works",
+                 lambda topic, n: {"search": topic, "per_page": n}),
+    "crossref": ("https://api.crossref.org/works",
+                 lambda topic, n: {"query": topic, "rows": n}),
+    "semantic_scholar": ("https://api.semanticscholar.org/graph/v1/paper/search",
+                         lambda topic, n: {"query": topic, "limit": n,
+                                           "fields": "title,abstract,authors,year,openAccessPdf,url,externalIds"}),
+}
+
+
+async def record(topic: str, count: int, out: str) -> None:
+    os.makedirs(out, exist_ok=True)
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60)) as session:
+        for provider, (url, params) in REQUESTS.items():
+            async with session.get(url, params=params(topic, count)) as resp:
+                resp.raise_for_status()
+                if provider == "arxiv":
+                    path = os.path.join(out, "arxiv.xml")
+                    with open(path, "w", encoding="utf-8") as f:
+                        f.write(await resp.text())
+                else:
+                    path = os.path.join(out, f"{provider}.json")
+                    with open(path, "w", encoding="utf-8") as f:
+                        json.dump(await resp.json(), f)
+            print(f"{provider}: {path}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Record provider payloads for offline benchmarks")
+    parser.add_argument("topic")
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--out", default=os.path.join(os.path.dirname(__file__), "payloads"))
+    args = parser.parse_args()
+    asyncio.run(record(args.topic, args.count, args.out))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Cold-start benchmark: `import app` time and time from process launch to the first healthy response.
+
+Each run is a fresh interpreter, so nothing is shared with earlier runs.
+With --baseline it exits non-zero when either median regresses beyond
+--tolerance:
+
+    python -m benchmarks.startup_bench --runs 5 --save startup.json
+    python -m benchmarks.startup_bench --runs 5 --baseline startup.json
+    python -m benchmarks.startup_bench --breakdown    # slowest imports under `import app`
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+from typing import Any, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app; print(time.perf_counter() - t)"
+
+
+def bench_environment(warmup: str) -> Dict[str, str]:
+    """A child environment with throwaway state and no network-dependent settings"""
+    state_dir = tempfile.mkdtemp(prefix="litreview-startup-")
+    env = dict(os.environ)
+    env.update({
+        "GROQ_API_KEY": os.getenv("GROQ_API_KEY") or "benchmark",
+        "SEARCH_CACHE_DB": os.path.join(state_dir, "search.db"),
+        "LLM_CACHE_DB": os.path.join(state_dir, "llm.db"),
+        "CITATION_CACHE_DB": os.path.join(state_dir, "citations.db"),
+        "CORPUS_DB": os.path.join(state_dir, "corpus.db"),
+        "JOB_DB": os.path.join(state_dir, "jobs.db"),
+        "REVIEW_DB": os.path.join(state_dir, "reviews.db"),
+        "PAYMENT_IDEMPOTENCY_DB": os.path.join(state_dir, "payments.db"),
+        "FULLTEXT_CACHE_DIR": os.path.join(state_dir, "fulltext"),
+        "FULLTEXT_INDEX_DB": os.path.join(state_dir, "fulltext.db"),
+        "ASSET_BUILD_DIR": os.path.join(state_dir, "assets"),
+        "AGENT_WARMUP": warmup,
+    })
+    return env
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_import(env: Dict[str, str]) -> float:
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def measure_first_healthy(env: Dict[str, str], timeout: float = 60) -> float:
+    """Seconds from spawning uvicorn to a 200 from /api/health"""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/api/health"
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+                            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"server exited with status {proc.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError("server did not become healthy")
+    finally:
+        proc.terminate()
+        proc.wait(10)
+
+
+def import_breakdown(env: Dict[str, str], top: int = 15) -> List[Tuple[str, float]]:
+    """Slowest modules by cumulative import time (ms), from python -X importtime"""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((parts[2].strip(), int(parts[1]) / 1000))
+    return sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {"median_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+            "min_ms": round(ordered[0] * 1000, 1), "max_ms": round(ordered[-1] * 1000, 1)}
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of report against baseline, as human-readable lines"""
+    problems = []
+    for metric in ("import", "first_healthy"):
+        value, base = report[metric]["median_ms"], baseline.get(metric, {}).get("median_ms")
+        # A few tens of milliseconds is process-spawn noise
+        if base and value > base * (1 + tolerance) + 50:
+            problems.append(f"{metric} median {value} ms vs baseline {base} ms")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure app import time and time to first healthy response")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", default="background", help="AGENT_WARMUP for the runs (background, blocking, off)")
+    parser.add_argument("--breakdown", action="store_true", help="also list the slowest imports")
+    parser.add_argument("--save", default=None, help="write the report to this JSON file")
+    parser.add_argument("--baseline", default=None, help="compare against a saved report")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    env = bench_environment(args.warmup)
+    # One untimed run so bytecode compilation doesn't count against the first sample
+    measure_import(env)
+    report: Dict[str, Any] = {
+        "config": {"runs": args.runs, "warmup": args.warmup, "python": sys.version.split()[0]},
+        "import": summarize([measure_import(env) for _ in range(args.runs)]),
+        "first_healthy": summarize([measure_first_healthy(env) for _ in range(args.runs)]),
+    }
+    if args.breakdown:
+        report["slowest_imports_ms"] = dict(import_breakdown(env))
+
+    print(json.dumps(report, indent=2))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            problems = compare(report, json.load(f), args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION: {problem}", file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+import os
+import re
+import json
+import hashlib
+import time
+import sqlite3
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def normalize_topic(topic: str) -> str:
+    """Case-fold a topic and collapse punctuation/whitespace so equivalent queries share a key"""
+    return " ".join(re.sub(r"[^\w\s]", " ", (topic or "").casefold()).split())
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable SHA-256 over JSON-encoded parts, for content-addressed keys"""
+    payload = json.dumps(parts, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TieredCache:
+    """In-memory LRU with TTLs, optionally backed by a SQLite file shared between workers.
+
+    Values must be JSON serialisable. They are stored encoded, which keeps the
+    byte accounting exact and hands every caller its own copy on a hit.
+
+    The disk tier keeps a running byte total instead of summing the table on
+    every write: expired rows are swept, and the total resynced with what
+    other workers wrote, every `sweep_interval` seconds or when the total goes
+    over budget. Each thread reuses one SQLite connection.
+    """
+
+    def __init__(self, namespace: str, ttl: float = 3600, max_bytes: int = 32 * 1024 * 1024,
+                 db_path: Optional[str] = None, disk_max_bytes: int = 256 * 1024 * 1024,
+                 sweep_interval: float = 300):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.db_path = db_path or None
+        self.disk_max_bytes = disk_max_bytes
+        self.sweep_interval = sweep_interval
+
+        # key -> (expires_at, encoded value)
+        self._memory: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        # Disk tier: estimated bytes in this namespace, next sweep time, per-thread connections
+        self._disk_bytes = 0
+        self._next_sweep = 0.0
+        self._disk_lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "disk_evictions": 0,
+            "disk_sweeps": 0,
+            "disk_errors": 0,
+        }
+        if self.db_path:
+            self._init_db()
+
+    @classmethod
+    def from_env(cls, prefix: str, namespace: str, default_ttl: float = 3600,
+                 default_db_path: str = "") -> "TieredCache":
+        """Build a cache configured from <PREFIX>_TTL, _MAX_BYTES, _DB and _DISK_MAX_BYTES"""
+        return cls(
+            namespace=namespace,
+            ttl=float(os.getenv(f"{prefix}_TTL", str(default_ttl))),
+            max_bytes=int(os.getenv(f"{prefix}_MAX_BYTES", str(32 * 1024 * 1024))),
+            db_path=os.getenv(f"{prefix}_DB", default_db_path),
+            disk_max_bytes=int(os.getenv(f"{prefix}_DISK_MAX_BYTES", str(256 * 1024 * 1024))),
+        )
+
+    # -------------------- Public API --------------------
+    async def get(self, key: Any) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss"""
+        skey = self._key(key)
+        now = time.time()
+        entry = self._memory.get(skey)
+        if entry is not None:
+            expires_at, blob = entry
+            if expires_at > now:
+                self._memory.move_to_end(skey)
+                self._stats["hits"] += 1
+                return json.loads(blob)
+            self._drop(skey)
+            self._stats["expirations"] += 1
+
+        if self.db_path:
+            row = await asyncio.to_thread(self._disk_get, skey, now)
+            if row is not None:
+                expires_at, blob = row
+                self._memory_set(skey, blob, expires_at)
+                self._stats["disk_hits"] += 1
+                return json.loads(blob)
+
+        self._stats["misses"] += 1
+        return None
+
+    async def set(self, key: Any, value: Any, ttl: Optional[float] = None) -> None:
+        """Store value under key in both tiers"""
+        skey = self._key(key)
+        blob = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        self._memory_set(skey, blob, expires_at)
+        if self.db_path:
+            await asyncio.to_thread(self._disk_set, skey, blob, expires_at)
+
+    def clear(self) -> None:
+        """Drop the in-memory tier"""
+        self._memory.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus current memory usage"""
+        return {
+            **self._stats,
+            "entries": len(self._memory),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "disk_enabled": bool(self.db_path),
+            "disk_bytes": self._disk_bytes,
+        }
+
+    # -------------------- Memory Tier --------------------
+    def _key(self, key: Any) -> str:
+        return key if isinstance(key, str) else json.dumps(key, separators=(",", ":"), sort_keys=True)
+
+    def _drop(self, skey: str) -> None:
+        _, blob = self._memory.pop(skey)
+        self._bytes -= len(blob)
+
+    def _memory_set(self, skey: str, blob: bytes, expires_at: float) -> None:
+        if len(blob) > self.max_bytes:
+            return
+        if skey in self._memory:
+            self._drop(skey)
+        self._memory[skey] = (expires_at, blob)
+        self._bytes += len(blob)
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._memory))
+            self._drop(oldest)
+            self._stats["evictions"] += 1
+
+    # -------------------- Disk Tier --------------------
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute("PRAGMA busy_timeout=10000")
+        return conn
+
+    def _init_db(self) -> None:
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            # WAL lets several uvicorn workers read while one writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )"""
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_entries_lru ON cache_entries (namespace, accessed_at)"
+            )
+        conn.close()
+
+    def _conn(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _reset_conn(self) -> None:
+        """Close this thread's connection after an error, so the next call opens a fresh one"""
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def _disk_get(self, skey: str, now: float) -> Optional[Tuple[float, bytes]]:
+        try:
+            conn = self._conn()
+            with conn:
+                row = conn.execute(
+                    "SELECT expires_at, value FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, skey),
+                ).fetchone()
+                if row is None:
+                    return None
+                if row[0] <= now:
+                    conn.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                        (self.namespace, skey),
+                    )
+                    with self._disk_lock:
+                        self._disk_bytes -= len(row[1])
+                    return None
+                conn.execute(
+                    "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                    (now, self.namespace, skey),
+                )
+                return row[0], bytes(row[1])
+        except sqlite3.Error as e:
+            self._reset_conn()
+            self._stats["disk_errors"] += 1
+            print(f"Cache disk read error ({self.namespace}): {e}")
+            return None
+
+    def _disk_set(self, skey: str, blob: bytes, expires_at: float) -> None:
+        if len(blob) > self.disk_max_bytes:
+            return
+        now = time.time()
+        try:
+            conn = self._conn()
+            with conn:
+                old = conn.execute(
+                    "SELECT size FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, skey),
+                ).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (namespace, key, value, size, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.namespace, skey, blob, len(blob), expires_at, now),
+                )
+            with self._disk_lock:
+                self._disk_bytes += len(blob) - (old[0] if old else 0)
+                due = self._disk_bytes > self.disk_max_bytes or now >= self._next_sweep
+                if due:
+                    self._next_sweep = now + self.sweep_interval
+            if due:
+                self._disk_sweep(conn, now)
+        except sqlite3.Error as e:
+            self._reset_conn()
+            self._stats["disk_errors"] += 1
+            print(f"Cache disk write error ({self.namespace}): {e}")
+
+    def _disk_sweep(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired rows, recount the namespace and evict least recently used rows if over budget"""
+        self._stats["disk_sweeps"] += 1
+        with conn:
+            conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?",
+                (self.namespace, now),
+            )
+            total = conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?",
+                (self.namespace,),
+            ).fetchone()[0]
+            if total > self.disk_max_bytes:
+                total = self._disk_evict(conn, total)
+        with self._disk_lock:
+            self._disk_bytes = total
+
+    def _disk_evict(self, conn: sqlite3.Connection, total: int) -> int:
+        """Evict down to 90% of the budget, so the next few writes don't each trigger a sweep; returns the new total"""
+        target = self.disk_max_bytes * 0.9
+        rows = conn.execute(
+            "SELECT key, size FROM cache_entries WHERE namespace = ? ORDER BY accessed_at ASC",
+            (self.namespace,),
+        )
+        victims = []
+        for key, size in rows:
+            if total <= target:
+                break
+            victims.append((self.namespace, key))
+            total -= size
+        conn.executemany("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", victims)
+        self._stats["disk_evictions"] += len(victims)
+        return total
@@ -0,0 +1,307 @@
+import os
+import re
+import time
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from cache import TieredCache
+from corpus import paper_key
+from dedup import dedupe_papers, normalize_arxiv_id, normalize_doi
+from ranking import rank_papers
+from records import Paper, openalex_record, semantic_scholar_record
+from resilience import ProviderGuard
+
+OPENALEX_ID_RE = re.compile(r"openalex\.org/(W\d+)", re.IGNORECASE)
+# Work fields needed by openalex_record, plus the outgoing edges
+OPENALEX_SELECT = "id,doi,title,abstract_inverted_index,authorships,publication_year,primary_location,referenced_works"
+# OpenAlex accepts up to 50 OR'd values per filter; the batch endpoint takes up to 500 IDs
+OPENALEX_FILTER_MAX = 50
+S2_BATCH_MAX = 500
+S2_PAPER_FIELDS = ("title", "abstract", "authors", "year", "openAccessPdf", "url", "externalIds")
+
+
+def openalex_work_id(paper: Paper) -> Optional[str]:
+    """Short OpenAlex work ID ("W123") from a record's URLs, or None"""
+    for field in ("arxiv_id", "pdf_url"):
+        match = OPENALEX_ID_RE.search(getattr(paper, field) or "")
+        if match:
+            return match.group(1).upper()
+    return None
+
+
+def semantic_scholar_id(paper: Paper) -> Optional[str]:
+    """Identifier the Semantic Scholar batch endpoint accepts (DOI:, ARXIV: or paper ID), or None"""
+    doi = normalize_doi(paper.doi)
+    if doi:
+        return f"DOI:{doi}"
+    arxiv_id = normalize_arxiv_id(paper.arxiv_id) or normalize_arxiv_id(paper.pdf_url)
+    if arxiv_id:
+        return f"ARXIV:{arxiv_id}"
+    url = paper.arxiv_id or ""
+    if "semanticscholar.org/paper/" in url:
+        return url.rstrip("/").rsplit("/", 1)[-1]
+    return None
+
+
+def _chunks(items: List[Any], size: int) -> List[List[Any]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class CitationExpander:
+    """Grows a ranked candidate pool along the citation graph.
+
+    For each seed it collects referenced and citing works from OpenAlex and
+    Semantic Scholar using bulk lookups (OR'd ID filters, the paper batch
+    endpoint), so one level costs a handful of requests regardless of the
+    number of seeds. Each seed's neighbours are cached by paper key; the
+    fan-out, depth and time budget bound how much of the graph is walked.
+    """
+
+    def __init__(self, openalex_base_url: str, semantic_scholar_base_url: str,
+                 guards: Dict[str, ProviderGuard], cache: TieredCache,
+                 timeout: aiohttp.ClientTimeout, max_seeds: int = 5, fan_out: int = 10,
+                 depth: int = 1, budget: float = 8.0, concurrency: int = 4, max_neighbours: int = 50):
+        self.openalex_base_url = openalex_base_url
+        self.semantic_scholar_base_url = semantic_scholar_base_url
+        self.guards = guards
+        self.cache = cache
+        self.timeout = timeout
+        self.max_seeds = max_seeds
+        self.fan_out = fan_out
+        self.depth = depth
+        self.budget = budget
+        self.concurrency = concurrency
+        self.max_neighbours = max_neighbours
+
+    @classmethod
+    def from_env(cls, openalex_base_url: str, semantic_scholar_base_url: str,
+                 guards: Dict[str, ProviderGuard], timeout: aiohttp.ClientTimeout) -> "CitationExpander":
+        """Expander configured from CITATION_* and the CITATION_CACHE_* cache settings"""
+        return cls(
+            openalex_base_url,
+            semantic_scholar_base_url,
+            guards,
+            TieredCache.from_env("CITATION_CACHE", namespace="citations", default_ttl=7 * 24 * 3600,
+                                 default_db_path=".cache/citations.db"),
+            timeout,
+            max_seeds=int(os.getenv("CITATION_SEEDS", "5")),
+            fan_out=int(os.getenv("CITATION_FANOUT", "10")),
+            depth=int(os.getenv("CITATION_DEPTH", "1")),
+            budget=float(os.getenv("CITATION_BUDGET", "8")),
+            concurrency=int(os.getenv("CITATION_CONCURRENCY", "4")),
+        )
+
+    async def expand(self, session: aiohttp.ClientSession, seeds: List[Paper], topic: str,
+                     objectives: str = "", budget: Optional[float] = None
+                     ) -> Tuple[List[Paper], Dict[str, Any]]:
+        """Papers reachable from the top seeds within the depth and time budget, plus expansion stats.
+
+        Every level keeps the fan_out neighbours of each seed that rank best
+        against the topic; the best max_seeds of those seed the next level.
+        Papers already in the pool are never returned again.
+        """
+        started = time.monotonic()
+        deadline = started + (self.budget if budget is None else budget)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        stats = {"status": "ok", "seeds": 0, "levels": 0, "cached": 0, "fetched": 0,
+                 "requests": 0, "count": 0, "complete": True}
+        seen = {paper_key(p) for p in seeds}
+        frontier = [p for p in seeds[:self.max_seeds] if paper_key(p)]
+        found: List[Paper] = []
+        for _ in range(self.depth):
+            remaining = deadline - time.monotonic()
+            if not frontier or remaining <= 0:
+                stats["complete"] = stats["complete"] and not frontier
+                break
+            stats["seeds"] += len(frontier)
+            stats["levels"] += 1
+            edges = await self._edges(session, frontier, remaining, semaphore, stats)
+            level: List[Paper] = []
+            for seed in frontier:
+                neighbours = []
+                for paper in edges.get(paper_key(seed), []):
+                    key = paper_key(paper)
+                    if key and key not in seen:
+                        neighbours.append(paper)
+                for paper in rank_papers(neighbours, topic, objectives)[:self.fan_out]:
+                    seen.add(paper_key(paper))
+                    level.append(paper)
+            found.extend(level)
+            frontier = rank_papers(level, topic, objectives)[:self.max_seeds]
+        stats["count"] = len(found)
+        stats["elapsed_ms"] = round((time.monotonic() - started) * 1000)
+        if not found:
+            stats["status"] = "empty"
+        return found, stats
+
+    async def _edges(self, session: aiohttp.ClientSession, seeds: List[Paper], timeout: float,
+                     semaphore: asyncio.Semaphore, stats: Dict[str, Any]) -> Dict[str, List[Paper]]:
+        """Neighbours of each seed by paper key: cached where possible, the rest fetched in bulk"""
+        keys = [paper_key(seed) for seed in seeds]
+        hits = await asyncio.gather(*(self.cache.get(self._cache_key(key)) for key in keys))
+        edges: Dict[str, List[Paper]] = {}
+        missing = []
+        for key, seed, hit in zip(keys, seeds, hits):
+            if hit is not None:
+                edges[key] = [Paper.from_dict(d) for d in hit]
+                stats["cached"] += 1
+            else:
+                missing.append(seed)
+        if not missing:
+            return edges
+
+        tasks = [
+            asyncio.ensure_future(self._openalex_edges(session, missing, semaphore, stats)),
+            asyncio.ensure_future(self._semantic_scholar_edges(session, missing, semaphore, stats)),
+        ]
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        fetched: Dict[str, List[Paper]] = {}
+        complete = not pending
+        for task in done:
+            if task.exception() is not None:
+                print(f"Citation lookup error: {task.exception()}")
+                complete = False
+                continue
+            for key, papers in task.result().items():
+                fetched.setdefault(key, []).extend(papers)
+        if not complete:
+            stats["complete"] = False
+
+        for seed in missing:
+            key = paper_key(seed)
+            edges[key] = dedupe_papers(fetched.get(key, []))
+            stats["fetched"] += 1
+            # Only cache neighbour lists both providers answered for
+            if complete:
+                await self.cache.set(self._cache_key(key), [p.to_dict() for p in edges[key]])
+        return edges
+
+    def _cache_key(self, key: str) -> List[Any]:
+        return ["edges", key, self.max_neighbours]
+
+    async def _get_json(self, session: aiohttp.ClientSession, source: str, semaphore: asyncio.Semaphore,
+                        stats: Dict[str, Any], method: str, url: str, **kwargs: Any) -> Any:
+        """One provider request, bounded by the semaphore and run under the provider's guard"""
+        async def call():
+            async with session.request(method, url, timeout=self.timeout, **kwargs) as resp:
+                resp.raise_for_status()
+                return await resp.json()
+
+        async with semaphore:
+            stats["requests"] += 1
+            return await self.guards[source].call(call)
+
+    async def _openalex_works(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                              stats: Dict[str, Any], filter_: str, per_page: int,
+                              sort: Optional[str] = None) -> List[Dict[str, Any]]:
+        params = {"filter": filter_, "per_page": per_page, "select": OPENALEX_SELECT}
+        if sort:
+            params["sort"] = sort
+        data = await self._get_json(session, "openalex", semaphore, stats, "GET",
+                                    f"{self.openalex_base_url}/works", params=params)
+        return data.get("results", [])
+
+    async def _openalex_edges(self, session: aiohttp.ClientSession, seeds: List[Paper],
+                              semaphore: asyncio.Semaphore, stats: Dict[str, Any]
+                              ) -> Dict[str, List[Paper]]:
+        """References and citations of the seeds from OpenAlex, in three rounds of OR'd filter lookups"""
+        by_work: Dict[str, str] = {}
+        by_doi: Dict[str, str] = {}
+        for seed in seeds:
+            work_id = openalex_work_id(seed)
+            doi = normalize_doi(seed.doi)
+            if work_id:
+                by_work[work_id] = paper_key(seed)
+            elif doi:
+                by_doi[doi] = paper_key(seed)
+        if not by_work and not by_doi:
+            return {}
+
+        # 1. Resolve the seeds to works, which carries their reference lists
+        lookups = [f"openalex:{'|'.join(chunk)}" for chunk in _chunks(list(by_work), OPENALEX_FILTER_MAX)]
+        lookups += [f"doi:{'|'.join(chunk)}" for chunk in _chunks(list(by_doi), OPENALEX_FILTER_MAX)]
+        pages = await asyncio.gather(*(
+            self._openalex_works(session, semaphore, stats, lookup, OPENALEX_FILTER_MAX) for lookup in lookups
+        ))
+        seed_works: Dict[str, str] = {}
+        references: Dict[str, List[str]] = {}
+        for item in (item for page in pages for item in page):
+            match = OPENALEX_ID_RE.search(item.get("id") or "")
+            if not match:
+                continue
+            key = by_work.get(match.group(1).upper()) or by_doi.get(normalize_doi(item.get("doi")))
+            if key:
+                seed_works[match.group(1).upper()] = key
+                references[key] = [
+                    m.group(1).upper() for m in map(OPENALEX_ID_RE.search, item.get("referenced_works") or []) if m
+                ][:self.max_neighbours]
+        if not seed_works:
+            return {}
+
+        # 2. Referenced works by ID and 3. works citing any seed, concurrently
+        referenced = list(dict.fromkeys(w for ids in references.values() for w in ids))
+        reference_lookups = [
+            self._openalex_works(session, semaphore, stats, f"openalex:{'|'.join(chunk)}", OPENALEX_FILTER_MAX)
+            for chunk in _chunks(referenced, OPENALEX_FILTER_MAX)
+        ]
+        seed_chunks = _chunks(list(seed_works), OPENALEX_FILTER_MAX)
+        citing_lookups = [
+            self._openalex_works(session, semaphore, stats, f"cites:{'|'.join(chunk)}",
+                                 min(200, self.max_neighbours * len(chunk)), sort="cited_by_count:desc")
+            for chunk in seed_chunks
+        ]
+        pages = await asyncio.gather(*reference_lookups, *citing_lookups)
+        works = {}
+        for item in (item for page in pages[:len(reference_lookups)] for item in page):
+            match = OPENALEX_ID_RE.search(item.get("id") or "")
+            if match:
+                works[match.group(1).upper()] = item
+
+        edges: Dict[str, List[Paper]] = {}
+        for key, ids in references.items():
+            edges[key] = [self._neighbour(openalex_record(works[w]), "reference") for w in ids if w in works]
+        for item in (item for page in pages[len(reference_lookups):] for item in page):
+            # A citing work is attributed to every seed it references
+            cited = {m.group(1).upper() for m in map(OPENALEX_ID_RE.search, item.get("referenced_works") or []) if m}
+            for work_id in cited & set(seed_works):
+                key = seed_works[work_id]
+                if sum(1 for p in edges.get(key, []) if p.relation == "citation") < self.max_neighbours:
+                    edges.setdefault(key, []).append(self._neighbour(openalex_record(item), "citation"))
+        return edges
+
+    async def _semantic_scholar_edges(self, session: aiohttp.ClientSession, seeds: List[Paper],
+                                      semaphore: asyncio.Semaphore, stats: Dict[str, Any]
+                                      ) -> Dict[str, List[Paper]]:
+        """References and citations of the seeds from one Semantic Scholar batch request per 500 seeds"""
+        lookup = [(semantic_scholar_id(seed), paper_key(seed)) for seed in seeds]
+        lookup = [(s2_id, key) for s2_id, key in lookup if s2_id]
+        if not lookup:
+            return {}
+        fields = ",".join(f"{relation}.{field}" for relation in ("references", "citations") for field in S2_PAPER_FIELDS)
+        edges: Dict[str, List[Paper]] = {}
+        for chunk in _chunks(lookup, S2_BATCH_MAX):
+            data = await self._get_json(session, "semantic_scholar", semaphore, stats, "POST",
+                                        f"{self.semantic_scholar_base_url}/paper/batch",
+                                        params={"fields": fields}, json={"ids": [s2_id for s2_id, _ in chunk]})
+            # One entry per requested ID, null when the paper is unknown
+            for (_, key), item in zip(chunk, data or []):
+                if not item:
+                    continue
+                neighbours = edges.setdefault(key, [])
+                for relation, field in (("reference", "references"), ("citation", "citations")):
+                    for paper in (item.get(field) or [])[:self.max_neighbours]:
+                        if paper and paper.get("title"):
+                            neighbours.append(self._neighbour(semantic_scholar_record(paper), relation))
+        return edges
+
+    @staticmethod
+    def _neighbour(record: Paper, relation: str) -> Paper:
+        record.relation = relation
+        return record
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
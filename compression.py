@@ -0,0 +1,141 @@
+import zlib
+from typing import Iterable, Optional
+
+import zstandard
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Preference order when the client accepts several with the same q-value
+ENCODINGS = ("zstd", "gzip")
+
+
+def negotiate(accept_encoding: Optional[str], available: Iterable[str] = ENCODINGS) -> Optional[str]:
+    """Best of `available` for an Accept-Encoding header, or None for identity"""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """One-shot compression; the defaults favour speed for per-response use"""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level if level is not None else 3).compress(data)
+    if encoding == "gzip":
+        compressor = zlib.compressobj(level if level is not None else 6, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+    raise ValueError(f"unsupported encoding: {encoding}")
+
+
+class _StreamCompressor:
+    """Incremental compressor that flushes after every chunk, so streamed lines reach the client promptly"""
+
+    def __init__(self, encoding: str):
+        if encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=3).compressobj()
+            self._sync = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._obj = zlib.compressobj(6, zlib.DEFLATED, 31)
+            self._sync = zlib.Z_SYNC_FLUSH
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(self._sync)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+class CompressionMiddleware:
+    """zstd/gzip for JSON and NDJSON responses, negotiated from Accept-Encoding.
+
+    Bodies with a Content-Length below minimum_size are sent as they are;
+    the rest are compressed in one go once the body arrives. Responses
+    without a Content-Length (the NDJSON batch stream) are compressed chunk
+    by chunk with a flush after each one, and their headers go out at once.
+    Responses that already carry a Content-Encoding - the precompressed
+    static assets - and SSE streams are left alone.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024,
+                 content_types: Iterable[str] = ("application/json", "application/x-ndjson")):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = frozenset(content_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        compressor: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                content_type = headers.get("content-type", "").split(";")[0].strip()
+                length = headers.get("content-length")
+                if (content_type not in self.content_types or "content-encoding" in headers
+                        or (length is not None and int(length) < self.minimum_size)):
+                    passthrough = True
+                    await send(message)
+                elif length is None:
+                    # A stream: compress it as it comes, without holding back the headers
+                    headers["content-encoding"] = encoding
+                    headers.add_vary_header("Accept-Encoding")
+                    compressor = _StreamCompressor(encoding)
+                    await send(message)
+                else:
+                    # Held back until the body arrives, so its compressed length can be set
+                    start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=start["headers"])
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body:
+                    data = compress(body, encoding)
+                    headers["content-length"] = str(len(data))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": data})
+                    return
+                # A sized body sent in several chunks
+                del headers["content-length"]
+                compressor = _StreamCompressor(encoding)
+                await send(start)
+            data = compressor.chunk(body) if body else b""
+            if not more_body:
+                data += compressor.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,87 @@
+import asyncio
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Collapse concurrent calls that share a key onto one in-flight task.
+
+    The first caller starts the work; everyone arriving before it finishes
+    awaits the same task and receives the same result (or exception). Callers
+    wait through asyncio.shield, so a cancelled caller - e.g. a client that
+    disconnected - stops waiting without cancelling the work the others share.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._stats = {"started": 0, "coalesced": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+            self._stats["started"] += 1
+        else:
+            self._stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved when every caller has already gone away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "in_flight": len(self._inflight)}
+
+
+async def hedged(fn: Callable[[], Awaitable[T]], delay: float) -> T:
+    """Run fn, and if it has not finished after delay seconds race a second attempt.
+
+    Returns the first attempt to succeed; raises only when both fail. The
+    losing attempt is cancelled.
+    """
+    first = asyncio.ensure_future(fn())
+    attempts = {first}
+    try:
+        done, _ = await asyncio.wait(attempts, timeout=delay)
+        if done:
+            return first.result()
+        attempts.add(asyncio.ensure_future(fn()))
+        pending = set(attempts)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in attempts:
+            if not task.done():
+                task.cancel()
+
+
+class LatencyTracker:
+    """Rolling window of recent call durations per key"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Dict[Hashable, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, key: Hashable, seconds: float) -> None:
+        self._samples[key].append(seconds)
+
+    def quantile(self, key: Hashable, q: float) -> Optional[float]:
+        """The q-quantile of recent samples, or None until min_samples have been seen"""
+        samples = self._samples.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
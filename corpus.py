@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from cache import normalize_topic
+from dedup import merge_records, normalize_arxiv_id, normalize_doi, normalize_title
+from ranking import tokenize
+from records import Paper
+
+
+def paper_key(paper: Paper) -> Optional[str]:
+    """Stable identity for a paper across providers: DOI, then arXiv ID, then normalized title"""
+    doi = normalize_doi(paper.doi) or normalize_doi(paper.arxiv_id)
+    if doi:
+        return f"doi:{doi}"
+    arxiv_id = normalize_arxiv_id(paper.arxiv_id) or normalize_arxiv_id(paper.pdf_url)
+    if arxiv_id:
+        return f"arxiv:{arxiv_id}"
+    title = normalize_title(paper.title)
+    return f"title:{title}" if title else None
+
+
+def fts_query(text: str) -> str:
+    """FTS5 query requiring every content word of text, each as a quoted prefix term"""
+    terms = list(dict.fromkeys(tokenize(text)))
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+class PaperCorpus:
+    """Every paper the searchers have returned, in SQLite with an FTS5 index over title, abstract and authors.
+
+    Records are upserted by paper_key and merged with what is already stored,
+    so repeated fetches enrich rather than duplicate. A per-topic fetch log
+    tells callers how fresh the local results for a topic are.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.enabled = True
+        self._stats = {"searches": 0, "hits": 0, "upserts": 0, "errors": 0}
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            self._init_db()
+        except sqlite3.Error as e:
+            # Most often an SQLite build without FTS5
+            print(f"Paper corpus disabled: {e}")
+            self.enabled = False
+
+    @classmethod
+    def from_env(cls) -> Optional["PaperCorpus"]:
+        """Corpus at CORPUS_DB, or None when it is set empty"""
+        db_path = os.getenv("CORPUS_DB", ".cache/corpus.db")
+        return cls(db_path) if db_path else None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute("PRAGMA busy_timeout=10000")
+        return conn
+
+    def _init_db(self) -> None:
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    """CREATE TABLE IF NOT EXISTS papers (
+                        id INTEGER PRIMARY KEY,
+                        key TEXT NOT NULL UNIQUE,
+                        title TEXT NOT NULL,
+                        abstract TEXT NOT NULL,
+                        authors TEXT NOT NULL,
+                        year INTEGER,
+                        record TEXT NOT NULL,
+                        updated_at REAL NOT NULL
+                    )"""
+                )
+                # External-content index kept in sync by triggers
+                conn.execute(
+                    """CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+                        title, abstract, authors, content='papers', content_rowid='id'
+                    )"""
+                )
+                conn.execute(
+                    """CREATE TRIGGER IF NOT EXISTS papers_ai AFTER INSERT ON papers BEGIN
+                        INSERT INTO papers_fts(rowid, title, abstract, authors)
+                        VALUES (new.id, new.title, new.abstract, new.authors);
+                    END"""
+                )
+                conn.execute(
+                    """CREATE TRIGGER IF NOT EXISTS papers_au AFTER UPDATE ON papers BEGIN
+                        INSERT INTO papers_fts(papers_fts, rowid, title, abstract, authors)
+                        VALUES ('delete', old.id, old.title, old.abstract, old.authors);
+                        INSERT INTO papers_fts(rowid, title, abstract, authors)
+                        VALUES (new.id, new.title, new.abstract, new.authors);
+                    END"""
+                )
+                conn.execute(
+                    """CREATE TABLE IF NOT EXISTS topic_fetches (
+                        topic TEXT PRIMARY KEY,
+                        fetched_at REAL NOT NULL,
+                        count INTEGER NOT NULL
+                    )"""
+                )
+        finally:
+            conn.close()
+
+    def upsert(self, papers: List[Paper]) -> int:
+        """Insert new papers and merge repeats into their stored record; returns rows written"""
+        if not self.enabled:
+            return 0
+        incoming: Dict[str, Paper] = {}
+        for paper in papers:
+            key = paper_key(paper)
+            if key:
+                incoming[key] = merge_records([incoming[key], paper]) if key in incoming else paper
+        if not incoming:
+            return 0
+        now = time.time()
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    keys = list(incoming)
+                    existing = {}
+                    # Stay under SQLite's bound-parameter limit
+                    for start in range(0, len(keys), 500):
+                        chunk = keys[start:start + 500]
+                        rows = conn.execute(
+                            f"SELECT key, record FROM papers WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                        )
+                        existing.update((key, Paper.from_dict(json.loads(record))) for key, record in rows)
+                    rows = []
+                    for key, paper in incoming.items():
+                        if key in existing:
+                            # Stored first so its provenance leads; merge keeps the richer fields
+                            paper = merge_records([existing[key], paper])
+                        rows.append((
+                            key,
+                            paper.title or "",
+                            paper.abstract or "",
+                            ", ".join(a for a in paper.authors if a),
+                            paper.year,
+                            json.dumps(paper.to_dict()),
+                            now,
+                        ))
+                    conn.executemany(
+                        """INSERT INTO papers (key, title, abstract, authors, year, record, updated_at)
+                           VALUES (?, ?, ?, ?, ?, ?, ?)
+                           ON CONFLICT(key) DO UPDATE SET
+                               title = excluded.title, abstract = excluded.abstract, authors = excluded.authors,
+                               year = excluded.year, record = excluded.record, updated_at = excluded.updated_at""",
+                        rows,
+                    )
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            self._stats["errors"] += 1
+            print(f"Corpus write error: {e}")
+            return 0
+        self._stats["upserts"] += len(rows)
+        return len(rows)
+
+    def search(self, topic: str, limit: int = 50) -> List[Paper]:
+        """Stored papers matching every topic term, best BM25 match first (title weighted highest)"""
+        query = fts_query(topic)
+        if not self.enabled or not query:
+            return []
+        self._stats["searches"] += 1
+        try:
+            conn = self._connect()
+            try:
+                rows = conn.execute(
+                    """SELECT p.record FROM papers_fts
+                       JOIN papers p ON p.id = papers_fts.rowid
+                       WHERE papers_fts MATCH ?
+                       ORDER BY bm25(papers_fts, 3.0, 1.0, 0.5)
+                       LIMIT ?""",
+                    (query, int(limit)),
+                ).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            self._stats["errors"] += 1
+            print(f"Corpus search error: {e}")
+            return []
+        if rows:
+            self._stats["hits"] += 1
+        return [Paper.from_dict(json.loads(record)) for (record,) in rows]
+
+    def record_fetch(self, topic: str, count: int) -> None:
+        """Note that topic was just fetched from the remote providers"""
+        if not self.enabled:
+            return
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO topic_fetches (topic, fetched_at, count) VALUES (?, ?, ?)",
+                        (normalize_topic(topic), time.time(), count),
+                    )
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            self._stats["errors"] += 1
+            print(f"Corpus write error: {e}")
+
+    def last_fetch(self, topic: str) -> Optional[float]:
+        """Unix time topic was last fetched remotely, or None"""
+        if not self.enabled:
+            return None
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT fetched_at FROM topic_fetches WHERE topic = ?", (normalize_topic(topic),)
+                ).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            self._stats["errors"] += 1
+            print(f"Corpus read error: {e}")
+            return None
+        return row[0] if row else None
+
+    def stats(self) -> Dict[str, Any]:
+        papers = 0
+        if self.enabled:
+            try:
+                conn = self._connect()
+                try:
+                    papers = conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+                finally:
+                    conn.close()
+            except sqlite3.Error:
+                pass
+        return {**self._stats, "papers": papers, "enabled": self.enabled}
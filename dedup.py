@@ -0,0 +1,238 @@
+import re
+import unicodedata
+from dataclasses import replace
+from typing import Dict, List, Optional, Set
+from urllib.parse import unquote
+
+import numpy as np
+
+from records import PAPER_FIELDS, Paper
+
+DOI_RE = re.compile(r"10\.\d{4,9}/[^\s?#]+", re.IGNORECASE)
+ARXIV_URL_RE = re.compile(
+    r"arxiv\.org/(?:abs|pdf)/((?:[a-z\-]+(?:\.[a-z]{2})?/\d{7})|(?:\d{4}\.\d{4,5}))", re.IGNORECASE
+)
+ARXIV_DOI_RE = re.compile(r"10\.48550/arxiv\.(\d{4}\.\d{4,5})", re.IGNORECASE)
+NUMBER_RE = re.compile(r"\d+")
+
+# MinHash/LSH parameters: 16 bands of 4 rows put the candidate threshold near
+# Jaccard 0.5; candidates are then confirmed at NEAR_DUPLICATE_THRESHOLD.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+# Multiply-shift hash family on 32-bit words: ((h ^ b) * a mod 2**32) with random odd a
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64).astype(np.uint32) | np.uint32(1)
+_PERM_B = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64).astype(np.uint32)
+_BAND_MIX = _rng.randint(0, np.iinfo(np.uint64).max, size=ROWS, dtype=np.uint64) | np.uint64(1)
+
+
+def normalize_doi(value: Optional[str]) -> Optional[str]:
+    """Bare lowercase DOI from a DOI or doi.org URL, or None"""
+    if not value:
+        return None
+    match = DOI_RE.search(unquote(value))
+    if not match:
+        return None
+    return match.group(0).lower().rstrip(".,;")
+
+
+def normalize_arxiv_id(value: Optional[str]) -> Optional[str]:
+    """arXiv identifier without version from an abs/pdf URL or arXiv DOI, or None"""
+    if not value:
+        return None
+    match = ARXIV_URL_RE.search(value) or ARXIV_DOI_RE.search(value)
+    return match.group(1).lower() if match else None
+
+
+def normalize_title(title: Optional[str]) -> str:
+    """Casefolded words of any script separated by single spaces, with accents folded off Latin letters"""
+    text = (title or "").casefold()
+    if not text.isascii():
+        kept = []
+        for c in unicodedata.normalize("NFKD", text):
+            # Drop accents on Latin letters only; other scripts need their marks (Devanagari vowel signs...)
+            if unicodedata.combining(c) and kept and kept[-1].isascii():
+                continue
+            kept.append(c)
+        text = unicodedata.normalize("NFC", "".join(kept))
+        # Letters, digits and marks of any script are kept; everything else separates words
+        text = "".join(c if unicodedata.category(c)[0] in "LNM" else " " for c in text)
+    return " ".join(re.sub(r"[^a-z0-9\u0080-\U0010ffff]+", " ", text).split())
+
+
+def title_signatures(normalized_titles: List[str]) -> np.ndarray:
+    """MinHash signatures, shape (n, NUM_PERM), over character 3-shingles of normalized titles.
+
+    Titles are laid out as UTF-32 code points, so each shingle hashes to a
+    32-bit integer and the whole batch is hashed with a few array operations.
+    """
+    texts = [t.replace(" ", "").ljust(3) for t in normalized_titles]
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+    counts = lengths - 2
+    text_starts = np.cumsum(lengths) - lengths
+    shingle_starts = np.cumsum(counts) - counts
+    chars = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32)
+    # Position of every shingle in the joined text: title start + offset within title
+    positions = np.repeat(text_starts - shingle_starts, counts) + np.arange(int(counts.sum()))
+    # Code points go up to 21 bits, so combine them polynomially (uint32 arithmetic wraps)
+    prime = np.uint32(1000003)
+    shingles = ((chars[positions] * prime) ^ chars[positions + 1]) * prime ^ chars[positions + 2]
+
+    # One row per hash function keeps the reduction contiguous; uint32
+    # multiplication wraps modulo 2**32, which is what the hash family needs
+    hashed = (shingles[None, :] ^ _PERM_B[:, None]) * _PERM_A[:, None]
+    return np.minimum.reduceat(hashed, shingle_starts, axis=1).T.astype(np.uint64)
+
+
+def _near_duplicate_pairs(signatures: np.ndarray) -> np.ndarray:
+    """Index pairs whose signatures agree on at least NEAR_DUPLICATE_THRESHOLD of positions.
+
+    LSH: rows sharing a band are candidates. Sorting each band's keys makes
+    bucket-mates adjacent, so candidates are found in O(n log n) without
+    building Python-level buckets.
+    """
+    n = signatures.shape[0]
+    if n < 2:
+        return np.empty((0, 2), dtype=np.int64)
+    bands = signatures.reshape(n, BANDS, ROWS)
+    # Fold each band's rows into one key
+    keys = (bands * _BAND_MIX).sum(axis=2)
+    candidates = []
+    for band in range(BANDS):
+        order = np.argsort(keys[:, band], kind="stable")
+        sorted_keys = keys[order, band]
+        same = np.nonzero(sorted_keys[1:] == sorted_keys[:-1])[0]
+        if same.size:
+            candidates.append(np.stack([order[same], order[same + 1]], axis=1))
+    if not candidates:
+        return np.empty((0, 2), dtype=np.int64)
+    pairs = np.sort(np.concatenate(candidates), axis=1)
+    # Encode (i, j) as one integer so duplicates across bands collapse with a 1-D unique
+    codes = np.unique(pairs[:, 0] * n + pairs[:, 1])
+    pairs = np.stack([codes // n, codes % n], axis=1)
+    agreement = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    return pairs[agreement >= NEAR_DUPLICATE_THRESHOLD]
+
+
+def _pdf_rank(url: Optional[str]) -> int:
+    """Prefer direct PDF links over landing pages over nothing"""
+    if not url:
+        return 0
+    lowered = url.lower()
+    if lowered.endswith(".pdf") or "/pdf/" in lowered:
+        return 3
+    if "arxiv.org/abs/" in lowered:
+        return 2
+    return 1
+
+
+def _years_compatible(a: Paper, b: Paper) -> bool:
+    # A preprint and its published version are usually a year apart at most
+    ya, yb = a.year, b.year
+    return not ya or not yb or abs(int(ya) - int(yb)) <= 1
+
+
+class _UnionFind:
+    """Union-find over records that also tracks each group's DOIs and arXiv IDs"""
+
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+        self.dois: List[Set[str]] = [set() for _ in range(n)]
+        self.arxiv_ids: List[Set[str]] = [set() for _ in range(n)]
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def conflicts(self, i: int, j: int) -> bool:
+        """Whether the groups of i and j carry different DOIs or different arXiv IDs"""
+        ri, rj = self.find(i), self.find(j)
+        return any(ids[ri] and ids[rj] and ids[ri].isdisjoint(ids[rj]) for ids in (self.dois, self.arxiv_ids))
+
+    def union(self, i: int, j: int) -> None:
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            # Keep the earliest record as the root so merge order is stable
+            root, child = min(ri, rj), max(ri, rj)
+            self.parent[child] = root
+            self.dois[root] |= self.dois[child]
+            self.arxiv_ids[root] |= self.arxiv_ids[child]
+
+
+def merge_records(records: List[Paper]) -> Paper:
+    """Collapse duplicate records into one, keeping the richest abstract and best PDF link"""
+    merged = replace(records[0])
+    for other in records[1:]:
+        for field in PAPER_FIELDS:
+            value = getattr(other, field)
+            if getattr(merged, field) in (None, "", []) and value not in (None, "", []):
+                setattr(merged, field, value)
+    merged.abstract = max((r.abstract or "" for r in records), key=len)
+    merged.pdf_url = max((r.pdf_url for r in records), key=_pdf_rank)
+    merged.authors = max((r.authors or [] for r in records), key=len)
+    merged.categories = list(dict.fromkeys(c for r in records for c in r.categories))
+    # Earlier merges (e.g. a stored corpus record) keep their provenance
+    merged.found_in = list(dict.fromkeys(s for r in records for s in (r.found_in or [r.source]) if s))
+    return merged
+
+
+def dedupe_papers(papers: List[Paper]) -> List[Paper]:
+    """Merge records describing the same work across providers.
+
+    Records are linked when they share a normalized DOI or arXiv ID, the same
+    normalized title, or near-identical titles by MinHash (LSH-banded, so the
+    work grows as n log n rather than n^2). Title-based links
+    also require publication years within one of each other, and are refused
+    when the two groups carry different DOIs or arXiv IDs; MinHash links also
+    need the same numbers in both titles ("Part 1" vs "Part 2", "week 12" vs
+    "week 24"). Records without a usable title are matched by identifier
+    only. Output keeps the order of each group's first record.
+    """
+    candidates = list(papers)
+    titles = [normalize_title(paper.title) for paper in candidates]
+    n = len(candidates)
+    if n == 0:
+        return []
+
+    uf = _UnionFind(n)
+    owners: Dict[str, int] = {}
+
+    def title_link_allowed(i: int, j: int) -> bool:
+        return _years_compatible(candidates[i], candidates[j]) and not uf.conflicts(i, j)
+
+    # Identifiers first, so every group knows its DOIs and arXiv IDs before titles are compared
+    for i, paper in enumerate(candidates):
+        doi = normalize_doi(paper.doi) or normalize_doi(paper.arxiv_id) or normalize_doi(paper.pdf_url)
+        arxiv_id = (normalize_arxiv_id(paper.arxiv_id) or normalize_arxiv_id(paper.pdf_url)
+                    or normalize_arxiv_id(doi))
+        if arxiv_id:
+            uf.arxiv_ids[i].add(arxiv_id)
+        # An arXiv DOI names the preprint, not a published version
+        if doi and not ARXIV_DOI_RE.match(doi):
+            uf.dois[i].add(doi)
+        for key in ([f"doi:{doi}"] if doi else []) + ([f"arxiv:{arxiv_id}"] if arxiv_id else []):
+            j = owners.setdefault(key, i)
+            if j != i:
+                uf.union(i, j)
+
+    for i, title in enumerate(titles):
+        if title:
+            j = owners.setdefault(f"title:{title}", i)
+            if j != i and title_link_allowed(i, j):
+                uf.union(i, j)
+
+    titled = [i for i, title in enumerate(titles) if title]
+    for a, b in _near_duplicate_pairs(title_signatures([titles[i] for i in titled])).tolist():
+        i, j = titled[a], titled[b]
+        if NUMBER_RE.findall(titles[i]) == NUMBER_RE.findall(titles[j]) and title_link_allowed(i, j):
+            uf.union(i, j)
+
+    groups: Dict[int, List[Paper]] = {}
+    for i, paper in enumerate(candidates):
+        groups.setdefault(uf.find(i), []).append(paper)
+    return [merge_records(group) if len(group) > 1 else group[0] for group in groups.values()]
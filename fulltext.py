@@ -0,0 +1,297 @@
+"""Open-access full text for the top-ranked papers.
+
+PDFs are downloaded from `pdf_url` with bounded concurrency, parsed and split
+into sections in a process pool (PDF parsing is CPU-bound and would stall the
+event loop), and the extracted sections are cached on disk by the SHA-256 of
+the PDF, so a paper is parsed once however many reviews cite it. pypdf is
+optional: without it the stage reports itself unavailable and reviews use
+abstracts as before.
+"""
+import io
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from cache import TieredCache
+from records import Paper
+
+PDF_MAGIC = b"%PDF-"
+# Heading line -> section name; numbered ("3.", "2.1", "IV.") and bare headings both match
+SECTION_RE = re.compile(
+    r"^(?:(?:\d+(?:\.\d+)*|[IVX]+)\.?\s+)?"
+    r"(abstract|introduction|background|related work|(?:materials and )?methods?|methodology|approach|"
+    r"experiments?|experimental (?:setup|results)|results(?: and discussion)?|evaluation|findings|"
+    r"discussion|conclusions?|concluding remarks|limitations|references|bibliography|acknowledge?ments?)"
+    r"\s*:?$",
+    re.IGNORECASE,
+)
+SECTION_NAMES = {
+    "methods": "methods", "method": "methods", "materials and methods": "methods", "materials and method": "methods",
+    "methodology": "methods", "approach": "methods", "experiments": "methods", "experiment": "methods",
+    "experimental setup": "methods",
+    "results": "results", "results and discussion": "results", "experimental results": "results",
+    "evaluation": "results", "findings": "results",
+    "discussion": "discussion", "limitations": "discussion",
+    "conclusion": "conclusion", "conclusions": "conclusion", "concluding remarks": "conclusion",
+}
+# Everything after these is back matter
+END_SECTIONS = ("references", "bibliography", "acknowledgments", "acknowledgements", "acknowledgment",
+                "acknowledgement")
+# Sections worth prompt space, in the order they are rendered
+PROMPT_SECTIONS = ("methods", "results", "discussion", "conclusion")
+
+
+def split_sections(text: str, max_chars: int = 20000) -> Dict[str, str]:
+    """Methods, results, discussion and conclusion text from extracted PDF text, keyed by section"""
+    # Rejoin words hyphenated across line breaks
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+    sections: Dict[str, List[str]] = {}
+    current: Optional[str] = None
+    for line in text.splitlines():
+        line = line.strip()
+        match = SECTION_RE.match(line) if len(line) < 60 else None
+        if match:
+            heading = " ".join(match.group(1).lower().split())
+            if heading in END_SECTIONS:
+                break
+            current = SECTION_NAMES.get(heading)
+            continue
+        if current and line:
+            sections.setdefault(current, []).append(line)
+    return {name: " ".join(" ".join(lines).split())[:max_chars] for name, lines in sections.items()}
+
+
+def extract_sections(data: bytes, max_pages: int = 40) -> Optional[Dict[str, Any]]:
+    """Parse a PDF into its sections; runs in a worker process. None when pypdf is missing"""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        return None
+    reader = PdfReader(io.BytesIO(data))
+    pages = []
+    for page in reader.pages[:max_pages]:
+        try:
+            pages.append(page.extract_text() or "")
+        except Exception:
+            # One malformed page shouldn't lose the rest of the paper
+            pages.append("")
+    sections = split_sections("\n".join(pages))
+    return {"sections": sections, "pages": len(reader.pages), "chars": sum(len(t) for t in sections.values())}
+
+
+def pypdf_available() -> bool:
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class FullTextIngester:
+    """Attaches full-text sections to the top-ranked papers that have an open-access PDF.
+
+    The URL -> content-hash index lives in a TieredCache (FULLTEXT_INDEX_*),
+    so repeat requests skip the download as well as the parse; links that
+    turned out not to be PDFs (landing pages) are remembered for a day.
+    Sections themselves are JSON files under cache_dir named by PDF hash.
+    """
+
+    def __init__(self, cache_dir: str, index: TieredCache, top_n: int = 8, concurrency: int = 4,
+                 workers: int = 2, budget: float = 20.0, timeout: float = 15.0,
+                 max_bytes: int = 20 * 1024 * 1024, max_pages: int = 40):
+        self.cache_dir = cache_dir
+        self.index = index
+        self.top_n = top_n
+        self.concurrency = concurrency
+        self.workers = workers
+        self.budget = budget
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_bytes = max_bytes
+        self.max_pages = max_pages
+        self.negative_ttl = 24 * 3600
+        self.available = pypdf_available()
+        # Started on first use, so workers that never ingest don't spawn processes
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._stats = {"downloads": 0, "parsed": 0, "cached": 0, "not_pdf": 0, "failed": 0}
+        # Latest download and parse failures, for stats()
+        self._errors: Deque[Dict[str, str]] = deque(maxlen=20)
+
+    @classmethod
+    def from_env(cls) -> "FullTextIngester":
+        """Ingester configured from FULLTEXT_* and the FULLTEXT_INDEX_* cache settings"""
+        return cls(
+            cache_dir=os.getenv("FULLTEXT_CACHE_DIR", ".cache/fulltext"),
+            index=TieredCache.from_env("FULLTEXT_INDEX", namespace="fulltext", default_ttl=30 * 24 * 3600,
+                                       default_db_path=".cache/fulltext.db"),
+            top_n=int(os.getenv("FULLTEXT_TOP_N", "8")),
+            concurrency=int(os.getenv("FULLTEXT_CONCURRENCY", "4")),
+            workers=int(os.getenv("FULLTEXT_WORKERS", str(min(4, os.cpu_count() or 1)))),
+            budget=float(os.getenv("FULLTEXT_BUDGET", "20")),
+            timeout=float(os.getenv("FULLTEXT_TIMEOUT", "15")),
+            max_bytes=int(os.getenv("FULLTEXT_MAX_BYTES", str(20 * 1024 * 1024))),
+            max_pages=int(os.getenv("FULLTEXT_MAX_PAGES", "40")),
+        )
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn, not fork: the server process has threads (to_thread, SQLite writers)
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def enrich(self, session: aiohttp.ClientSession, papers: List[Paper],
+                     budget: Optional[float] = None) -> Dict[str, Any]:
+        """Attach sections to the first top_n papers with a PDF link, within the time budget.
+
+        Returns the outcome counts, with an `errors` list ({url, error}) for
+        the papers whose download or parse failed.
+        """
+        started = time.monotonic()
+        targets = [p for p in papers[:self.top_n] if p.pdf_url]
+        if not self.available:
+            return {"status": "unavailable", "count": 0, "error": "pypdf is not installed"}
+        if not targets:
+            return {"status": "empty", "count": 0, "elapsed_ms": 0}
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = [asyncio.ensure_future(self._ingest(session, paper, semaphore)) for paper in targets]
+        done, pending = await asyncio.wait(tasks, timeout=budget or self.budget)
+        for task in pending:
+            task.cancel()
+        outcomes: Dict[str, int] = {}
+        errors: List[Dict[str, str]] = []
+        for paper, task in zip(targets, tasks):
+            if task not in done:
+                continue
+            if task.exception() is not None:
+                self._stats["failed"] += 1
+                outcome, error = "failed", f"download failed: {task.exception()!r}"
+            else:
+                outcome, error = task.result()
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            if error:
+                errors.append(self._record_error(paper.pdf_url, error))
+        count = outcomes.get("parsed", 0) + outcomes.get("cached", 0)
+        status = {
+            "status": "ok" if count else "empty",
+            "count": count,
+            "attempted": len(targets),
+            "late": len(pending),
+            **outcomes,
+            "elapsed_ms": round((time.monotonic() - started) * 1000),
+        }
+        if errors:
+            status["errors"] = errors
+        return status
+
+    def _record_error(self, url: str, error: str) -> Dict[str, str]:
+        entry = {"url": url, "error": error}
+        self._errors.append(entry)
+        return entry
+
+    async def _ingest(self, session: aiohttp.ClientSession, paper: Paper,
+                      semaphore: asyncio.Semaphore) -> Tuple[str, Optional[str]]:
+        """Sections for one paper from the index, the disk cache or a fresh download; returns (outcome, error)"""
+        entry = await self.index.get(paper.pdf_url)
+        if entry is not None:
+            if entry["digest"] is None:
+                return "skipped", None
+            cached = await asyncio.to_thread(self._read, entry["digest"])
+            if cached is not None:
+                self._stats["cached"] += 1
+                paper.sections = cached["sections"]
+                return "cached", None
+
+        async with semaphore:
+            data = await self._download(session, paper.pdf_url)
+        if data is None:
+            self._stats["not_pdf"] += 1
+            await self.index.set(paper.pdf_url, {"digest": None}, ttl=self.negative_ttl)
+            return "not_pdf", None
+
+        digest, cached = await asyncio.to_thread(self._lookup, data)
+        outcome = "cached"
+        if cached is None:
+            loop = asyncio.get_running_loop()
+            try:
+                cached = await loop.run_in_executor(self._executor(), extract_sections, data, self.max_pages)
+            except BrokenProcessPool as e:
+                # A worker died (out of memory, killed): not the PDF's fault, so start a new pool next time
+                self._stats["failed"] += 1
+                self.close()
+                return "failed", f"worker pool failed: {e}"
+            except Exception as e:
+                # Malformed or encrypted: don't fetch it again for a while
+                self._stats["failed"] += 1
+                await self.index.set(paper.pdf_url, {"digest": None}, ttl=self.negative_ttl)
+                return "failed", f"parse failed: {e}"
+            if cached is None:
+                return "failed", "pypdf is not installed in the worker"
+            await asyncio.to_thread(self._write, digest, cached)
+            outcome = "parsed"
+        self._stats[outcome] += 1
+        await self.index.set(paper.pdf_url, {"digest": digest})
+        paper.sections = cached["sections"]
+        return outcome, None
+
+    async def _download(self, session: aiohttp.ClientSession, url: str) -> Optional[bytes]:
+        """PDF bytes, or None for missing, oversized and non-PDF responses (landing pages).
+
+        Network errors and 5xx raise, so a transient failure isn't remembered as "no PDF".
+        """
+        self._stats["downloads"] += 1
+        async with session.get(url, timeout=self.timeout, headers={"Accept": "application/pdf"}) as resp:
+            if resp.status >= 500:
+                resp.raise_for_status()
+            if resp.status != 200 or (resp.content_length or 0) > self.max_bytes:
+                return None
+            data = bytearray()
+            async for chunk in resp.content.iter_chunked(64 * 1024):
+                data += chunk
+                if len(data) > self.max_bytes:
+                    return None
+                if len(data) >= len(PDF_MAGIC) and not data.startswith(PDF_MAGIC):
+                    # Stop reading as soon as it's clearly not a PDF
+                    return None
+        return bytes(data) if data.startswith(PDF_MAGIC) else None
+
+    # ---- Disk cache ----
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.json")
+
+    def _lookup(self, data: bytes) -> Tuple[str, Optional[Dict[str, Any]]]:
+        digest = hashlib.sha256(data).hexdigest()
+        return digest, self._read(digest)
+
+    def _read(self, digest: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(digest), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, digest: str, extracted: Dict[str, Any]) -> None:
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(extracted, f)
+        os.replace(tmp, path)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"available": self.available, "workers": self.workers, "pool_started": self._pool is not None,
+                **self._stats, "recent_errors": list(self._errors), "index": self.index.stats()}
@@ -34,6 +34,7 @@ class LiteratureReviewGenerator {
                             localStorage.removeItem('nzeru_plan');
                             localStorage.removeItem('nzeru_plan_amount');
                             localStorage.removeItem('nzeru_txn_id');
+                            localStorage.removeItem('nzeru_plan_token');
                             localStorage.removeItem('nzeru_plan_activated_at');
                         } catch {}
                         window.location.href = 'index.html';
@@ -109,6 +110,14 @@ class LiteratureReviewGenerator {
         } catch {}
     }
 
+    // The server reads the plan from this signed token; without one the request runs as free
+    currentPlanToken() {
+        try {
+            return localStorage.getItem('nzeru_plan_token') || null;
+        } catch {}
+        return null;
+    }
+
     async handleFormSubmit(e) {
         e.preventDefault();
         if (!this.validateForm()) return;
@@ -119,7 +128,8 @@ class LiteratureReviewGenerator {
             objectives: (formData.get('objectives') || '').trim(),
             field: formData.get('field'),
             max_sources: parseInt(formData.get('max_sources')),
-            review_length: formData.get('review_length')
+            review_length: formData.get('review_length'),
+            plan_token: this.currentPlanToken()
         };
 
         this.showLoadingState();
@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class JobQueueFull(Exception):
+    """Raised when a submission arrives while the queue is at capacity"""
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """Job rows in a local SQLite file, so status and results outlive the worker that ran them"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    """CREATE TABLE IF NOT EXISTS jobs (
+                        id TEXT PRIMARY KEY,
+                        status TEXT NOT NULL,
+                        params TEXT NOT NULL,
+                        result TEXT,
+                        error TEXT,
+                        owner_pid INTEGER,
+                        owner_boot TEXT,
+                        created_at REAL NOT NULL,
+                        started_at REAL,
+                        finished_at REAL
+                    )"""
+                )
+                columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+                if "owner_boot" not in columns:
+                    conn.execute("ALTER TABLE jobs ADD COLUMN owner_boot TEXT")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute("PRAGMA busy_timeout=10000")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _execute(self, sql: str, args: tuple = ()) -> int:
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute(sql, args).rowcount
+        finally:
+            conn.close()
+
+    def create(self, params: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        self._execute(
+            "INSERT INTO jobs (id, status, params, created_at) VALUES (?, 'queued', ?, ?)",
+            (job_id, json.dumps(params), time.time()),
+        )
+        return job_id
+
+    def delete(self, job_id: str) -> None:
+        self._execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def claim(self, job_id: str, boot_id: str) -> Optional[Dict[str, Any]]:
+        """Move a queued job to running for the queue started as boot_id; None if another worker already took it"""
+        claimed = self._execute(
+            "UPDATE jobs SET status = 'running', owner_pid = ?, owner_boot = ?, started_at = ? "
+            "WHERE id = ? AND status = 'queued'",
+            (os.getpid(), boot_id, time.time(), job_id),
+        )
+        return self.get(job_id) if claimed else None
+
+    def release(self, job_id: str, boot_id: str) -> None:
+        """Put a job this queue was running back in the queue"""
+        self._execute(
+            "UPDATE jobs SET status = 'queued', owner_pid = NULL, owner_boot = NULL, started_at = NULL "
+            "WHERE id = ? AND status = 'running' AND owner_boot = ?",
+            (job_id, boot_id),
+        )
+
+    def finish(self, job_id: str, result: Dict[str, Any]) -> None:
+        self._execute(
+            "UPDATE jobs SET status = 'succeeded', result = ?, finished_at = ? WHERE id = ?",
+            (json.dumps(result), time.time(), job_id),
+        )
+
+    def fail(self, job_id: str, error: str) -> None:
+        self._execute(
+            "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+            (error, time.time(), job_id),
+        )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def recover(self, boot_id: str) -> List[str]:
+        """Requeue jobs whose owning queue is gone and return every queued job ID, oldest first.
+
+        A row from an earlier boot is orphaned if its PID is dead or is our own:
+        in a container the server is PID 1 on every start, so a matching PID
+        doesn't mean the job is still running.
+        """
+        pid = os.getpid()
+        conn = self._connect()
+        try:
+            with conn:
+                running = conn.execute(
+                    "SELECT id, owner_pid, owner_boot FROM jobs WHERE status = 'running'"
+                ).fetchall()
+                orphans = [
+                    (row["id"],) for row in running
+                    if row["owner_boot"] != boot_id and (row["owner_pid"] == pid or not _pid_alive(row["owner_pid"]))
+                ]
+                conn.executemany(
+                    "UPDATE jobs SET status = 'queued', owner_pid = NULL, owner_boot = NULL, started_at = NULL "
+                    "WHERE id = ?",
+                    orphans,
+                )
+                rows = conn.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at").fetchall()
+        finally:
+            conn.close()
+        return [row["id"] for row in rows]
+
+    def prune(self, older_than: float) -> int:
+        """Delete finished jobs older than older_than seconds"""
+        return self._execute(
+            "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ?",
+            (time.time() - older_than,),
+        )
+
+
+class JobQueue:
+    """Bounded in-process queue feeding a fixed pool of workers, with job state kept in a JobStore.
+
+    At most `workers` jobs run at once; up to `max_queued` more wait. Further
+    submissions raise JobQueueFull so the API can answer 429 instead of
+    piling up work the process cannot finish.
+    """
+
+    def __init__(self, store: JobStore, runner: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                 workers: int = 2, max_queued: int = 100, retention: float = 7 * 24 * 3600):
+        self.store = store
+        self.runner = runner
+        self.workers = workers
+        self.retention = retention
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued)
+        self._tasks: List[asyncio.Task] = []
+        self._running = 0
+        # Identifies this queue's claims in the store; PIDs repeat across container restarts
+        self.boot_id = uuid.uuid4().hex
+        self._stats = {"submitted": 0, "rejected": 0, "succeeded": 0, "failed": 0, "recovered": 0}
+
+    @classmethod
+    def from_env(cls, runner: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]) -> "JobQueue":
+        """Configured from JOB_DB, JOB_WORKERS, JOB_QUEUE_SIZE and JOB_RETENTION"""
+        return cls(
+            JobStore(os.getenv("JOB_DB", ".cache/jobs.db")),
+            runner,
+            workers=int(os.getenv("JOB_WORKERS", "2")),
+            max_queued=int(os.getenv("JOB_QUEUE_SIZE", "100")),
+            retention=float(os.getenv("JOB_RETENTION", str(7 * 24 * 3600))),
+        )
+
+    async def start(self) -> None:
+        """Requeue unfinished jobs from the store and start the workers"""
+        await asyncio.to_thread(self.store.prune, self.retention)
+        for job_id in await asyncio.to_thread(self.store.recover, self.boot_id):
+            if self._queue.full():
+                # The rest stay queued in the store for the next restart (or another worker)
+                break
+            self._queue.put_nowait(job_id)
+            self._stats["recovered"] += 1
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, params: Dict[str, Any]) -> str:
+        """Persist and enqueue a job, returning its ID; raises JobQueueFull at capacity"""
+        if self._queue.full():
+            self._stats["rejected"] += 1
+            raise JobQueueFull(f"{self._queue.qsize()} jobs already queued")
+        job_id = await asyncio.to_thread(self.store.create, params)
+        try:
+            self._queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            # Lost a race for the last slot while the row was being written
+            await asyncio.to_thread(self.store.delete, job_id)
+            self._stats["rejected"] += 1
+            raise JobQueueFull(f"{self._queue.qsize()} jobs already queued")
+        self._stats["submitted"] += 1
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is not None and job["status"] == "queued":
+            job["queue_depth"] = self._queue.qsize()
+        return job
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = await asyncio.to_thread(self.store.claim, job_id, self.boot_id)
+                if job is None:
+                    continue
+                self._running += 1
+                try:
+                    result = await self.runner(job["params"])
+                except asyncio.CancelledError:
+                    # Shutting down: hand the job back so the next start (or another worker) runs it
+                    self.store.release(job_id, self.boot_id)
+                    raise
+                except Exception as e:
+                    print(f"Job {job_id} failed: {e}")
+                    await asyncio.to_thread(self.store.fail, job_id, str(e))
+                    self._stats["failed"] += 1
+                else:
+                    await asyncio.to_thread(self.store.finish, job_id, result)
+                    self._stats["succeeded"] += 1
+                finally:
+                    self._running -= 1
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "queued": self._queue.qsize(), "running": self._running, "workers": self.workers}
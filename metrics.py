@@ -0,0 +1,198 @@
+import time
+import bisect
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Seconds; spans a cache hit (sub-millisecond) to a long map-reduce review
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _label_str(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_label_str(self.labelnames, key)} {_format(value)}")
+        return lines
+
+
+class Gauge:
+    """Point-in-time values read from a callback at scrape time"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...],
+                 collect: Callable[[], Dict[Tuple[str, ...], float]]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        try:
+            values = self.collect()
+        except Exception as e:
+            print(f"Metrics collection error ({self.name}): {e}")
+            values = {}
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_label_str(self.labelnames, key)} {_format(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format(bound) + '"'
+                lines.append(f"{self.name}_bucket{_label_str(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_str(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_label_str(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...],
+              collect: Callable[[], Dict[Tuple[str, ...], float]]) -> Gauge:
+        """Register (or replace) a callback gauge; replacing keeps re-created agents scrapeable"""
+        gauge = Gauge(name, documentation, labelnames, collect)
+        self._metrics[name] = gauge
+        return gauge
+
+    def _register(self, metric):
+        # Idempotent so module reloads don't duplicate series
+        return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "litreview_stage_seconds", "Time spent in each review pipeline stage", ("stage",)
+)
+SOURCE_SECONDS = REGISTRY.histogram(
+    "litreview_source_seconds", "Search provider latency, including cache hits", ("source", "status")
+)
+SOURCE_RESULTS = REGISTRY.counter(
+    "litreview_source_results_total", "Papers returned per search provider", ("source",)
+)
+SOURCE_ERRORS = REGISTRY.counter(
+    "litreview_source_errors_total", "Search provider calls that failed, were skipped or ran late",
+    ("source", "status")
+)
+LLM_SECONDS = REGISTRY.histogram(
+    "litreview_llm_seconds", "Groq call duration (cache misses only)", ("kind",)
+)
+LLM_TTFT_SECONDS = REGISTRY.histogram(
+    "litreview_llm_ttft_seconds", "Time to the first streamed LLM token", ()
+)
+LLM_TOKENS = REGISTRY.counter(
+    "litreview_llm_tokens_total", "Prompt and completion tokens reported by Groq", ("type",)
+)
+REVIEWS = REGISTRY.counter(
+    "litreview_reviews_total", "Reviews generated, by outcome", ("mode", "outcome")
+)
+
+# Per-request breakdown (stage -> milliseconds) for the request being served, if one is being collected
+current_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("current_timings", default=None)
+
+
+def record_timing(stage: str, seconds: float) -> None:
+    """Add to the current request's timing breakdown, if any"""
+    timings = current_timings.get()
+    if timings is not None:
+        timings[stage] = round(timings.get(stage, 0) + seconds * 1000, 1)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Observe the block's duration in litreview_stage_seconds and the request's breakdown"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        record_timing(stage, elapsed)
+
+
+def record_token_usage(message: Any) -> None:
+    """Count token usage from a LangChain message or chunk, whichever metadata field carries it"""
+    usage = getattr(message, "usage_metadata", None) or {}
+    prompt = usage.get("input_tokens")
+    completion = usage.get("output_tokens")
+    if prompt is None and completion is None:
+        token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+        prompt = token_usage.get("prompt_tokens")
+        completion = token_usage.get("completion_tokens")
+    if prompt:
+        LLM_TOKENS.inc(prompt, type="prompt")
+    if completion:
+        LLM_TOKENS.inc(completion, type="completion")
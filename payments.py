@@ -0,0 +1,250 @@
+import os
+import hmac
+import json
+import time
+import uuid
+import base64
+import hashlib
+import asyncio
+import secrets
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+
+from cache import TieredCache
+from concurrency import SingleFlight
+
+REUSED_KEY = "Idempotency key was already used for a different payment"
+
+# What each paid plan costs per month, by billing period (yearly is billed at a discount);
+# kept in step with the pricing page, but only this table decides what a plan costs
+PLAN_PRICES = {
+    "pro": {"monthly": 19.0, "yearly": 15.0},
+    "enterprise": {"monthly": 49.0, "yearly": 39.0},
+}
+
+
+class PaymentError(Exception):
+    """A charge that did not go through; status_code is what the API reports to the client"""
+
+    def __init__(self, status_code: int, detail: str, fingerprint: Optional[str] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        # Fingerprint of the payment that produced the error, for callers coalesced onto it
+        self.fingerprint = fingerprint
+
+
+def plan_price(plan: str, billing: str, price: str) -> float:
+    """The server's price for plan and billing; raises PaymentError(400) if the client quoted another"""
+    expected = PLAN_PRICES.get(plan, {}).get(billing)
+    if expected is None:
+        raise PaymentError(400, f"Unknown plan or billing period: {plan} ({billing})")
+    try:
+        quoted = float(price)
+    except ValueError:
+        quoted = None
+    if quoted != expected:
+        raise PaymentError(400, f"Price does not match the {plan} plan ({billing}): expected {expected:g}")
+    return expected
+
+
+class PlanTokens:
+    """Signed plan grants issued after a successful payment.
+
+    A token is ``<base64 payload>.<HMAC-SHA256>`` over the plan and its
+    expiry, so the plan a review runs under (and its LLM priority) comes
+    from the server rather than from whatever the client claims. Without
+    PLAN_TOKEN_SECRET a random secret is used, and tokens only hold for
+    this process; set it so every worker and restart accepts them.
+    """
+
+    def __init__(self, secret: bytes, ttl: float = 30 * 24 * 3600):
+        self.secret = secret
+        self.ttl = ttl
+
+    @classmethod
+    def from_env(cls) -> "PlanTokens":
+        secret = os.getenv("PLAN_TOKEN_SECRET")
+        return cls(
+            secret=secret.encode("utf-8") if secret else secrets.token_bytes(32),
+            ttl=float(os.getenv("PLAN_TOKEN_TTL", str(30 * 24 * 3600))),
+        )
+
+    def _sign(self, payload: str) -> str:
+        return hmac.new(self.secret, payload.encode("ascii"), hashlib.sha256).hexdigest()
+
+    def issue(self, plan: str) -> str:
+        payload = base64.urlsafe_b64encode(
+            json.dumps({"plan": plan, "exp": int(time.time() + self.ttl)}).encode("utf-8")
+        ).decode("ascii")
+        return f"{payload}.{self._sign(payload)}"
+
+    def verify(self, token: Optional[str], default: str = "free") -> str:
+        """The plan a token grants; default for a missing, forged or expired token"""
+        if not token or "." not in token:
+            return default
+        payload, signature = token.rsplit(".", 1)
+        try:
+            if not hmac.compare_digest(signature.encode("ascii"), self._sign(payload).encode("ascii")):
+                return default
+            claims = json.loads(base64.urlsafe_b64decode(payload.encode("ascii")))
+        except ValueError:
+            return default
+        if not isinstance(claims, dict) or claims.get("exp", 0) < time.time():
+            return default
+        return claims.get("plan") or default
+
+
+class PaymentClient:
+    """Intasend charges over their own keep-alive session, separate from the one the searchers share.
+
+    A slow or failing gateway can then only exhaust the payment pool, never
+    the connections the review path needs. Charges sent with an idempotency
+    key are collapsed while in flight and their outcome is kept for
+    PAYMENT_IDEMPOTENCY_TTL, so a client retry gets the original answer
+    instead of a second charge. The key is forwarded to the gateway as well,
+    which covers retries that land on another worker.
+    """
+
+    def __init__(self, api_key: Optional[str], base_url: str, idempotency: TieredCache,
+                 timeout: float = 20.0, connect_timeout: float = 5.0, pool_limit: int = 20):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.idempotency = idempotency
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.pool_limit = pool_limit
+        self.flight = SingleFlight()
+        self.http_session: Optional[aiohttp.ClientSession] = None
+        self._stats = {"charges": 0, "replayed": 0, "declined": 0, "failed": 0}
+
+    @classmethod
+    def from_env(cls) -> "PaymentClient":
+        return cls(
+            api_key=os.getenv("INTASEND_API_KEY"),
+            base_url=os.getenv("INTASEND_API_URL", "https://api.intasend.com/v1"),
+            idempotency=TieredCache.from_env("PAYMENT_IDEMPOTENCY", namespace="payments",
+                                             default_ttl=24 * 3600, default_db_path=".cache/payments.db"),
+            timeout=float(os.getenv("PAYMENT_TIMEOUT", "20")),
+            connect_timeout=float(os.getenv("PAYMENT_CONNECT_TIMEOUT", "5")),
+            pool_limit=int(os.getenv("PAYMENT_POOL_LIMIT", "20")),
+        )
+
+    @property
+    def test_mode(self) -> bool:
+        """Without an API key charges are simulated"""
+        return not self.api_key
+
+    async def start(self) -> None:
+        if self.http_session is None or self.http_session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_limit, keepalive_timeout=30)
+            self.http_session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+
+    async def close(self) -> None:
+        if self.http_session is not None and not self.http_session.closed:
+            await self.http_session.close()
+        self.http_session = None
+
+    # -------------------- Public API --------------------
+    async def charge(self, charge: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Create a charge; returns {transaction_id, test_mode, confirmed, replayed} or raises PaymentError.
+
+        confirmed is only true for a charge the gateway accepted; simulated
+        (test mode) charges never are.
+        """
+        if not idempotency_key:
+            return {**await self._create(charge, None), "replayed": False}
+        fingerprint = self._fingerprint(idempotency_key, charge)
+        # Coalesce on the key alone, so two payloads under one key never both reach the
+        # gateway; a caller whose payload differs from the one that ran gets a 422
+        try:
+            owner, result = await self.flight.do(idempotency_key,
+                                                 lambda: self._charge_once(idempotency_key, fingerprint, charge))
+        except PaymentError as e:
+            if e.fingerprint not in (None, fingerprint):
+                raise PaymentError(422, REUSED_KEY) from e
+            raise
+        if owner != fingerprint:
+            raise PaymentError(422, REUSED_KEY)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "test_mode": self.test_mode, "coalescing": self.flight.stats(),
+                "idempotency_cache": self.idempotency.stats()}
+
+    # -------------------- Idempotency --------------------
+    @staticmethod
+    def _fingerprint(idempotency_key: str, charge: Dict[str, Any]) -> str:
+        """Hash of what identifies the purchase; the card number, CVV and expiry never go into it"""
+        card = charge.get("payment_method", {}).get("card", {})
+        metadata = charge.get("metadata", {})
+        fields = {
+            "amount": charge.get("amount"),
+            "currency": charge.get("currency"),
+            "plan": metadata.get("plan"),
+            "billing": metadata.get("billing"),
+            "email": charge.get("customer", {}).get("email"),
+            "last4": str(card.get("number") or "")[-4:],
+        }
+        payload = json.dumps(fields, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(f"{idempotency_key}:{payload}".encode("utf-8")).hexdigest()
+
+    async def _charge_once(self, idempotency_key: str, fingerprint: str,
+                           charge: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """(fingerprint, outcome) of one charge under idempotency_key; errors carry the fingerprint too"""
+        stored = await self.idempotency.get(idempotency_key)
+        if stored is not None:
+            if stored["fingerprint"] != fingerprint:
+                raise PaymentError(422, REUSED_KEY)
+            self._stats["replayed"] += 1
+            if "error" in stored:
+                raise PaymentError(stored["status_code"], stored["error"], fingerprint)
+            return fingerprint, {**stored["result"], "replayed": True}
+
+        try:
+            result = await self._create(charge, idempotency_key)
+        except PaymentError as e:
+            # A decline is final; timeouts and gateway errors are not stored, so a
+            # retry reaches the gateway again (which dedupes on the same key)
+            if e.status_code == 400:
+                await self.idempotency.set(idempotency_key, {"fingerprint": fingerprint, "error": e.detail,
+                                                             "status_code": e.status_code})
+            e.fingerprint = fingerprint
+            raise
+        await self.idempotency.set(idempotency_key, {"fingerprint": fingerprint, "result": result})
+        return fingerprint, {**result, "replayed": False}
+
+    # -------------------- Gateway --------------------
+    async def _create(self, charge: Dict[str, Any], idempotency_key: Optional[str]) -> Dict[str, Any]:
+        if self.test_mode:
+            self._stats["charges"] += 1
+            return {"transaction_id": f"TXN_{uuid.uuid4().hex[:8].upper()}", "test_mode": True, "confirmed": False}
+
+        await self.start()
+        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+        if idempotency_key:
+            headers["Idempotency-Key"] = idempotency_key
+        try:
+            async with self.http_session.post(f"{self.base_url}/charges/", json=charge, headers=headers) as response:
+                try:
+                    data = await response.json(content_type=None)
+                except ValueError:
+                    data = {}
+                status = response.status
+        except asyncio.TimeoutError:
+            self._stats["failed"] += 1
+            raise PaymentError(504, "Payment gateway timed out; retry with the same idempotency key")
+        except aiohttp.ClientError as e:
+            self._stats["failed"] += 1
+            raise PaymentError(502, f"Payment gateway unreachable: {e}")
+
+        if status == 201:
+            self._stats["charges"] += 1
+            transaction_id = (data or {}).get("id") if isinstance(data, dict) else None
+            return {"transaction_id": transaction_id, "test_mode": False, "confirmed": bool(transaction_id)}
+        detail = (data or {}).get("detail", "Unknown error") if isinstance(data, dict) else "Unknown error"
+        if status >= 500:
+            self._stats["failed"] += 1
+            raise PaymentError(502, f"Payment gateway error: {detail}")
+        self._stats["declined"] += 1
+        raise PaymentError(400, f"Payment failed: {detail}")
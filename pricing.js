@@ -65,11 +65,18 @@ function openPaymentModal(plan) {
     modal.setAttribute('data-plan', plan);
     modal.setAttribute('data-price', price);
     modal.setAttribute('data-billing', isYearly ? 'yearly' : 'monthly');
+    // One key per checkout: retries after a network error cannot charge twice
+    modal.setAttribute('data-idempotency-key', newIdempotencyKey());
     
     modal.style.display = 'block';
     document.body.style.overflow = 'hidden';
 }
 
+function newIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
 function closePaymentModal() {
     const modal = document.getElementById('paymentModal');
     modal.style.display = 'none';
@@ -186,10 +193,12 @@ async function processIntasendPayment(paymentData) {
             ? 'http://127.0.0.1:8000' 
             : '';
         
+        const modal = document.getElementById('paymentModal');
         const response = await fetch(`${baseUrl}/api/process-payment`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
+                'Idempotency-Key': modal.getAttribute('data-idempotency-key') || '',
             },
             body: JSON.stringify(paymentData)
         });
@@ -197,6 +206,11 @@ async function processIntasendPayment(paymentData) {
         const result = await response.json();
         
         if (!response.ok) {
+            // A decline is final for this key; corrected details need a new one.
+            // Gateway errors and timeouts keep the key so the retry is safe.
+            if (response.status < 500) {
+                modal.setAttribute('data-idempotency-key', newIdempotencyKey());
+            }
             throw new Error(result.detail || 'Payment processing failed');
         }
         
@@ -215,6 +229,8 @@ function showPaymentSuccess(result) {
         localStorage.setItem('nzeru_plan', result.plan || 'pro');
         localStorage.setItem('nzeru_plan_amount', String(result.amount || ''));
         localStorage.setItem('nzeru_txn_id', result.transaction_id || '');
+        // Signed by the server; review requests send it to get the plan's priority
+        localStorage.setItem('nzeru_plan_token', result.plan_token || '');
         localStorage.setItem('nzeru_plan_activated_at', new Date().toISOString());
     } catch {}
 
@@ -0,0 +1,174 @@
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from fulltext import PROMPT_SECTIONS
+from ranking import tokenize
+from records import Paper
+
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9(\"'])")
+
+# Tokens of paper material a single review prompt may carry, per Groq model.
+# Kept well under each model's context so the instructions and the answer fit,
+# and under the per-minute token limits of the smaller models.
+MODEL_PROMPT_BUDGETS = {
+    "llama-3.1-8b-instant": 4000,
+    "llama-3.3-70b-versatile": 8000,
+    "llama3-70b-8192": 5000,
+    "llama3-8b-8192": 5000,
+    "gemma2-9b-it": 5000,
+    "mixtral-8x7b-32768": 16000,
+}
+DEFAULT_PROMPT_BUDGET = 4000
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: about four characters per token for English prose"""
+    return len(text) // 4 + 1
+
+
+def score_sentences(abstract: str, query_terms: List[str]) -> List[Tuple[str, float, int]]:
+    """Split an abstract into (sentence, relevance, tokens).
+
+    Relevance counts the distinct query terms a sentence contains, matched as
+    word prefixes like ranking.py ("transformer" matches "transformers"). The
+    opening sentence gets a small bonus since it usually states the problem.
+    """
+    scored = []
+    for i, sentence in enumerate(SENTENCE_RE.split(abstract)):
+        lowered = " " + sentence.lower()
+        score = sum(1 for term in query_terms if " " + term in lowered) + (0.5 if i == 0 else 0)
+        scored.append((sentence, score, estimate_tokens(sentence)))
+    return scored
+
+
+def select_sentences(scored: List[Tuple[str, float, int]], max_tokens: int) -> str:
+    """Extractive compression: the most relevant sentences that fit max_tokens, in original order"""
+    if sum(tokens for _, _, tokens in scored) <= max_tokens:
+        return " ".join(sentence for sentence, _, _ in scored)
+    order = sorted(range(len(scored)), key=lambda i: (-scored[i][1], i))
+    keep = []
+    used = 0
+    for i in order:
+        if used + scored[i][2] <= max_tokens:
+            keep.append(i)
+            used += scored[i][2]
+    if not keep:
+        # Even the best sentence is too long: cut it at a word boundary
+        return scored[order[0]][0][:max_tokens * 4].rsplit(" ", 1)[0] + " …"
+    keep.sort()
+    parts = [scored[keep[0]][0]]
+    for prev, i in zip(keep, keep[1:]):
+        # Mark the gaps where sentences were left out
+        parts.append(scored[i][0] if i == prev + 1 else "… " + scored[i][0])
+    return " ".join(parts)
+
+
+def compress_abstract(abstract: str, query_terms: List[str], max_tokens: int) -> str:
+    """Shorten an abstract to about max_tokens by keeping its most query-relevant sentences"""
+    abstract = " ".join((abstract or "").split())
+    if estimate_tokens(abstract) <= max_tokens:
+        return abstract
+    return select_sentences(score_sentences(abstract, query_terms), max_tokens)
+
+
+def paper_material(paper: Paper) -> str:
+    """The abstract, followed by the ingested full-text sections when there are any"""
+    parts = [paper.abstract or ""]
+    sections = paper.sections
+    for name in PROMPT_SECTIONS:
+        if sections.get(name):
+            parts.append(f"{name.capitalize()}: {sections[name]}")
+    return " ".join(" ".join(parts).split())
+
+
+def render_paper(number: int, paper: Paper, abstract: str) -> str:
+    """Compact paper entry: only what the model needs to synthesize and cite"""
+    authors = paper.authors
+    names = ", ".join(authors[:3]) + (" et al." if len(authors) > 3 else "")
+    year = paper.year or (paper.published_date or "")[:4] or "n.d."
+    label = "Abstract and full text" if paper.sections else "Abstract"
+    header = f"[{number}] {paper.title} ({year}). {names or 'Unknown authors'}. {paper.source or 'Unknown'}"
+    return f"{header}\n{label}: {abstract}\n\n"
+
+
+def render_paper_verbose(number: int, paper: Paper) -> str:
+    """The full-field entry used before budgeting; measured as the baseline for savings"""
+    return f"""
+Paper {number} ({paper.source or 'Unknown'}):
+Title: {paper.title}
+Authors: {', '.join(paper.authors)}
+Abstract: {paper.abstract}
+Published: {paper.published_date}
+Categories: {', '.join(paper.categories)}
+URL: {paper.pdf_url}
+
+"""
+
+
+class PromptBuilder:
+    """Renders papers into prompt material that fits a token budget"""
+
+    def __init__(self, model_name: str, budget: Optional[int] = None,
+                 abstract_tokens: int = 250, min_abstract_tokens: int = 60, full_text_tokens: int = 750):
+        self.model_name = model_name
+        self.budget = budget or MODEL_PROMPT_BUDGETS.get(model_name, DEFAULT_PROMPT_BUDGET)
+        self.abstract_tokens = abstract_tokens
+        self.min_abstract_tokens = min_abstract_tokens
+        # Cap for papers with full text; tightened in proportion to the abstract cap
+        self.full_text_tokens = full_text_tokens
+
+    @classmethod
+    def from_env(cls, model_name: str) -> "PromptBuilder":
+        """Configured from PROMPT_TOKEN_BUDGET (0 = per-model default), PROMPT_ABSTRACT_TOKENS and PROMPT_FULLTEXT_TOKENS"""
+        return cls(
+            model_name,
+            budget=int(os.getenv("PROMPT_TOKEN_BUDGET", "0")) or None,
+            abstract_tokens=int(os.getenv("PROMPT_ABSTRACT_TOKENS", "250")),
+            full_text_tokens=int(os.getenv("PROMPT_FULLTEXT_TOKENS", "750")),
+        )
+
+    def render(self, papers: List[Paper], topic: str,
+               objectives: str = "") -> Tuple[List[str], Dict[str, Any]]:
+        """Render each paper compactly, tightening the per-abstract cap until the set fits the budget.
+
+        If even the minimum cap does not fit, the caller is expected to fall
+        back to map-reduce batching over the returned entries.
+        """
+        query_terms = list(dict.fromkeys(tokenize(f"{topic} {objectives}")))
+        original_tokens = sum(estimate_tokens(render_paper_verbose(i, p)) for i, p in enumerate(papers, 1))
+        abstracts = [paper_material(paper) for paper in papers]
+        # Sentence scores don't depend on the cap, so compute them once
+        scored: Dict[int, List[Tuple[str, float, int]]] = {}
+
+        cap = self.abstract_tokens
+        while True:
+            entries = []
+            compressed = 0
+            for number, (paper, abstract) in enumerate(zip(papers, abstracts), 1):
+                limit = cap * self.full_text_tokens // self.abstract_tokens if paper.sections else cap
+                if estimate_tokens(abstract) > limit:
+                    if number not in scored:
+                        scored[number] = score_sentences(abstract, query_terms)
+                    short = select_sentences(scored[number], limit)
+                    compressed += 1
+                else:
+                    short = abstract
+                entries.append(render_paper(number, paper, short))
+            total = sum(estimate_tokens(entry) for entry in entries)
+            if total <= self.budget or cap <= self.min_abstract_tokens:
+                break
+            # Shrink proportionally to the overshoot, never below the floor
+            cap = max(self.min_abstract_tokens, int(cap * self.budget / total))
+
+        stats = {
+            "model": self.model_name,
+            "budget_tokens": self.budget,
+            "papers": len(papers),
+            "original_tokens": original_tokens,
+            "material_tokens": total,
+            "abstract_cap_tokens": cap,
+            "compressed_abstracts": compressed,
+            "full_text_papers": sum(1 for paper in papers if paper.sections),
+        }
+        return entries, stats
@@ -0,0 +1,147 @@
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+
+@lru_cache(maxsize=4096)
+def format_apa_author(name: str) -> str:
+    """Format an author as "Surname, I." for APA references"""
+    parts = name.split()
+    if not parts:
+        return name
+    surname = parts[-1]
+    initials = ''.join([p[0].upper() + '.' for p in parts[:-1] if p])
+    return f"{surname}, {initials}" if initials else surname
+
+
+@dataclass(slots=True)
+class Paper:
+    """One work from any provider, from the parsers through ranking to the response.
+
+    Slotted, so a large result set costs a fraction of the equivalent dicts;
+    the APA line is computed once per record and kept in a private slot
+    (leading-underscore fields are skipped by orjson and to_dict). So are the
+    full-text sections, which live in fulltext.py's disk cache instead.
+    """
+    title: Optional[str] = None
+    authors: List[str] = field(default_factory=list)
+    abstract: str = ""
+    published_date: Optional[str] = None
+    year: Optional[int] = None
+    pdf_url: Optional[str] = None
+    # Provider landing URL or ID (arXiv abs URL, OpenAlex work, DOI link...)
+    arxiv_id: Optional[str] = None
+    doi: Optional[str] = None
+    categories: List[str] = field(default_factory=list)
+    source: Optional[str] = None
+    # Providers a merged record was found in (see dedup.merge_records)
+    found_in: List[str] = field(default_factory=list)
+    # "reference" or "citation" for papers added by citation-graph expansion
+    relation: Optional[str] = None
+    _apa: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _sections: Optional[Dict[str, str]] = field(default=None, init=False, repr=False, compare=False)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Paper":
+        """Rebuild a record stored with to_dict; unknown keys are ignored"""
+        return cls(**{name: data[name] for name in PAPER_FIELDS if data.get(name) is not None})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict for the JSON caches and SQLite stores"""
+        return {name: getattr(self, name) for name in PAPER_FIELDS}
+
+    @property
+    def sections(self) -> Dict[str, str]:
+        """Full-text sections (methods, results...) attached by fulltext.FullTextIngester"""
+        return self._sections or {}
+
+    @sections.setter
+    def sections(self, value: Optional[Dict[str, str]]) -> None:
+        self._sections = value
+
+    def source_entry(self) -> Dict[str, Any]:
+        """The record as the API lists it under `sources`"""
+        abstract = self.abstract or ""
+        return {
+            "title": self.title,
+            "authors": self.authors,
+            "year": str(self.year) if self.year else None,
+            "abstract": abstract[:200] + "..." if len(abstract) > 200 else abstract,
+            "url": self.pdf_url,
+            "arxiv_id": self.arxiv_id,
+            "source": self.source
+        }
+
+    def apa_reference(self) -> str:
+        """Simple APA 7 style reference line from the available metadata"""
+        if self._apa is None:
+            if self.authors:
+                formatted_authors = [format_apa_author(a) for a in self.authors]
+                if len(formatted_authors) == 1:
+                    author_str = formatted_authors[0]
+                elif len(formatted_authors) == 2:
+                    author_str = f"{formatted_authors[0]} & {formatted_authors[1]}"
+                else:
+                    author_str = ", ".join(formatted_authors[:-1]) + f", & {formatted_authors[-1]}"
+            else:
+                author_str = "Author"
+            year = str(self.year) if self.year else "n.d."
+            title = (self.title or "Untitled").strip().rstrip('.')
+            self._apa = f"{author_str} ({year}). {title}. {self.pdf_url or ''}".strip()
+        return self._apa
+
+
+PAPER_FIELDS = tuple(f.name for f in fields(Paper) if not f.name.startswith("_"))
+
+
+def rebuild_abstract(inverted_index: Optional[Dict[str, List[int]]]) -> str:
+    """Plain text of an OpenAlex abstract_inverted_index (word -> positions it occurs at)"""
+    if not inverted_index:
+        return ""
+    words: Dict[int, str] = {}
+    for word, positions in inverted_index.items():
+        for position in positions or []:
+            words[position] = word
+    return " ".join(words[position] for position in sorted(words))
+
+
+def openalex_record(item: Dict[str, Any]) -> Paper:
+    """Convert an OpenAlex work into a paper record"""
+    abstract = item.get("abstract") or rebuild_abstract(item.get("abstract_inverted_index"))
+    authors = [a.get("author", {}).get("display_name") for a in item.get("authorships", []) if a.get("author")]
+    primary_location = item.get("primary_location") or {}
+    pdf_url = (primary_location.get("source") or {}).get("host_page_url") or primary_location.get("pdf_url")
+    year = item.get("publication_year")
+    url = item.get("id")
+    return Paper(
+        title=item.get("title"),
+        authors=authors,
+        abstract=abstract or "",
+        published_date=f"{year}-01-01" if year else None,
+        year=year,
+        pdf_url=pdf_url or url,
+        arxiv_id=url,
+        doi=item.get("doi"),
+        source="OpenAlex"
+    )
+
+
+def semantic_scholar_record(item: Dict[str, Any]) -> Paper:
+    """Convert a Semantic Scholar paper into a paper record"""
+    year = item.get("year")
+    pdf = (item.get("openAccessPdf") or {}).get("url")
+    url = item.get("url")
+    external_ids = item.get("externalIds") or {}
+    if not pdf and external_ids.get("ArXiv"):
+        pdf = f"https://arxiv.org/pdf/{external_ids['ArXiv']}"
+    return Paper(
+        title=item.get("title"),
+        authors=[a.get("name") for a in item.get("authors") or []],
+        abstract=item.get("abstract") or "",
+        published_date=f"{year}-01-01" if year else None,
+        year=year,
+        pdf_url=pdf or url,
+        arxiv_id=url,
+        doi=external_ids.get("DOI"),
+        source="Semantic Scholar"
+    )
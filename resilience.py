@@ -0,0 +1,190 @@
+import os
+import time
+import asyncio
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+
+class ProviderUnavailable(Exception):
+    """Raised instead of calling a provider whose breaker is open or whose rate budget is spent"""
+
+
+class TokenBucket:
+    """Token-bucket rate limiter: `rate` tokens per second, bursts up to `burst`"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._stats = {"acquired": 0, "throttled": 0, "rejected": 0}
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, max_wait: float) -> bool:
+        """Take one token, waiting at most max_wait seconds; False if none became available"""
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            self._stats["acquired"] += 1
+            return True
+        # Reserve the next token and sleep until it has been refilled
+        wait = (1 - self._tokens) / self.rate if self.rate > 0 else float("inf")
+        if wait > max_wait:
+            self._stats["rejected"] += 1
+            return False
+        self._tokens -= 1
+        self._stats["throttled"] += 1
+        await asyncio.sleep(wait)
+        self._stats["acquired"] += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {**self._stats, "rate": self.rate, "burst": self.burst, "tokens": round(self._tokens, 2)}
+
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive failures; half-open probe after `reset_timeout`"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._open_for = reset_timeout
+        self._probe_in_flight = False
+        self._stats = {"successes": 0, "failures": 0, "short_circuited": 0, "trips": 0}
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half-open state only a single probe is allowed"""
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self._open_for:
+                self._stats["short_circuited"] += 1
+                return False
+            self.state = "half_open"
+            self._probe_in_flight = False
+        if self.state == "half_open":
+            if self._probe_in_flight:
+                self._stats["short_circuited"] += 1
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def release(self) -> None:
+        """Give back a half-open probe slot without recording an outcome"""
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        self._stats["successes"] += 1
+        self._failures = 0
+        self._probe_in_flight = False
+        self.state = "closed"
+
+    def record_failure(self, retry_after: Optional[float] = None) -> None:
+        """Count a failure; a retry_after hint (e.g. from a 429) opens the breaker immediately"""
+        self._stats["failures"] += 1
+        self._failures += 1
+        self._probe_in_flight = False
+        if self.state == "half_open" or retry_after is not None or self._failures >= self.failure_threshold:
+            self._trip(max(self.reset_timeout, retry_after or 0))
+
+    def _trip(self, open_for: float) -> None:
+        if self.state != "open":
+            self._stats["trips"] += 1
+        self.state = "open"
+        self._opened_at = time.monotonic()
+        self._open_for = open_for
+
+    def stats(self) -> Dict[str, Any]:
+        remaining = 0.0
+        if self.state == "open":
+            remaining = max(0.0, self._open_for - (time.monotonic() - self._opened_at))
+        return {
+            **self._stats,
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "retry_in": round(remaining, 1),
+        }
+
+
+class ProviderGuard:
+    """Rate limiter plus circuit breaker for one upstream provider, shared by all requests in a worker"""
+
+    def __init__(self, name: str, rate: float, burst: float, failure_threshold: int,
+                 reset_timeout: float, max_wait: float):
+        self.name = name
+        self.limiter = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_wait = max_wait
+
+    async def call(self, fn):
+        """Run fn() under the breaker and rate limit, raising ProviderUnavailable when skipped"""
+        if not self.breaker.allow():
+            raise ProviderUnavailable(f"{self.name} circuit open")
+        if not await self.limiter.acquire(self.max_wait):
+            self.breaker.release()
+            raise ProviderUnavailable(f"{self.name} rate limited")
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except aiohttp.ClientResponseError as e:
+            if e.status == 429:
+                self.breaker.record_failure(retry_after=_retry_after(e.headers))
+            elif e.status >= 500:
+                self.breaker.record_failure()
+            else:
+                # Other 4xx responses say nothing about provider health
+                self.breaker.record_success()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {"breaker": self.breaker.stats(), "limiter": self.limiter.stats()}
+
+
+def _retry_after(headers) -> float:
+    try:
+        return float((headers or {}).get("Retry-After", 0)) or 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+# Default (requests per second, burst) per provider, from each API's published guidance
+PROVIDER_RATE_DEFAULTS = {
+    "arxiv": (1.0, 3),
+    "openalex": (10.0, 10),
+    "crossref": (10.0, 10),
+    "semantic_scholar": (1.0, 3),
+}
+
+
+def build_provider_guards(names) -> Dict[str, ProviderGuard]:
+    """Create one guard per provider from PROVIDER_RATE_LIMITS ("name=rate:burst,...") and CIRCUIT_* settings"""
+    overrides: Dict[str, tuple] = {}
+    for item in os.getenv("PROVIDER_RATE_LIMITS", "").split(","):
+        if "=" not in item:
+            continue
+        name, _, spec = item.partition("=")
+        rate, _, burst = spec.partition(":")
+        overrides[name.strip()] = (float(rate), float(burst or rate))
+
+    failure_threshold = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    reset_timeout = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+    max_wait = float(os.getenv("RATE_LIMIT_MAX_WAIT", "2"))
+    guards = {}
+    for name in names:
+        rate, burst = overrides.get(name, PROVIDER_RATE_DEFAULTS.get(name, (5.0, 5)))
+        guards[name] = ProviderGuard(name, rate, burst, failure_threshold, reset_timeout, max_wait)
+    return guards
@@ -0,0 +1,184 @@
+import os
+import json
+import time
+import hashlib
+import uuid
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from records import Paper
+
+
+class ReviewStore:
+    """Generated reviews in a local SQLite file, with the papers they cite, so a topic can be refreshed later.
+
+    The stored body is the LLM text without the reference list (references
+    are rebuilt from the stored papers); refreshes append update sections to
+    it and bump the revision. Every stored review gets its own ID, but body
+    and papers live in review_blobs keyed by their hash, so identical reviews
+    (LLM cache hits) share one copy; a refresh points its review at a new
+    blob and leaves the others alone. Reviews untouched for `retention`
+    seconds are deleted, and blobs no review uses with them.
+    """
+
+    def __init__(self, db_path: str, retention: float = 90 * 24 * 3600):
+        self.db_path = db_path
+        self.retention = retention
+        self._pruned_at = 0.0
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    """CREATE TABLE IF NOT EXISTS review_blobs (
+                        digest TEXT PRIMARY KEY,
+                        body TEXT NOT NULL,
+                        papers TEXT NOT NULL
+                    )"""
+                )
+                columns = {row["name"] for row in conn.execute("PRAGMA table_info(reviews)")}
+                inline = bool(columns) and "blob" not in columns
+                if inline:
+                    # Reviews stored with their own body and papers; moved into review_blobs below
+                    conn.execute("ALTER TABLE reviews RENAME TO reviews_inline")
+                conn.execute(
+                    """CREATE TABLE IF NOT EXISTS reviews (
+                        id TEXT PRIMARY KEY,
+                        params TEXT NOT NULL,
+                        blob TEXT NOT NULL,
+                        revision INTEGER NOT NULL,
+                        created_at REAL NOT NULL,
+                        updated_at REAL NOT NULL,
+                        searched_at REAL NOT NULL
+                    )"""
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_reviews_blob ON reviews (blob)")
+                if inline:
+                    for row in conn.execute("SELECT * FROM reviews_inline").fetchall():
+                        conn.execute(
+                            """INSERT INTO reviews (id, params, blob, revision, created_at, updated_at, searched_at)
+                               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                            (row["id"], row["params"], self._put_blob(conn, row["body"], row["papers"]),
+                             row["revision"], row["created_at"], row["updated_at"], row["searched_at"]),
+                        )
+                    conn.execute("DROP TABLE reviews_inline")
+        finally:
+            conn.close()
+
+    @classmethod
+    def from_env(cls) -> Optional["ReviewStore"]:
+        """Store at REVIEW_DB kept for REVIEW_RETENTION seconds, or None when REVIEW_DB is set empty"""
+        db_path = os.getenv("REVIEW_DB", ".cache/reviews.db")
+        retention = float(os.getenv("REVIEW_RETENTION", str(90 * 24 * 3600)))
+        return cls(db_path, retention=retention) if db_path else None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute("PRAGMA busy_timeout=10000")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _execute(self, sql: str, args: tuple = ()) -> int:
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute(sql, args).rowcount
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _put_blob(conn: sqlite3.Connection, body: str, papers_json: str) -> str:
+        """Store body and papers once per distinct content; returns the blob's digest"""
+        digest = hashlib.sha256("\0".join((body, papers_json)).encode("utf-8")).hexdigest()
+        conn.execute("INSERT OR IGNORE INTO review_blobs (digest, body, papers) VALUES (?, ?, ?)",
+                     (digest, body, papers_json))
+        return digest
+
+    def create(self, params: Dict[str, Any], body: str, papers: List[Paper],
+               searched_at: Optional[float] = None) -> str:
+        """Store a review and return its new ID; an identical body and paper list is stored only once"""
+        now = time.time()
+        if now - self._pruned_at > 3600:
+            self.prune(self.retention)
+        review_id = uuid.uuid4().hex
+        conn = self._connect()
+        try:
+            with conn:
+                blob = self._put_blob(conn, body, json.dumps([p.to_dict() for p in papers]))
+                conn.execute(
+                    """INSERT INTO reviews (id, params, blob, revision, created_at, updated_at, searched_at)
+                       VALUES (?, ?, ?, 1, ?, ?, ?)""",
+                    (review_id, json.dumps(params, sort_keys=True), blob, now, now, searched_at or now),
+                )
+        finally:
+            conn.close()
+        return review_id
+
+    def update(self, review_id: str, body: str, papers: List[Paper], searched_at: float) -> None:
+        """Store a revised body and paper list as the next revision of this review only"""
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute("SELECT blob FROM reviews WHERE id = ?", (review_id,)).fetchone()
+                if row is None:
+                    return
+                blob = self._put_blob(conn, body, json.dumps([p.to_dict() for p in papers]))
+                conn.execute(
+                    """UPDATE reviews SET blob = ?, revision = revision + 1, updated_at = ?, searched_at = ?
+                       WHERE id = ?""",
+                    (blob, time.time(), searched_at, review_id),
+                )
+                # The previous revision's blob goes too, unless another review still shares it
+                conn.execute(
+                    "DELETE FROM review_blobs WHERE digest = ? AND NOT EXISTS (SELECT 1 FROM reviews WHERE blob = ?)",
+                    (row["blob"], row["blob"]),
+                )
+        finally:
+            conn.close()
+
+    def touch(self, review_id: str, searched_at: float) -> None:
+        """Record a refresh search that found nothing new"""
+        self._execute("UPDATE reviews SET searched_at = ? WHERE id = ?", (searched_at, review_id))
+
+    def get(self, review_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                """SELECT reviews.*, review_blobs.body, review_blobs.papers
+                   FROM reviews JOIN review_blobs ON review_blobs.digest = reviews.blob WHERE reviews.id = ?""",
+                (review_id,),
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        review = dict(row)
+        del review["blob"]
+        review["params"] = json.loads(review["params"])
+        review["papers"] = [Paper.from_dict(d) for d in json.loads(review["papers"])]
+        return review
+
+    def prune(self, older_than: float) -> int:
+        """Delete reviews neither created nor refreshed in the last older_than seconds, and unused blobs"""
+        self._pruned_at = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                deleted = conn.execute("DELETE FROM reviews WHERE MAX(updated_at, searched_at) < ?",
+                                       (time.time() - older_than,)).rowcount
+                conn.execute("DELETE FROM review_blobs WHERE digest NOT IN (SELECT blob FROM reviews)")
+        finally:
+            conn.close()
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT COUNT(*), COALESCE(SUM(revision - 1), 0) FROM reviews").fetchone()
+            blobs = conn.execute("SELECT COUNT(*) FROM review_blobs").fetchone()[0]
+        finally:
+            conn.close()
+        return {"reviews": row[0], "refreshes": row[1], "stored_bodies": blobs}
@@ -0,0 +1,169 @@
+import os
+import time
+import heapq
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from concurrency import LatencyTracker
+
+# Lower number is served first
+PLAN_PRIORITIES = {"enterprise": 0, "pro": 1, "free": 2}
+DEFAULT_PLAN = "free"
+
+# Waiting requests allowed per plan before new ones are shed
+DEFAULT_QUEUE_LIMITS = {"enterprise": 100, "pro": 50, "free": 20}
+# Seconds a request may wait for an LLM slot before it is shed
+DEFAULT_QUEUE_TIMEOUTS = {"enterprise": 60.0, "pro": 30.0, "free": 10.0}
+
+# Plan of the request being served, read by the scheduler when no plan is passed
+current_plan: ContextVar[str] = ContextVar("current_plan", default=DEFAULT_PLAN)
+
+
+def normalize_plan(plan: Optional[str]) -> str:
+    plan = (plan or "").strip().lower()
+    return plan if plan in PLAN_PRIORITIES else DEFAULT_PLAN
+
+
+class SchedulerBusy(Exception):
+    """Raised when an LLM call is shed: its plan's queue is full or it waited past its deadline"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMScheduler:
+    """Admission control for LLM calls: a global concurrency cap with per-plan priority queues.
+
+    Free slots go to the highest-priority waiter (then first come, first
+    served). Each plan has a queue limit and a queue-time deadline; requests
+    over either are rejected with SchedulerBusy carrying a retry hint, rather
+    than being left to time out.
+    """
+
+    def __init__(self, max_concurrency: int = 4, queue_limits: Optional[Dict[str, int]] = None,
+                 queue_timeouts: Optional[Dict[str, float]] = None):
+        self.max_concurrency = max_concurrency
+        self.queue_limits = {**DEFAULT_QUEUE_LIMITS, **(queue_limits or {})}
+        self.queue_timeouts = {**DEFAULT_QUEUE_TIMEOUTS, **(queue_timeouts or {})}
+        self._active = 0
+        # (priority, sequence, future, plan)
+        self._waiters: List[tuple] = []
+        self._queued = {plan: 0 for plan in PLAN_PRIORITIES}
+        self._sequence = itertools.count()
+        self._hold_time = 5.0
+        self.wait_times = LatencyTracker(window=500, min_samples=1)
+        self._stats = {plan: {"admitted": 0, "queued": 0, "shed": 0, "timed_out": 0} for plan in PLAN_PRIORITIES}
+
+    @classmethod
+    def from_env(cls) -> "LLMScheduler":
+        """Configured from LLM_MAX_CONCURRENCY, LLM_QUEUE_LIMITS and LLM_QUEUE_TIMEOUTS ("plan=value,...")"""
+        return cls(
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+            queue_limits={k: int(v) for k, v in _parse_plan_map(os.getenv("LLM_QUEUE_LIMITS", "")).items()},
+            queue_timeouts={k: float(v) for k, v in _parse_plan_map(os.getenv("LLM_QUEUE_TIMEOUTS", "")).items()},
+        )
+
+    @asynccontextmanager
+    async def slot(self, plan: Optional[str] = None) -> AsyncIterator[None]:
+        """Hold one of the global LLM slots for the duration of the block"""
+        plan = normalize_plan(plan or current_plan.get())
+        await self._acquire(plan)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            # Smoothed call duration, used for the retry hint
+            self._hold_time = 0.8 * self._hold_time + 0.2 * (time.monotonic() - started)
+            self._release()
+
+    def retry_after(self) -> float:
+        """Rough seconds until a slot frees up for a newcomer, given the current backlog"""
+        backlog = sum(self._queued.values()) + self._active
+        return max(1.0, round(self._hold_time * backlog / max(1, self.max_concurrency), 1))
+
+    async def _acquire(self, plan: str) -> None:
+        stats = self._stats[plan]
+        if self._active < self.max_concurrency and not any(self._queued.values()):
+            # Only abandoned entries can be left in the heap here
+            self._waiters.clear()
+            self._active += 1
+            stats["admitted"] += 1
+            self.wait_times.record(plan, 0.0)
+            return
+        if self._queued[plan] >= self.queue_limits[plan]:
+            stats["shed"] += 1
+            raise SchedulerBusy(f"LLM queue for {plan} plan is full", self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (PLAN_PRIORITIES[plan], next(self._sequence), future, plan))
+        self._queued[plan] += 1
+        stats["queued"] += 1
+        enqueued = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.queue_timeouts[plan])
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # Granted just as the deadline passed; keep the slot
+                pass
+            else:
+                future.cancel()
+                self._queued[plan] -= 1
+                stats["timed_out"] += 1
+                raise SchedulerBusy(
+                    f"Waited {self.queue_timeouts[plan]:.0f}s for an LLM slot ({plan} plan)", self.retry_after()
+                )
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over but the caller went away
+                self._release()
+            else:
+                future.cancel()
+                self._queued[plan] -= 1
+            raise
+        stats["admitted"] += 1
+        self.wait_times.record(plan, time.monotonic() - enqueued)
+
+    def _release(self) -> None:
+        # Hand the slot straight to the next live waiter, skipping ones that gave up
+        while self._waiters:
+            _, _, future, plan = heapq.heappop(self._waiters)
+            if future.cancelled():
+                continue
+            self._queued[plan] -= 1
+            future.set_result(None)
+            return
+        self._active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        plans = {}
+        for plan, counters in self._stats.items():
+            p50 = self.wait_times.quantile(plan, 0.5)
+            p95 = self.wait_times.quantile(plan, 0.95)
+            plans[plan] = {
+                **counters,
+                "waiting": self._queued[plan],
+                "queue_limit": self.queue_limits[plan],
+                "queue_timeout": self.queue_timeouts[plan],
+                "wait_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "wait_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            }
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "retry_after": self.retry_after(),
+            "plans": plans,
+        }
+
+
+def _parse_plan_map(value: str) -> Dict[str, str]:
+    parsed = {}
+    for item in value.split(","):
+        name, _, setting = item.partition("=")
+        name = name.strip().lower()
+        if setting and name in PLAN_PRIORITIES:
+            parsed[name] = setting.strip()
+    return parsed
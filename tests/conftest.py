@@ -0,0 +1,42 @@
+"""Shared test setup: the application modules on the import path, an offline agent factory and the app module."""
+import os
+import sys
+import importlib
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def make_agent(monkeypatch, tmp_path):
+    """Build a LiteratureReviewAgent with no warm-up and all of its state under tmp_path"""
+    def build(**env):
+        settings = {
+            "GROQ_API_KEY": "test",
+            "AGENT_WARMUP": "off",
+            "LLM_CACHE_DB": "",
+            "SEARCH_CACHE_DB": "",
+            "CORPUS_DB": "",
+            "REVIEW_DB": "",
+            "CITATION_CACHE_DB": str(tmp_path / "citations.db"),
+            "FULLTEXT_INDEX_DB": str(tmp_path / "fulltext.db"),
+            "FULLTEXT_CACHE_DIR": str(tmp_path / "fulltext"),
+            **env,
+        }
+        for name, value in settings.items():
+            monkeypatch.setenv(name, value)
+        from ai_agent import LiteratureReviewAgent
+        return LiteratureReviewAgent()
+    return build
+
+
+@pytest.fixture
+def app_module(monkeypatch, tmp_path):
+    """The app module, imported (on first use) with its job and payment stores under tmp_path"""
+    for name, value in {"JOB_DB": tmp_path / "jobs.db", "PAYMENT_IDEMPOTENCY_DB": tmp_path / "payments.db",
+                        "ASSET_BUILD_DIR": tmp_path / "assets"}.items():
+        monkeypatch.setenv(name, str(value))
+    return importlib.import_module("app")
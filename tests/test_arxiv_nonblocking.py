@@ -0,0 +1,69 @@
+"""The arXiv searcher must not block the event loop while arXiv is slow."""
+import time
+import asyncio
+
+import aiohttp
+from aiohttp import web
+
+FEED_DELAY = 0.5
+FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:arxiv="http://arxiv.org/schemas/atom">
+  <entry>
+    <id>http://arxiv.org/abs/2401.00001v1</id>
+    <published>2024-01-01T00:00:00Z</published>
+    <title>Slow feeds and fast loops</title>
+    <summary>An abstract.</summary>
+    <author><name>Ada Lovelace</name></author>
+    <link title="pdf" href="http://arxiv.org/pdf/2401.00001v1"/>
+    <category term="cs.DC"/>
+  </entry>
+</feed>"""
+
+
+async def slow_feed(request: web.Request) -> web.Response:
+    await asyncio.sleep(FEED_DELAY)
+    return web.Response(text=FEED, content_type="application/atom+xml")
+
+
+def test_event_loop_progresses_while_arxiv_is_slow(make_agent):
+    async def scenario():
+        app = web.Application()
+        app.router.add_get("/api/query", slow_feed)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        agent = make_agent(ARXIV_API_URL=f"http://127.0.0.1:{port}/api/query")
+
+        ticks = 0
+        stop = asyncio.Event()
+
+        async def ticker():
+            nonlocal ticks
+            while not stop.is_set():
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        try:
+            async with aiohttp.ClientSession() as session:
+                ticking = asyncio.ensure_future(ticker())
+                started = time.monotonic()
+                results = await asyncio.gather(
+                    agent._search_arxiv(session, "slow feeds", 5),
+                    agent._search_arxiv(session, "fast loops", 5),
+                )
+                elapsed = time.monotonic() - started
+                stop.set()
+                await ticking
+        finally:
+            await runner.cleanup()
+        return results, elapsed, ticks
+
+    results, elapsed, ticks = asyncio.run(scenario())
+    assert [len(papers) for papers in results] == [1, 1]
+    assert results[0][0].title == "Slow feeds and fast loops"
+    # Both requests waited on arXiv at the same time rather than one after the other
+    assert elapsed < FEED_DELAY * 1.8
+    # The ticker kept running during the fetch: about one tick per 10 ms of delay
+    assert ticks >= FEED_DELAY / 0.01 * 0.5
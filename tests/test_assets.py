@@ -0,0 +1,63 @@
+"""Static assets: hashed URLs cached as immutable, ETags, precompressed variants, and nothing off the whitelist."""
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from assets import IMMUTABLE, REVALIDATE, StaticAssets, rewrite_references
+
+CSS = "body { color: #333; }\n" * 200
+
+
+@pytest.fixture
+def assets(tmp_path):
+    source = tmp_path / "site"
+    (source / "css").mkdir(parents=True)
+    (source / "css" / "site.css").write_text(CSS)
+    (source / "index.html").write_text('<link href="css/site.css" rel="stylesheet"><script src="app.js"></script>')
+    (source / "app.py").write_text("SECRET = 1\n")
+    static = StaticAssets(str(source), str(tmp_path / "build"))
+    static.load()
+    return static
+
+
+@pytest.fixture
+def client(assets):
+    app = Starlette(routes=[
+        Route("/", lambda request: assets.page_response(request, "index.html")),
+        Route("/static/{path:path}", lambda request: assets.asset_response(request, request.path_params["path"])),
+    ])
+    return TestClient(app)
+
+
+def test_rewrite_points_known_assets_at_hashed_urls():
+    html = '<a href="./css/site.css"></a><img src="logo.png"><a href="https://example.org/x.css"></a>'
+    rewritten = rewrite_references(html, {"css/site.css": "/static/css/site.abc.css"})
+    assert rewritten == '<a href="/static/css/site.abc.css"></a><img src="logo.png"><a href="https://example.org/x.css"></a>'
+
+
+def test_hashed_urls_are_immutable_and_plain_ones_revalidate(assets, client):
+    hashed = assets.url("css/site.css")
+    assert hashed != "/static/css/site.css"
+    response = client.get(hashed, headers={"accept-encoding": "identity"})
+    assert response.text == CSS and response.headers["cache-control"] == IMMUTABLE
+    assert client.get("/static/css/site.css").headers["cache-control"] == REVALIDATE
+
+
+def test_precompressed_variant_and_not_modified(assets, client):
+    response = client.get(assets.url("css/site.css"), headers={"accept-encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip" and response.text == CSS
+    assert response.headers["vary"] == "Accept-Encoding"
+    etag = response.headers["etag"]
+    assert client.get(assets.url("css/site.css"), headers={"if-none-match": etag}).status_code == 304
+
+
+def test_pages_link_hashed_assets(assets, client):
+    page = client.get("/", headers={"accept-encoding": "identity"})
+    assert assets.url("css/site.css") in page.text
+    # Unknown references are left as they are
+    assert 'src="app.js"' in page.text
+
+
+def test_only_whitelisted_files_are_served(client):
+    assert client.get("/static/app.py").status_code == 404
@@ -0,0 +1,70 @@
+"""Tiered cache: memory LRU, a disk tier shared between instances, and bounded disk growth."""
+import asyncio
+import threading
+
+from cache import TieredCache, normalize_topic
+
+
+def test_normalize_topic_folds_case_and_punctuation():
+    assert normalize_topic("  Graph Neural-Networks!! ") == normalize_topic("graph neural networks")
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = TieredCache("t", max_bytes=20)
+
+    async def scenario():
+        await cache.set("a", "x" * 6)
+        await cache.set("b", "y" * 6)
+        await cache.get("a")
+        await cache.set("c", "z" * 6)
+        return await cache.get("a"), await cache.get("b")
+
+    assert asyncio.run(scenario()) == ("x" * 6, None)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disk_tier_is_shared_and_honours_ttl(tmp_path):
+    db = str(tmp_path / "cache.db")
+    writer, reader = TieredCache("t", db_path=db), TieredCache("t", db_path=db)
+
+    async def scenario():
+        await writer.set(("arxiv", "topic"), {"papers": [1, 2]})
+        await writer.set("stale", 1, ttl=-1)
+        return await reader.get(("arxiv", "topic")), await reader.get("stale")
+
+    assert asyncio.run(scenario()) == ({"papers": [1, 2]}, None)
+    assert reader.stats()["disk_hits"] == 1
+
+
+def test_disk_writes_keep_a_running_total_and_sweep_only_when_over_budget(tmp_path):
+    cache = TieredCache("t", db_path=str(tmp_path / "cache.db"), disk_max_bytes=5000, sweep_interval=3600)
+
+    async def scenario():
+        for i in range(200):
+            await cache.set(f"k{i}", "v" * 90)
+
+    asyncio.run(scenario())
+    stats = cache.stats()
+    # The first write syncs the total; later sweeps run only when writes push it over budget
+    assert stats["disk_sweeps"] < 200 / 4
+    assert stats["disk_evictions"] > 0
+    assert 0 < stats["disk_bytes"] <= 5000
+    total = cache._conn().execute("SELECT SUM(size) FROM cache_entries WHERE namespace = 't'").fetchone()[0]
+    assert total == stats["disk_bytes"]
+
+
+def test_each_thread_reuses_one_connection(tmp_path):
+    cache = TieredCache("t", db_path=str(tmp_path / "cache.db"))
+    seen = []
+
+    def work():
+        cache._disk_set("k", b'"v"', 1e12)
+        cache._disk_get("k", 0)
+        seen.append(cache._conn())
+        seen.append(cache._conn())
+
+    thread = threading.Thread(target=work)
+    thread.start()
+    thread.join()
+    work()
+    assert seen[0] is seen[1] and seen[2] is seen[3] and seen[0] is not seen[2]
@@ -0,0 +1,87 @@
+"""Response compression: negotiated encodings, small bodies left alone, and streams sent without delay."""
+import asyncio
+import gzip
+import json
+
+from compression import CompressionMiddleware, negotiate
+
+SCOPE = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", b"gzip")]}
+
+
+def test_negotiate_honours_q_values_and_wildcards():
+    assert negotiate("gzip, zstd") == "zstd"
+    assert negotiate("zstd;q=0.5, gzip") == "gzip"
+    assert negotiate("br, *;q=0.1") == "zstd"
+    assert negotiate("identity") is None and negotiate(None) is None
+
+
+def run(app, minimum_size=100, sent=None):
+    """Messages the middleware sends for one request to app"""
+    sent = [] if sent is None else sent
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(CompressionMiddleware(app, minimum_size=minimum_size)(SCOPE, receive, send))
+    return sent
+
+
+def json_app(body: bytes):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+    return app
+
+
+def test_large_json_is_compressed_with_its_new_length():
+    body = json.dumps({"review": "graph neural networks " * 50}).encode()
+    start, message = run(json_app(body))
+    headers = dict(start["headers"])
+    assert headers[b"content-encoding"] == b"gzip" and b"accept-encoding" in headers[b"vary"].lower()
+    assert int(headers[b"content-length"]) == len(message["body"])
+    assert gzip.decompress(message["body"]) == body
+
+
+def test_small_json_is_sent_as_is():
+    start, message = run(json_app(b'{"ok": true}'))
+    assert b"content-encoding" not in dict(start["headers"])
+    assert message["body"] == b'{"ok": true}'
+
+
+def test_streams_get_their_headers_before_the_first_line():
+    lines = [b'{"index": 0}\n', b'{"index": 1}\n']
+    seen_before_body = []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson")]})
+        seen_before_body.append(len(sent))
+        for line in lines:
+            await send({"type": "http.response.body", "body": line, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    sent = []
+    run(app, minimum_size=1024, sent=sent)
+    # The start went out before the app produced any body
+    assert seen_before_body == [1] and sent[0]["type"] == "http.response.start"
+    assert dict(sent[0]["headers"])[b"content-encoding"] == b"gzip"
+    assert gzip.decompress(b"".join(m["body"] for m in sent[1:])) == b"".join(lines)
+
+
+def test_precompressed_and_event_stream_responses_pass_through():
+    def app_with(headers):
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            await send({"type": "http.response.body", "body": b"data: x\n\n" * 200})
+        return app
+
+    start, message = run(app_with([(b"content-type", b"text/event-stream")]))
+    assert b"content-encoding" not in dict(start["headers"])
+    assert message["body"] == b"data: x\n\n" * 200
+    start, message = run(app_with([(b"content-type", b"application/json"), (b"content-encoding", b"zstd")]))
+    assert dict(start["headers"])[b"content-encoding"] == b"zstd"
+    assert message["body"] == b"data: x\n\n" * 200
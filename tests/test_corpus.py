@@ -0,0 +1,12 @@
+"""The local corpus must answer when the limit comes from a fractional overfetch factor."""
+from corpus import PaperCorpus
+from records import Paper
+
+
+def test_search_accepts_a_float_limit(tmp_path):
+    corpus = PaperCorpus(str(tmp_path / "corpus.db"))
+    corpus.upsert([Paper(title=f"Graph neural networks part {i}", doi=f"10.1/{i}", year=2020) for i in range(5)])
+
+    # max_results * SEARCH_OVERFETCH is a float (e.g. 5 * 1.5 = 7.5)
+    assert len(corpus.search("graph neural networks", 3.5)) == 3
+    assert corpus.stats()["errors"] == 0
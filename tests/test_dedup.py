@@ -0,0 +1,64 @@
+"""Deduplication must keep titles in every script, and records without a usable title."""
+from dedup import dedupe_papers, normalize_title
+from records import Paper
+
+TITLES = ["Deep learning", "深度学习综述", "Глубокое обучение", "Βαθιά μάθηση", "التعلم العميق", "हिन्दी शोध"]
+
+
+def test_normalize_title_keeps_non_latin_scripts():
+    assert normalize_title("Café  Résumé!") == "cafe resume"
+    for title in TITLES[1:]:
+        assert normalize_title(title)
+
+
+def test_dedupe_keeps_mixed_script_results():
+    papers = [Paper(title=title, year=2020) for title in TITLES]
+    assert [p.title for p in dedupe_papers(papers)] == TITLES
+
+
+def test_dedupe_merges_non_latin_duplicates():
+    papers = [Paper(title="深度学习综述", year=2020, source="OpenAlex"),
+              Paper(title="深度学习：综述", year=2020, source="Crossref")]
+    merged = dedupe_papers(papers)
+    assert len(merged) == 1
+    assert merged[0].found_in == ["OpenAlex", "Crossref"]
+
+
+def test_dedupe_keeps_untitled_records_and_links_them_by_identifier():
+    papers = [Paper(title=None, doi="10.1234/abc", source="Crossref"),
+              Paper(title="!!!", doi="https://doi.org/10.1234/ABC", source="OpenAlex"),
+              Paper(title=None, source="arXiv")]
+    merged = dedupe_papers(papers)
+    assert len(merged) == 2
+    assert merged[0].found_in == ["Crossref", "OpenAlex"]
+
+
+def test_dedupe_keeps_numbered_parts_with_their_own_dois():
+    papers = [Paper(title="COVID-19 vaccine effectiveness in adults: Part 1", doi="10.1/a", year=2021),
+              Paper(title="COVID-19 vaccine effectiveness in adults: Part 2", doi="10.2/b", year=2021)]
+    assert len(dedupe_papers(papers)) == 2
+
+
+def test_dedupe_keeps_same_titled_papers_with_different_dois():
+    papers = [Paper(title="Paper Graph nets", doi=f"10.1234/{i}", year=2020) for i in range(5)]
+    papers.append(Paper(title="Paper Graph nets", year=2020, source="arXiv"))
+    # The record without a DOI joins the first group; the rest stay apart
+    assert len(dedupe_papers(papers)) == 5
+
+
+def test_dedupe_does_not_chain_follow_up_reports():
+    papers = [Paper(title=f"Semaglutide in adolescents with obesity: results at week {week}", year=2022, source=source)
+              for week, source in ((12, "OpenAlex"), (24, "Crossref"), (48, "PubMed"))]
+    assert len(dedupe_papers(papers)) == 3
+    with_dois = [Paper(title=p.title, doi=f"10.5555/w{i}", year=2022) for i, p in enumerate(papers)]
+    assert len(dedupe_papers(with_dois)) == 3
+
+
+def test_dedupe_still_merges_a_preprint_with_its_published_version():
+    papers = [Paper(title="Graph attention networks", arxiv_id="http://arxiv.org/abs/1710.10903v3", year=2017,
+                    source="arXiv"),
+              Paper(title="Graph Attention Networks.", doi="10.48550/arXiv.1710.10903", year=2018, source="OpenAlex"),
+              Paper(title="Graph attention networks", doi="10.1000/iclr.2018", year=2018, source="Crossref")]
+    merged = dedupe_papers(papers)
+    assert len(merged) == 1
+    assert merged[0].found_in == ["arXiv", "OpenAlex", "Crossref"]
@@ -0,0 +1,49 @@
+"""Full-text failures must come back in the stage's status, not only as counters."""
+import asyncio
+
+import aiohttp
+from aiohttp import web
+
+from cache import TieredCache
+from fulltext import FullTextIngester, pypdf_available
+from records import Paper
+
+
+async def broken_pdf(request: web.Request) -> web.Response:
+    return web.Response(body=b"%PDF-1.4 not really a pdf", content_type="application/pdf")
+
+
+async def server_error(request: web.Request) -> web.Response:
+    return web.Response(status=503)
+
+
+def test_failed_downloads_and_parses_are_reported(tmp_path):
+    async def scenario():
+        app = web.Application()
+        app.router.add_get("/broken.pdf", broken_pdf)
+        app.router.add_get("/down.pdf", server_error)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        ingester = FullTextIngester(str(tmp_path / "fulltext"), TieredCache("fulltext"), workers=1)
+        papers = [Paper(title="Down", pdf_url=f"{base}/down.pdf"),
+                  Paper(title="Broken", pdf_url=f"{base}/broken.pdf")]
+        try:
+            async with aiohttp.ClientSession() as session:
+                status = await ingester.enrich(session, papers)
+        finally:
+            ingester.close()
+            await runner.cleanup()
+        return papers, status, ingester.stats()
+
+    papers, status, stats = asyncio.run(scenario())
+    if not pypdf_available():
+        assert status["status"] == "unavailable"
+        return
+    assert status["failed"] == 2
+    assert [error["url"] for error in status["errors"]] == [paper.pdf_url for paper in papers]
+    assert status["errors"][0]["error"].startswith("download failed")
+    assert status["errors"][1]["error"].startswith("parse failed")
+    assert stats["recent_errors"] == status["errors"]
@@ -0,0 +1,46 @@
+"""Jobs interrupted by a restart must run again, even when the new server has the old PID."""
+import os
+import asyncio
+
+from jobs import JobQueue, JobStore
+
+
+def test_recover_requeues_jobs_claimed_by_an_earlier_boot_with_our_pid(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.create({"topic": "t"})
+    # The previous server was also this PID (PID 1 in a container)
+    assert store.claim(job_id, "previous-boot")["owner_pid"] == os.getpid()
+
+    assert store.recover("current-boot") == [job_id]
+    assert store.get(job_id)["status"] == "queued"
+
+
+def test_recover_leaves_jobs_claimed_by_this_boot(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.create({"topic": "t"})
+    store.claim(job_id, "current-boot")
+
+    assert store.recover("current-boot") == []
+    assert store.get(job_id)["status"] == "running"
+
+
+def test_stopping_the_queue_hands_running_jobs_back(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    started = asyncio.Event()
+
+    async def runner(params):
+        started.set()
+        await asyncio.sleep(60)
+        return {}
+
+    async def scenario():
+        queue = JobQueue(store, runner, workers=1)
+        await queue.start()
+        job_id = await queue.submit({"topic": "t"})
+        await started.wait()
+        await queue.stop()
+        return job_id
+
+    job_id = asyncio.run(scenario())
+    assert store.get(job_id)["status"] == "queued"
+    assert JobStore(str(tmp_path / "jobs.db")).recover("next-boot") == [job_id]
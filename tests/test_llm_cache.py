@@ -0,0 +1,69 @@
+"""LLM completions are cached by a fingerprint of the model, system prompt and prompt."""
+import asyncio
+from types import SimpleNamespace
+
+from ai_agent import human_message, system_message
+from cache import fingerprint
+
+
+class CountingLLM:
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return SimpleNamespace(content=f"answer {self.calls}")
+
+    async def astream(self, messages):
+        self.calls += 1
+        for part in ("stre", "amed"):
+            yield SimpleNamespace(content=part)
+
+
+def messages(prompt: str, system: str = "You are a reviewer.") -> list:
+    return [system_message(system), human_message(prompt)]
+
+
+def test_fingerprint_is_stable_and_separates_its_parts():
+    assert fingerprint("model", "system", "prompt") == fingerprint("model", "system", "prompt")
+    assert fingerprint("model", "system", "prompt") != fingerprint("model", "systemprompt", "")
+    assert len(fingerprint("x")) == 64
+
+
+def test_cache_key_covers_model_and_system_prompt(make_agent):
+    agent = make_agent()
+    key = agent._llm_cache_key(messages("review"))
+    assert agent._llm_cache_key(messages("review")) == key
+    assert agent._llm_cache_key(messages("review", system="You are terse.")) != key
+    agent.model_name = "another-model"
+    assert agent._llm_cache_key(messages("review")) != key
+
+
+def test_repeated_prompts_are_served_from_the_cache(make_agent):
+    agent = make_agent()
+    agent.llm = CountingLLM()
+
+    async def scenario():
+        first = await agent._invoke_llm(messages("review"))
+        again = await agent._invoke_llm(messages("review"))
+        other = await agent._invoke_llm(messages("summary"))
+        forced = await agent._invoke_llm(messages("review"), bypass_cache=True)
+        return first, again, other, forced, await agent._invoke_llm(messages("review"))
+
+    first, again, other, forced, refreshed = asyncio.run(scenario())
+    assert (first, again, other) == ("answer 1", "answer 1", "answer 2")
+    # bypass_cache calls the model and replaces the cached entry
+    assert forced == refreshed == "answer 3"
+    assert agent.llm.calls == 3
+
+
+def test_streamed_completions_are_cached_whole(make_agent):
+    agent = make_agent()
+    agent.llm = CountingLLM()
+
+    async def collect():
+        return [chunk async for chunk in agent._stream_llm(messages("review"))]
+
+    assert asyncio.run(collect()) == ["stre", "amed"]
+    assert asyncio.run(collect()) == ["streamed"]
+    assert agent.llm.calls == 1
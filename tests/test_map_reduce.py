@@ -0,0 +1,56 @@
+"""Source sets too large for one prompt are condensed batch by batch, then reduced into one review."""
+import asyncio
+from types import SimpleNamespace
+
+from records import Paper
+
+
+class FakeLLM:
+    """Records each prompt and answers with numbered notes"""
+
+    def __init__(self, fail_on=None):
+        self.prompts = []
+        self.fail_on = fail_on
+
+    async def ainvoke(self, messages):
+        prompt = messages[-1].content
+        self.prompts.append(prompt)
+        if self.fail_on and self.fail_on in prompt:
+            raise RuntimeError("upstream error")
+        return SimpleNamespace(content=f"notes {len(self.prompts)}")
+
+
+def make_papers(count: int) -> list:
+    sentence = "Graph neural networks propagate features along the edges of a graph. "
+    return [Paper(title=f"Study {i}", authors=[f"Author {i}"], year=2020, abstract=sentence * 20)
+            for i in range(count)]
+
+
+def test_small_source_sets_use_one_prompt(make_agent):
+    agent = make_agent()
+    agent.llm = FakeLLM()
+    review, stats = asyncio.run(agent._analyze(make_papers(3), "graph neural networks"))
+    assert review == "notes 1"
+    assert stats["mode"] == "single" and stats["batches"] == 1
+
+
+def test_large_source_sets_are_mapped_in_batches_then_reduced(make_agent):
+    agent = make_agent(PROMPT_TOKEN_BUDGET="300", ANALYSIS_BATCH_TOKENS="250")
+    agent.llm = FakeLLM()
+    review, stats = asyncio.run(agent._analyze(make_papers(12), "graph neural networks"))
+    batches = stats["batches"]
+    assert stats["mode"] == "map_reduce" and batches > 1
+    # One map call per batch, then the reduce call over their notes
+    assert len(agent.llm.prompts) == batches + 1
+    assert review == f"notes {batches + 1}"
+    final = agent.llm.prompts[-1]
+    assert all(f"Notes on batch {i} of {batches}" in final for i in range(1, batches + 1))
+
+
+def test_a_failed_batch_is_left_out_of_the_reduce_step(make_agent):
+    agent = make_agent(PROMPT_TOKEN_BUDGET="300", ANALYSIS_BATCH_TOKENS="250")
+    agent.llm = FakeLLM(fail_on="Study 0")
+    review, stats = asyncio.run(agent._analyze(make_papers(12), "graph neural networks"))
+    assert stats["mode"] == "map_reduce"
+    final = agent.llm.prompts[-1]
+    assert "Notes on batch 1 of" not in final and "Notes on batch 2 of" in final
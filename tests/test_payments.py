@@ -0,0 +1,100 @@
+"""Idempotency keys: one gateway call per key, no card details in what is stored, and server-side prices."""
+import socket
+import asyncio
+
+import pytest
+
+from benchmarks.fake_payments import FakeGateway
+from cache import TieredCache
+from payments import PaymentClient, PaymentError, plan_price
+
+
+def make_charge(amount: float = 19.0, number: str = "4242424242424242", cvv: str = "123") -> dict:
+    return {
+        "amount": amount,
+        "currency": "USD",
+        "payment_method": {"type": "card",
+                           "card": {"number": number, "expiry_month": 12, "expiry_year": 2030, "cvv": cvv}},
+        "customer": {"first_name": "Ada", "last_name": "Lovelace", "email": "ada@example.org", "phone": "1"},
+        "metadata": {"plan": "pro", "billing": "monthly", "service": "test"},
+    }
+
+
+class SlowTestClient(PaymentClient):
+    """Test-mode client whose simulated gateway takes a moment, so calls overlap"""
+
+    async def _create(self, charge, idempotency_key):
+        await asyncio.sleep(0.05)
+        return await super()._create(charge, idempotency_key)
+
+
+def make_client() -> PaymentClient:
+    return SlowTestClient(api_key=None, base_url="http://gateway.invalid", idempotency=TieredCache("payments"))
+
+
+def test_fingerprint_ignores_card_secrets():
+    same = PaymentClient._fingerprint("key", make_charge(cvv="999"))
+    assert same == PaymentClient._fingerprint("key", make_charge())
+    assert PaymentClient._fingerprint("key", make_charge(amount=49.0)) != same
+    assert PaymentClient._fingerprint("key", make_charge(number="4000000000000002")) != same
+
+
+def test_concurrent_different_payloads_under_one_key_charge_once():
+    client = make_client()
+
+    async def scenario():
+        return await asyncio.gather(
+            client.charge(make_charge(), "key-1"),
+            client.charge(make_charge(amount=49.0), "key-1"),
+            client.charge(make_charge(), "key-1"),
+            return_exceptions=True,
+        )
+
+    first, different, same = asyncio.run(scenario())
+    assert client.stats()["charges"] == 1
+    assert isinstance(different, PaymentError) and different.status_code == 422
+    assert same == first and first["replayed"] is False
+
+
+def test_plan_price_comes_from_the_server_table():
+    assert plan_price("pro", "monthly", "19") == 19.0
+    assert plan_price("enterprise", "yearly", "39.00") == 39.0
+
+
+@pytest.mark.parametrize("plan, billing, price", [
+    ("enterprise", "monthly", "1"),
+    ("pro", "monthly", "15"),
+    ("pro", "monthly", "nineteen"),
+    ("platinum", "monthly", "19"),
+    ("pro", "weekly", "19"),
+])
+def test_mismatched_price_or_unknown_plan_is_rejected(plan, billing, price):
+    with pytest.raises(PaymentError) as error:
+        plan_price(plan, billing, price)
+    assert error.value.status_code == 400
+
+
+def test_simulated_charges_are_never_confirmed():
+    client = PaymentClient(api_key=None, base_url="http://gateway.invalid", idempotency=TieredCache("payments"))
+    result = asyncio.run(client.charge(make_charge(), "key-1"))
+    assert result["test_mode"] is True and result["confirmed"] is False
+
+
+def test_gateway_accepted_charges_are_confirmed():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    async def scenario():
+        runner = await FakeGateway(latency_ms=0, jitter_ms=0).start(port=port)
+        client = PaymentClient(api_key="key", base_url=FakeGateway.base_url("127.0.0.1", port),
+                               idempotency=TieredCache("payments"))
+        try:
+            return await client.charge(make_charge(), "key-1")
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    result = asyncio.run(scenario())
+    assert result["test_mode"] is False and result["confirmed"] is True
+    assert result["transaction_id"].startswith("CHG_")
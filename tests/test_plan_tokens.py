@@ -0,0 +1,20 @@
+"""Review priority must come from a server-signed plan token, never from the client's say-so."""
+from payments import PlanTokens
+
+
+def test_issued_token_grants_its_plan():
+    tokens = PlanTokens(b"secret")
+    assert tokens.verify(tokens.issue("enterprise")) == "enterprise"
+
+
+def test_missing_forged_and_expired_tokens_are_free():
+    tokens = PlanTokens(b"secret")
+    token = tokens.issue("pro")
+    payload, signature = token.rsplit(".", 1)
+    assert tokens.verify(None) == "free"
+    assert tokens.verify("garbage") == "free"
+    assert tokens.verify(f"{payload}.{'0' * len(signature)}") == "free"
+    assert tokens.verify(f"é{payload}.{signature}") == "free"
+    assert PlanTokens(b"another secret").verify(token) == "free"
+    expired = PlanTokens(b"secret", ttl=-1).issue("pro")
+    assert tokens.verify(expired) == "free"
@@ -0,0 +1,26 @@
+"""The checkout endpoint charges the server's price and grants no plan for simulated payments."""
+import pytest
+from fastapi.testclient import TestClient
+
+CHECKOUT = {"firstName": "Ada", "lastName": "Lovelace", "email": "ada@example.org", "phone": "1",
+            "cardNumber": "4242424242424242", "expiryDate": "12/30", "cvv": "123",
+            "plan": "enterprise", "price": "49", "billing": "monthly"}
+
+
+@pytest.fixture
+def client(app_module, monkeypatch):
+    monkeypatch.setattr(app_module.payment_client, "api_key", None)
+    return TestClient(app_module.app)
+
+
+def test_checkout_quoting_another_price_is_rejected(client):
+    response = client.post("/api/process-payment", json={**CHECKOUT, "price": "1"})
+    assert response.status_code == 400
+    assert "Price does not match" in response.json()["detail"]
+
+
+def test_simulated_checkout_grants_no_plan(client):
+    response = client.post("/api/process-payment", json=CHECKOUT)
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["plan"], body["plan_token"], body["amount"]) == ("free", None, "49")
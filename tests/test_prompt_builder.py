@@ -0,0 +1,40 @@
+"""Review prompts fit the model's token budget by compressing abstracts to their most relevant sentences."""
+from prompt_builder import DEFAULT_PROMPT_BUDGET, PromptBuilder, compress_abstract, estimate_tokens
+from records import Paper
+
+ABSTRACT = ("We study protein folding. Graph neural networks predict molecular properties well. "
+            "Our dataset has ten thousand molecules. Results improve on prior graph neural network baselines.")
+
+
+def test_short_abstracts_are_left_alone():
+    assert compress_abstract("  One   sentence. ", ["graph"], 50) == "One sentence."
+
+
+def test_compression_keeps_relevant_sentences_in_order_and_marks_gaps():
+    short = compress_abstract(ABSTRACT, ["graph", "neural", "networks"], 30)
+    assert estimate_tokens(short) <= 30 + 2
+    assert short == ("Graph neural networks predict molecular properties well. "
+                     "… Results improve on prior graph neural network baselines.")
+
+
+def test_unknown_models_get_the_default_budget():
+    assert PromptBuilder("no-such-model").budget == DEFAULT_PROMPT_BUDGET
+    assert PromptBuilder("no-such-model", budget=1234).budget == 1234
+
+
+def test_render_tightens_abstracts_until_the_set_fits():
+    papers = [Paper(title=f"Study {i}", authors=["A", "B", "C", "D"], year=2021, abstract=ABSTRACT * 4)
+              for i in range(8)]
+    entries, stats = PromptBuilder("test", budget=600).render(papers, "graph neural networks")
+    assert len(entries) == 8
+    assert stats["material_tokens"] <= 600 < stats["original_tokens"]
+    assert stats["abstract_cap_tokens"] < 250
+    assert stats["compressed_abstracts"] == 8
+    assert entries[0].startswith("[1] Study 0 (2021). A, B, C et al.")
+
+
+def test_render_reports_overflow_for_map_reduce_when_the_floor_is_reached():
+    papers = [Paper(title=f"Study {i}", year=2021, abstract=ABSTRACT * 4) for i in range(40)]
+    _, stats = PromptBuilder("test", budget=500).render(papers, "graph neural networks")
+    assert stats["abstract_cap_tokens"] == 60
+    assert stats["material_tokens"] > 500
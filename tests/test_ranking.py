@@ -0,0 +1,42 @@
+"""Relevance ranking: topic matches first, then recency and source quality, never year alone."""
+from ranking import rank_papers, tokenize
+from records import Paper
+
+
+def test_tokenize_drops_stopwords_and_single_characters():
+    assert tokenize("A study of Graph-Neural networks in 3 D") == ["graph", "neural", "networks"]
+
+
+def test_relevant_older_paper_beats_recent_unrelated_one():
+    papers = [
+        Paper(title="Protein folding with cryo-EM", abstract="Structural biology methods.", year=2024, source="arXiv"),
+        Paper(title="Graph neural networks for molecules",
+              abstract="We apply graph neural networks to molecular property prediction.", year=2016, source="arXiv"),
+    ]
+    ranked = rank_papers(papers, "graph neural networks", current_year=2025)
+    assert ranked[0].title == "Graph neural networks for molecules"
+
+
+def test_title_matches_outrank_abstract_only_matches():
+    papers = [
+        Paper(title="A survey of methods", abstract="Mentions transformers once.", year=2020, source="OpenAlex"),
+        Paper(title="Transformers for vision", abstract="Image classification.", year=2020, source="OpenAlex"),
+    ]
+    assert rank_papers(papers, "transformers", current_year=2025)[0].title == "Transformers for vision"
+
+
+def test_ties_on_text_fall_back_to_recency_then_source():
+    papers = [
+        Paper(title="Federated learning", year=2015, source="Semantic Scholar"),
+        Paper(title="Federated learning", year=2023, source="Crossref"),
+        Paper(title="Federated learning", year=2023, source="Semantic Scholar"),
+    ]
+    ranked = rank_papers(papers, "federated learning", current_year=2025)
+    expected = [(2023, "Semantic Scholar"), (2023, "Crossref"), (2015, "Semantic Scholar")]
+    assert [(p.year, p.source) for p in ranked] == expected
+
+
+def test_small_inputs_are_returned_unchanged():
+    paper = Paper(title="Only one")
+    assert rank_papers([], "anything") == []
+    assert rank_papers([paper], "anything") == [paper]
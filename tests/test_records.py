@@ -0,0 +1,57 @@
+"""Paper records: slotted, round-trip through the stores, memoized APA lines, and orjson responses."""
+import json
+
+import orjson
+import pytest
+
+from records import PAPER_FIELDS, Paper, openalex_record
+
+PAPER = Paper(title="Attention is all you need.", authors=["Ashish Vaswani", "Noam Shazeer", "Niki Parmar"],
+              abstract="x" * 250, year=2017, pdf_url="https://arxiv.org/pdf/1706.03762", source="arXiv")
+
+
+def test_records_are_slotted():
+    paper = Paper(title="t")
+    assert not hasattr(paper, "__dict__")
+    with pytest.raises(AttributeError):
+        paper.unknown = 1
+
+
+def test_to_dict_round_trips_and_skips_private_fields():
+    paper = Paper(title="t", authors=["A"], year=2020)
+    paper.sections = {"methods": "m"}
+    data = paper.to_dict()
+    assert tuple(data) == PAPER_FIELDS and "_sections" not in data
+    assert Paper.from_dict({**data, "unknown": 1}) == Paper(title="t", authors=["A"], year=2020)
+
+
+def test_apa_reference_is_formatted_once():
+    reference = PAPER.apa_reference()
+    assert reference == "Vaswani, A., Shazeer, N., & Parmar, N. (2017). Attention is all you need. " \
+                        "https://arxiv.org/pdf/1706.03762"
+    assert PAPER.apa_reference() is reference
+    assert Paper().apa_reference() == "Author (n.d.). Untitled."
+
+
+def test_source_entry_truncates_long_abstracts():
+    entry = PAPER.source_entry()
+    assert entry["year"] == "2017" and entry["abstract"] == "x" * 200 + "..."
+
+
+def test_openalex_abstracts_are_rebuilt_from_the_inverted_index():
+    paper = openalex_record({"title": "t", "publication_year": 2021, "id": "https://openalex.org/W1",
+                             "abstract_inverted_index": {"graphs": [1], "Learning": [0], "fast": [2]}})
+    assert paper.abstract == "Learning graphs fast" and paper.source == "OpenAlex"
+    assert paper.published_date == "2021-01-01"
+
+
+def test_orjson_serializes_records_like_the_model(app_module):
+    paper = Paper.from_dict(PAPER.to_dict())
+    paper.sections = {"methods": "not for the response"}
+    assert json.loads(orjson.dumps(paper)) == paper.to_dict()
+    result = {"review": "text", "sources": [paper.source_entry()], "review_id": "r1", "timings": {"llm": 1.0}}
+    payload = app_module._review_response(result, include_timings=False)
+    # The model rejects an explicit None for its plain str fields, so build it from the set ones
+    model = app_module.LiteratureReviewResponse(**{k: v for k, v in payload.items() if v is not None})
+    assert json.loads(orjson.dumps(payload)) == json.loads(model.model_dump_json())
+    assert payload["timings"] is None and payload["success"] is True
@@ -0,0 +1,90 @@
+"""Provider guards: token-bucket limits, and a breaker that opens, probes and closes."""
+import asyncio
+
+import aiohttp
+import pytest
+
+from resilience import CircuitBreaker, ProviderGuard, ProviderUnavailable, TokenBucket, build_provider_guards
+
+
+def test_bucket_allows_a_burst_then_throttles_or_rejects():
+    bucket = TokenBucket(rate=20, burst=2)
+
+    async def scenario():
+        burst = [await bucket.acquire(max_wait=0) for _ in range(2)]
+        rejected = await bucket.acquire(max_wait=0)
+        throttled = await bucket.acquire(max_wait=1)
+        return burst, rejected, throttled
+
+    assert asyncio.run(scenario()) == ([True, True], False, True)
+    assert bucket.stats()["rejected"] == 1 and bucket.stats()["throttled"] == 1
+
+
+def test_breaker_opens_after_consecutive_failures_and_recovers_through_one_probe():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    asyncio.run(asyncio.sleep(0.06))
+    assert breaker.allow() and breaker.state == "half_open"
+    # Only one probe at a time while half-open
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=0.05)
+    breaker.record_failure(retry_after=0)
+    assert breaker.state == "open"
+    asyncio.run(asyncio.sleep(0.06))
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.stats()["trips"] == 2
+
+
+def make_error(status: int, headers=None) -> aiohttp.ClientResponseError:
+    return aiohttp.ClientResponseError(None, (), status=status, headers=headers or {})
+
+
+def test_guard_trips_on_429_and_short_circuits_later_calls():
+    guard = ProviderGuard("openalex", rate=100, burst=100, failure_threshold=5, reset_timeout=30, max_wait=0)
+    calls = []
+
+    async def rate_limited():
+        calls.append(1)
+        raise make_error(429, {"Retry-After": "60"})
+
+    async def scenario():
+        with pytest.raises(aiohttp.ClientResponseError):
+            await guard.call(rate_limited)
+        with pytest.raises(ProviderUnavailable):
+            await guard.call(rate_limited)
+
+    asyncio.run(scenario())
+    assert len(calls) == 1
+    assert guard.stats()["breaker"]["retry_in"] > 30
+
+
+def test_client_errors_do_not_count_against_the_provider():
+    guard = ProviderGuard("crossref", rate=100, burst=100, failure_threshold=1, reset_timeout=30, max_wait=0)
+
+    async def not_found():
+        raise make_error(404)
+
+    async def scenario():
+        with pytest.raises(aiohttp.ClientResponseError):
+            await guard.call(not_found)
+
+    asyncio.run(scenario())
+    assert guard.breaker.state == "closed"
+
+
+def test_rate_limit_overrides_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("PROVIDER_RATE_LIMITS", "arxiv=0.5:2, openalex=3")
+    guards = build_provider_guards(["arxiv", "openalex", "crossref"])
+    assert (guards["arxiv"].limiter.rate, guards["arxiv"].limiter.burst) == (0.5, 2)
+    assert (guards["openalex"].limiter.rate, guards["openalex"].limiter.burst) == (3, 3)
+    assert guards["crossref"].limiter.rate == 10.0
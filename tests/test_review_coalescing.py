@@ -0,0 +1,30 @@
+"""Identical concurrent review requests must share one generation."""
+import asyncio
+
+
+def test_identical_concurrent_reviews_run_once(make_agent):
+    agent = make_agent()
+    calls = []
+
+    async def generate(topic, *args):
+        calls.append(topic)
+        await asyncio.sleep(0.05)
+        return {"review": f"Review of {topic}", "sources": []}
+
+    agent._generate_review = generate
+
+    async def scenario():
+        return await asyncio.gather(
+            agent.generate_review("Graph Neural Networks"),
+            agent.generate_review("graph neural networks!"),
+            agent.generate_review("graph neural networks", plan="pro"),
+            agent.generate_review("transformers"),
+        )
+
+    first, same, paid, other = asyncio.run(scenario())
+    # Same normalized topic and options share a call; another plan or topic does not
+    assert len(calls) == 3
+    assert first == same and first is not same
+    assert paid["review"] == "Review of graph neural networks"
+    assert other["review"] == "Review of transformers"
+    assert agent.review_flight.stats()["coalesced"] == 1
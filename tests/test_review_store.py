@@ -0,0 +1,69 @@
+"""Stored reviews must not pile up: repeats share one body, each keeps its own ID, and old reviews are pruned."""
+import json
+import time
+import sqlite3
+
+from records import Paper
+from review_store import ReviewStore
+
+PARAMS = {"topic": "graph neural networks", "field": "cs"}
+PAPERS = [Paper(title="Graph neural networks", year=2020)]
+
+
+def test_identical_reviews_get_their_own_ids_and_share_one_body(tmp_path):
+    store = ReviewStore(str(tmp_path / "reviews.db"))
+    first = store.create(PARAMS, "body", PAPERS)
+    second = store.create(dict(reversed(PARAMS.items())), "body", PAPERS)
+    store.create(PARAMS, "another body", PAPERS)
+
+    assert first != second
+    assert store.get(second)["body"] == "body"
+    assert store.stats() == {"reviews": 3, "refreshes": 0, "stored_bodies": 2}
+
+
+def test_refreshing_one_review_leaves_an_identical_one_alone(tmp_path):
+    store = ReviewStore(str(tmp_path / "reviews.db"))
+    mine = store.create(PARAMS, "body", PAPERS)
+    theirs = store.create(PARAMS, "body", PAPERS)
+    searched_at = time.time()
+    store.update(mine, "body\n\nUpdate", PAPERS + [Paper(title="New", year=2025)], searched_at)
+    store.touch(mine, searched_at + 1)
+
+    assert store.get(mine)["body"] == "body\n\nUpdate" and store.get(mine)["revision"] == 2
+    other = store.get(theirs)
+    assert (other["body"], other["revision"], len(other["papers"])) == ("body", 1, 1)
+    assert other["searched_at"] < searched_at
+    # Once nothing shares it, a superseded body is dropped
+    store.update(mine, "body\n\nUpdate 2", PAPERS, searched_at)
+    assert store.stats()["stored_bodies"] == 2
+
+
+def test_prune_drops_reviews_past_retention(tmp_path):
+    store = ReviewStore(str(tmp_path / "reviews.db"))
+    old = store.create(PARAMS, "old", PAPERS, searched_at=time.time() - 100)
+    store._execute("UPDATE reviews SET updated_at = ? WHERE id = ?", (time.time() - 100, old))
+    kept = store.create(PARAMS, "new", PAPERS)
+
+    assert store.prune(50) == 1
+    assert store.get(old) is None
+    assert store.get(kept) is not None
+    assert store.stats()["stored_bodies"] == 1
+
+
+def test_reviews_stored_with_inline_bodies_are_migrated(tmp_path):
+    path = str(tmp_path / "reviews.db")
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("""CREATE TABLE reviews (id TEXT PRIMARY KEY, params TEXT NOT NULL, body TEXT NOT NULL,
+                        papers TEXT NOT NULL, revision INTEGER NOT NULL, created_at REAL NOT NULL,
+                        updated_at REAL NOT NULL, searched_at REAL NOT NULL, digest TEXT)""")
+        papers = json.dumps([p.to_dict() for p in PAPERS])
+        for review_id in ("a", "b"):
+            conn.execute("INSERT INTO reviews VALUES (?, ?, 'body', ?, 1, 1, 1, 1, NULL)",
+                         (review_id, json.dumps(PARAMS), papers))
+    conn.close()
+
+    store = ReviewStore(path)
+    assert store.get("a")["body"] == store.get("b")["body"] == "body"
+    assert store.get("a")["papers"] == PAPERS
+    assert store.stats() == {"reviews": 2, "refreshes": 0, "stored_bodies": 1}
@@ -0,0 +1,78 @@
+"""LLM admission control: paid plans are served first, and overflow is shed with a retry hint."""
+import asyncio
+
+import pytest
+
+from scheduler import LLMScheduler, SchedulerBusy, normalize_plan
+
+
+def test_unknown_plans_run_as_free():
+    assert normalize_plan(" Enterprise ") == "enterprise"
+    assert normalize_plan("platinum") == normalize_plan(None) == "free"
+
+
+def test_from_env_reads_per_plan_settings(monkeypatch):
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY", "2")
+    monkeypatch.setenv("LLM_QUEUE_LIMITS", "free=3, pro=7, bogus=9")
+    monkeypatch.setenv("LLM_QUEUE_TIMEOUTS", "free=1.5")
+    scheduler = LLMScheduler.from_env()
+    assert scheduler.max_concurrency == 2
+    assert scheduler.queue_limits["free"] == 3 and scheduler.queue_limits["pro"] == 7
+    assert scheduler.queue_timeouts["free"] == 1.5 and "bogus" not in scheduler.queue_limits
+
+
+def test_freed_slots_go_to_the_highest_priority_waiter():
+    scheduler = LLMScheduler(max_concurrency=1)
+    order = []
+
+    async def call(plan, hold=0.0):
+        async with scheduler.slot(plan):
+            order.append(plan)
+            await asyncio.sleep(hold)
+
+    async def scenario():
+        first = asyncio.create_task(call("free", hold=0.05))
+        await asyncio.sleep(0)
+        waiting = [asyncio.create_task(call(plan)) for plan in ("free", "pro", "enterprise")]
+        await asyncio.gather(first, *waiting)
+
+    asyncio.run(scenario())
+    assert order == ["free", "enterprise", "pro", "free"]
+    assert scheduler.stats()["active"] == 0
+
+
+def test_full_queues_and_long_waits_are_shed():
+    scheduler = LLMScheduler(max_concurrency=1, queue_limits={"free": 1}, queue_timeouts={"free": 0.05})
+
+    async def call(plan):
+        async with scheduler.slot(plan):
+            await asyncio.sleep(0.2)
+
+    async def scenario():
+        holder = asyncio.create_task(call("pro"))
+        await asyncio.sleep(0)
+        return await asyncio.gather(call("free"), call("free"), holder, return_exceptions=True)
+
+    timed_out, shed, _ = asyncio.run(scenario())
+    assert isinstance(timed_out, SchedulerBusy) and isinstance(shed, SchedulerBusy)
+    assert shed.retry_after >= 1.0
+    free = scheduler.stats()["plans"]["free"]
+    assert (free["shed"], free["timed_out"], free["waiting"]) == (1, 1, 0)
+
+
+def test_cancelled_waiters_give_up_their_place():
+    scheduler = LLMScheduler(max_concurrency=1)
+
+    async def scenario():
+        async with scheduler.slot("free"):
+            waiter = asyncio.create_task(scheduler.slot("pro").__aenter__())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+        async with scheduler.slot("free"):
+            pass
+
+    asyncio.run(scenario())
+    assert scheduler.stats()["active"] == 0
+    assert scheduler.stats()["plans"]["pro"]["waiting"] == 0